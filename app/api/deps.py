@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -6,7 +6,7 @@ from collections.abc import AsyncGenerator  # <-- добавили
 
 from app.db.session import get_session
 from app.core.config import settings
-from app.core.security import decode_token
+from app.core.security import decode_machine_token, decode_token
 from app.models.user import User
 
 http_bearer = HTTPBearer()
@@ -20,6 +20,10 @@ async def get_current_user(
     db: AsyncSession = Depends(get_db),
 ) -> User:
     token = creds.credentials if creds else None
+    return await user_from_token(db, token)
+
+async def user_from_token(db: AsyncSession, token: str | None) -> User:
+    """Пользователь по JWT; нужен и там, где токен приходит не заголовком (EventSource не шлёт Authorization)."""
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
@@ -32,3 +36,10 @@ async def get_current_user(
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
+
+async def get_agent_machine_id(x_machine_token: str = Header(...)) -> int:
+    """ПК-агент (киоск): id машины из заголовка X-Machine-Token, без обращения к БД."""
+    machine_id = decode_machine_token(x_machine_token, settings.secret_key)
+    if machine_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid machine token")
+    return machine_id
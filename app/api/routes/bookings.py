@@ -1,17 +1,44 @@
+import math
+from datetime import date, datetime, timedelta, timezone
 from typing import List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy import select, delete
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user
+from app.core.assign import free_index
 from app.core.audit import log_action
-from app.models.booking import Booking, BookingStatus as BookingStatusEnum
-from app.models.user import User
-from app.schemas.booking import BookingCreate, BookingOut, BookingCancelOut
+from app.core.availability import bulk_conflicts_query
+from app.core.recurrence import Recurrence, RecurrenceError, expand
+from app.core.rollups import as_utc
+from app.core.session_open import SessionStartError, open_session, session_opened
+from app.core.timeline import get_timeline, invalidate_timeline
+from app.models.booking import Booking, BookingStatus as BookingStatusEnum, booking_series_seq
+from app.schemas.booking import (
+    BookingBulkCreate,
+    BookingBulkOut,
+    BookingCancelOut,
+    BookingCheckInIn,
+    BookingConflict,
+    BookingCreate,
+    BookingOut,
+    TimelineOut,
+)
+from app.schemas.session import SessionOut
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
+# насколько раньше начала брони клиента можно посадить за ПК
+CHECK_IN_EARLY = timedelta(minutes=15)
+
+# максимум броней (повторений × ПК) в одном запросе /bookings/bulk
+MAX_BULK_BOOKINGS = 500
+
 
 def _role_value(r) -> str:
     if r is None:
@@ -19,6 +46,22 @@ def _role_value(r) -> str:
     return getattr(r, "value", str(r))
 
 
+# имя нарушенного ограничения -> ответ API (сообщения те же, что были у проверок через SELECT)
+_CONSTRAINT_ERRORS = {
+    "ex_bookings_machine_overlap": (409, "Booking overlap"),
+    "ex_bookings_user_overlap": (409, "User already has an active booking for this time range"),
+    "bookings_user_id_fkey": (404, "User not found"),
+    "bookings_machine_id_fkey": (404, "Machine not found"),
+}
+
+
+def booking_integrity_error(e: IntegrityError) -> HTTPException:
+    diag = getattr(e.orig, "diag", None)
+    name = getattr(diag, "constraint_name", None)
+    status_code, detail = _CONSTRAINT_ERRORS.get(name, (409, "Booking conflict"))
+    return HTTPException(status_code=status_code, detail=detail)
+
+
 @router.get("", response_model=List[BookingOut])
 async def list_bookings(
     request: Request,
@@ -51,6 +94,31 @@ async def list_bookings(
     return rows
 
 
+@router.get("/timeline", response_model=TimelineOut)
+async def bookings_timeline(
+    day: date,
+    slot_minutes: int = Query(default=15, ge=5, le=60),
+    tz: str = Query(default="UTC"),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Занятость всех ПК за сутки по слотам (брони + сессии) для календаря.
+    Без личных данных, поэтому доступна любому авторизованному; не пишется в audit log.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if 1440 % slot_minutes:
+        raise HTTPException(status_code=400, detail="slot_minutes must divide 1440")
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+
+    return await get_timeline(db, day, slot_minutes, tz)
+
+
 @router.post("", response_model=BookingOut, status_code=201)
 async def create_booking(
     payload: BookingCreate,
@@ -66,13 +134,6 @@ async def create_booking(
     # user создаёт бронь только для себя; admin/operator могут создать для любого user_id
     target_user_id = user.id if role == "user" else payload.user_id
 
-    # Проверяем существование пользователя (важно для admin/operator, иначе получим FK error)
-    target_user = (
-        await db.execute(select(User).where(User.id == target_user_id))
-    ).scalar_one_or_none()
-    if not target_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     b = Booking(
         user_id=target_user_id,
         machine_id=payload.machine_id,
@@ -82,34 +143,16 @@ async def create_booking(
         status=BookingStatusEnum.active,
     )
 
-    # Проверка пересечений (если у тебя уже есть — оставь свою)
-    overlap_stmt = select(Booking).where(
-        Booking.machine_id == payload.machine_id,
-        Booking.status == BookingStatusEnum.active,
-        Booking.start_at < payload.end_at,
-        Booking.end_at > payload.start_at,
-    )
-    overlap = (await db.execute(overlap_stmt)).scalar_one_or_none()
-    if overlap:
-        raise HTTPException(status_code=409, detail="Booking overlap")
-
-    # Запрет: у пользователя уже есть активная бронь, пересекающаяся по времени
-    user_overlap_stmt = select(Booking).where(
-        Booking.user_id == target_user_id,
-        Booking.status == BookingStatusEnum.active,
-        Booking.start_at < payload.end_at,
-        Booking.end_at > payload.start_at,
-    )
-    user_overlap = (await db.execute(user_overlap_stmt)).scalar_one_or_none()
-    if user_overlap:
-        raise HTTPException(
-            status_code=409,
-            detail="User already has an active booking for this time range",
-        )
-
+    # один INSERT: пересечения и несуществующие user/machine ловят ограничения БД
     db.add(b)
-    await db.commit()
-    await db.refresh(b)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise booking_integrity_error(e)
+
+    invalidate_timeline(b.start_at, b.end_at)
+    free_index.booking_added(b.id, b.machine_id, b.start_at, b.end_at)
 
     ip = request.client.host if request.client else None
     await log_action(
@@ -125,6 +168,150 @@ async def create_booking(
     return b
 
 
+@router.post("/bulk", response_model=BookingBulkOut, status_code=201)
+async def create_bookings_bulk(
+    payload: BookingBulkCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Групповая / повторяющаяся бронь: все повторения × все ПК проверяются одним
+    запросом и вставляются одним INSERT как одна серия (series_id).
+    Несколько ПК в одной серии — только admin/operator.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    role = _role_value(user.role)
+    target_user_id = user.id if role == "user" else payload.user_id
+
+    machine_ids = list(dict.fromkeys(payload.machine_ids))
+    # внутри серии ex_bookings_user_overlap не действует; клиенту — только один ПК,
+    # иначе одна учётная запись может занять весь зал
+    if role == "user" and len(machine_ids) > 1:
+        raise HTTPException(status_code=403, detail="Only staff can book several machines at once")
+    rule = None
+    if payload.recurrence is not None:
+        r = payload.recurrence
+        rule = Recurrence(
+            freq=r.freq,
+            interval=r.interval,
+            count=r.count,
+            until=r.until,
+            byweekday=tuple(r.byweekday) if r.byweekday else None,
+            tz=r.tz,
+        )
+    try:
+        occurrences = expand(
+            payload.start_at,
+            payload.end_at,
+            rule,
+            limit=MAX_BULK_BOOKINGS // len(machine_ids),
+        )
+    except RecurrenceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not occurrences:
+        raise HTTPException(status_code=400, detail="Recurrence produces no occurrences")
+
+    candidates = [(mid, start_at, end_at) for start_at, end_at in occurrences for mid in machine_ids]
+
+    # 1) все пересечения — одним запросом; на кандидата берём первое (сначала по ПК)
+    blocked: dict[int, BookingConflict] = {}
+    for idx, booking_id, same_machine in (
+        await db.execute(bulk_conflicts_query(target_user_id, candidates))
+    ).all():
+        if idx not in blocked:
+            mid, start_at, end_at = candidates[idx]
+            blocked[idx] = BookingConflict(
+                machine_id=mid,
+                start_at=start_at,
+                end_at=end_at,
+                reason="machine" if same_machine else "user",
+                booking_id=booking_id,
+            )
+    conflicts = list(blocked.values())
+
+    if conflicts and payload.mode == "all_or_nothing":
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Booking overlap", "conflicts": jsonable_encoder(conflicts)},
+        )
+
+    # 2) один INSERT серии; ограничения БД по-прежнему страхуют от гонок
+    series_id = await db.scalar(select(booking_series_seq.next_value()))
+    rows = [
+        {
+            "user_id": target_user_id,
+            "machine_id": mid,
+            "start_at": start_at,
+            "end_at": end_at,
+            "note": payload.note,
+            "status": BookingStatusEnum.active,
+            "series_id": series_id,
+        }
+        for i, (mid, start_at, end_at) in enumerate(candidates)
+        if i not in blocked
+    ]
+
+    created: list[Booking] = []
+    if rows:
+        if payload.mode == "all_or_nothing":
+            stmt = insert(Booking).returning(Booking)
+        else:
+            # занятое параллельной записью пропускаем и отдаём как concurrent
+            stmt = pg_insert(Booking).on_conflict_do_nothing().returning(Booking)
+        try:
+            created = list(await db.scalars(stmt, rows))
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise booking_integrity_error(e)
+
+    if len(created) < len(rows):
+        inserted = {(b.machine_id, as_utc(b.start_at)) for b in created}
+        conflicts += [
+            BookingConflict(
+                machine_id=row["machine_id"],
+                start_at=row["start_at"],
+                end_at=row["end_at"],
+                reason="concurrent",
+            )
+            for row in rows
+            if (row["machine_id"], as_utc(row["start_at"])) not in inserted
+        ]
+
+    if created:
+        invalidate_timeline(
+            min(b.start_at for b in created),
+            max(b.end_at for b in created),
+        )
+        for b in created:
+            free_index.booking_added(b.id, b.machine_id, b.start_at, b.end_at)
+
+    ip = request.client.host if request.client else None
+    await log_action(
+        db,
+        user=user,
+        action="CREATE_BOOKINGS_BULK",
+        entity="booking",
+        entity_id=series_id,
+        details=(
+            f"series_id={series_id}, user_id={target_user_id}, machines={machine_ids}, "
+            f"mode={payload.mode}, requested={len(candidates)}, created={len(created)}, "
+            f"conflicts={len(conflicts)}"
+        ),
+        ip_address=ip,
+    )
+
+    return BookingBulkOut(
+        series_id=series_id,
+        requested=len(candidates),
+        created=[BookingOut.model_validate(b) for b in created],
+        conflicts=conflicts,
+    )
+
+
 @router.post("/{booking_id}/cancel", response_model=BookingCancelOut)
 async def cancel_booking(
     booking_id: int,
@@ -143,9 +330,16 @@ async def cancel_booking(
     if role == "user" and b.user_id != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
+    # завершённую бронь (пришёл / не пришёл / истекла) отменять уже нечего
+    if b.status not in {BookingStatusEnum.active, BookingStatusEnum.cancelled}:
+        raise HTTPException(status_code=400, detail="Booking is not active")
+
     b.status = BookingStatusEnum.cancelled
     await db.commit()
 
+    invalidate_timeline(b.start_at, b.end_at)
+    free_index.booking_removed(b.id)
+
     ip = request.client.host if request.client else None
     await log_action(
         db,
@@ -163,6 +357,76 @@ async def cancel_booking(
     )
 
 
+@router.post("/{booking_id}/check-in", response_model=SessionOut)
+async def check_in_booking(
+    booking_id: int,
+    request: Request,
+    payload: BookingCheckInIn | None = None,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Клиент пришёл по брони: открываем сессию на забронированном ПК и переводим
+    бронь в checked_in — одной транзакцией.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if _role_value(user.role) not in {"admin", "operator"}:
+        raise HTTPException(status_code=403, detail="Insufficient role")
+
+    b = (await db.execute(
+        select(Booking).where(Booking.id == booking_id).with_for_update()
+    )).scalar_one_or_none()
+    if not b:
+        raise HTTPException(status_code=404, detail="Booking not found")
+
+    if b.status != BookingStatusEnum.active:
+        raise HTTPException(status_code=400, detail="Booking is not active")
+
+    now = datetime.now(timezone.utc)
+    if now < b.start_at - CHECK_IN_EARLY:
+        raise HTTPException(status_code=400, detail="Booking has not started yet")
+    if now >= b.end_at:
+        raise HTTPException(status_code=400, detail="Booking has already ended")
+
+    hours = payload.hours if payload and payload.hours else None
+    if hours is None:
+        hours = min(24, max(1, math.ceil((b.end_at - now).total_seconds() / 3600)))
+
+    try:
+        s, machine = await open_session(
+            db,
+            user_id=b.user_id,
+            machine_id=b.machine_id,
+            hours=hours,
+            now=now,
+        )
+    except SessionStartError as e:
+        await db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    b.status = BookingStatusEnum.checked_in
+    await db.commit()
+
+    session_opened(s, machine)
+    invalidate_timeline(b.start_at, b.end_at)
+    free_index.booking_removed(b.id)
+
+    ip = request.client.host if request.client else None
+    await log_action(
+        db,
+        user=user,
+        action="CHECK_IN_BOOKING",
+        entity="booking",
+        entity_id=b.id,
+        details=f"session_id={s.id}, machine_id={b.machine_id}, hours={hours}",
+        ip_address=ip,
+    )
+
+    return SessionOut.model_validate(s, from_attributes=True)
+
+
 @router.delete("/{booking_id}")
 async def delete_cancelled_booking(
     booking_id: int,
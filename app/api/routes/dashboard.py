@@ -0,0 +1,107 @@
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user, get_db
+from app.core.dashboard import dashboard
+from app.models.booking import Booking, BookingStatus
+from app.models.session_model import Session
+from app.schemas.booking import BookingOut
+from app.schemas.dashboard import DashboardActivityOut, DashboardSummaryOut, SessionsDayOut
+from app.schemas.session import SessionOut
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+def _role_value(r) -> str:
+    if r is None:
+        return "user"
+    return getattr(r, "value", str(r))
+
+
+def _require_staff(user) -> None:
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if _role_value(user.role) not in {"admin", "operator"}:
+        raise HTTPException(status_code=403, detail="Insufficient role")
+
+
+@router.get("/summary", response_model=DashboardSummaryOut)
+async def dashboard_summary(
+    ending_within_minutes: int = Query(default=15, ge=1, le=180),
+    user=Depends(get_current_user),
+):
+    """
+    Сводка для дашборда из счётчиков в памяти (в БД ходит только авторизация),
+    можно опрашивать раз в несколько секунд. Не пишется в audit log.
+    """
+    _require_staff(user)
+    return dashboard.summary(ending_within_minutes)
+
+
+@router.get("/activity", response_model=DashboardActivityOut)
+async def dashboard_activity(
+    tz: str = Query(default="UTC"),
+    upcoming: int = Query(default=5, ge=1, le=50),
+    days: int = Query(default=7, ge=1, le=31),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Списки для дашборда: брони на сегодня, ближайшие брони, открытые сессии и
+    запуски сессий по дням. Каждая часть — один ограниченный запрос (LIMIT,
+    индекс открытых сессий, агрегат за days дней). Не пишется в audit log.
+    """
+    _require_staff(user)
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+
+    now = datetime.now(timezone.utc)
+    today = now.astimezone(zone).date()
+    day_start = datetime.combine(today, time.min, tzinfo=zone)
+    first_day = today - timedelta(days=days - 1)
+
+    bookings_today = await db.scalar(
+        select(func.count())
+        .select_from(Booking)
+        .where(
+            Booking.status == BookingStatus.active,
+            Booking.start_at >= day_start,
+            Booking.start_at < datetime.combine(today + timedelta(days=1), time.min, tzinfo=zone),
+        )
+    )
+    upcoming_rows = (await db.execute(
+        select(Booking)
+        .where(Booking.status == BookingStatus.active, Booking.start_at > now)
+        .order_by(Booking.start_at)
+        .limit(upcoming)
+    )).scalars().all()
+    open_sessions = (await db.execute(
+        select(Session).where(Session.ended_at.is_(None)).order_by(Session.started_at)
+    )).scalars().all()
+
+    # литерал, а не bind-параметр: выражение в SELECT и GROUP BY должно совпадать текстуально
+    # (tz уже проверен ZoneInfo — кавычек в имени зоны нет)
+    local_day = func.date(func.timezone(literal_column(f"'{tz}'"), Session.started_at))
+    counts = dict((await db.execute(
+        select(local_day, func.count())
+        .where(Session.started_at >= datetime.combine(first_day, time.min, tzinfo=zone))
+        .group_by(local_day)
+    )).all())
+
+    return DashboardActivityOut(
+        tz=tz,
+        bookings_today=bookings_today or 0,
+        upcoming_bookings=[BookingOut.model_validate(b) for b in upcoming_rows],
+        active_sessions=[SessionOut.model_validate(s, from_attributes=True) for s in open_sessions],
+        sessions_by_day=[
+            SessionsDayOut(day=d, sessions=counts.get(d, 0))
+            for d in (first_day + timedelta(days=i) for i in range(days))
+        ],
+    )
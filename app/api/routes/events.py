@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import user_from_token
+from app.core.events import sse_stream
+from app.db.session import async_session
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+def _role_value(r) -> str:
+    if r is None:
+        return "user"
+    return getattr(r, "value", str(r))
+
+
+@router.get("")
+async def event_stream(
+    request: Request,
+    token: str = Query(..., description="JWT: EventSource не умеет слать заголовок Authorization"),
+):
+    """
+    Push-канал (Server-Sent Events): предложения ПК из очереди ожидания и
+    изменения записей. admin/operator получают все события, клиент — свои.
+    Сессия БД нужна только на авторизацию и закрывается до начала потока.
+    """
+    async with async_session() as db:
+        user = await user_from_token(db, token)
+
+    staff = _role_value(user.role) in {"admin", "operator"}
+    return StreamingResponse(
+        sse_stream(user.id, staff, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
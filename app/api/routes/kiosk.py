@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.deps import get_agent_machine_id
+from app.core.config import settings
+from app.core.heartbeat import heartbeats
+from app.core.kiosk import kiosk
+from app.core.power_ingest import PowerBufferFull, power_ingest
+from app.schemas.kiosk import HeartbeatOut, KioskStateOut, PowerBatchIn, PowerIngestOut
+
+router = APIRouter(prefix="/kiosk", tags=["kiosk"])
+
+
+@router.get("/state", response_model=KioskStateOut)
+async def kiosk_state(
+    version: int | None = Query(default=None, description="Последняя полученная версия"),
+    wait: int = Query(default=25, ge=0, le=55, description="Сколько секунд ждать изменения"),
+    machine_id: int = Depends(get_agent_machine_id),
+):
+    """
+    Long-poll для клиента на самом ПК: без version (или с устаревшей) отвечает
+    сразу, иначе ждёт до wait секунд, пока сессия ПК не изменится. Авторизация —
+    токен ПК в X-Machine-Token; ожидание не держит соединение с БД и не пишется
+    в audit log.
+    """
+    state = await kiosk.wait_change(machine_id, version, wait)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Machine not found")
+
+    now = datetime.now(timezone.utc)
+    remaining = None
+    if state.auto_end_at is not None:
+        remaining = max(0, int((state.auto_end_at - now).total_seconds()))
+
+    return KioskStateOut(
+        machine_id=state.machine_id,
+        version=state.version,
+        status=state.status,
+        session_id=state.session_id,
+        started_at=state.started_at,
+        auto_end_at=state.auto_end_at,
+        remaining_seconds=remaining,
+        server_time=now,
+    )
+
+
+@router.post("/heartbeat", response_model=HeartbeatOut)
+async def kiosk_heartbeat(machine_id: int = Depends(get_agent_machine_id)):
+    """
+    Клиент на ПК на связи. Только отметка в памяти: last_seen_at пишется в БД
+    пачкой раз в HEARTBEAT_FLUSH_INTERVAL секунд, там же молчащие ПК уходят в offline.
+    """
+    heartbeats.beat(machine_id)
+    return HeartbeatOut(
+        server_time=datetime.now(timezone.utc),
+        offline_after=settings.heartbeat_offline_after,
+        power_sample_hold=settings.power_sample_hold,
+    )
+
+
+@router.post("/power", response_model=PowerIngestOut)
+async def kiosk_power(payload: PowerBatchIn, machine_id: int = Depends(get_agent_machine_id)):
+    """
+    Пачка замеров мощности с ПК. Точки только дописываются в буфер в памяти,
+    в БД их пишет power_flush_loop; если буфер переполнен — 503, агенту
+    повторить пачку позже.
+    """
+    try:
+        accepted, dropped = power_ingest.add(machine_id, ((s.ts, s.watts) for s in payload.samples))
+    except PowerBufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Power samples buffer is full, retry later",
+            headers={"Retry-After": str(settings.power_flush_interval)},
+        )
+    return PowerIngestOut(accepted=accepted, dropped=dropped)
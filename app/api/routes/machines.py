@@ -1,14 +1,42 @@
-from typing import List
+import csv
+import io
+from datetime import datetime
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import exists, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user
+from app.core.assign import free_index
 from app.core.audit import log_action
-from app.models.machine import Machine, MachineStatus as MachineStatusEnum
-from app.schemas.machine import MachineCreate, MachineOut, MachineStatusPatch
+from app.core.config import settings
+from app.core.heartbeat import heartbeats
+from app.core.kiosk import kiosk
+from app.core.security import create_machine_token
+from app.core.availability import free_machines_query
+from app.core.timeline import timeline_cache
+from app.core.dashboard import dashboard
+from app.core.waitlist import waitlist
+from app.models.machine import Machine, MachineStatus as MachineStatusEnum, Zone
+from app.models.session_model import Session
+from app.schemas.kiosk import MachineAgentTokenOut
+from app.schemas.machine import (
+    MAX_IMPORT_MACHINES,
+    MachineAvailabilityOut,
+    MachineBulkStatusOut,
+    MachineBulkStatusPatch,
+    MachineCreate,
+    MachineImportConflict,
+    MachineImportIn,
+    MachineImportOut,
+    MachineOut,
+    MachineStatusPatch,
+)
 
 router = APIRouter(prefix="/machines", tags=["machines"])
 
@@ -24,6 +52,21 @@ def _ip(request: Request) -> str | None:
     return request.client.host if request.client else None
 
 
+def _require_staff(user) -> None:
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    if _role_value(user.role) not in {"admin", "operator"}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
+
+
+def _machine_added(m: Machine) -> None:
+    dashboard.machine_set(m.id, m.zone, m.status)
+    free_index.machine_set(m.id, m.zone, m.status)
+    if m.status == MachineStatusEnum.available:
+        waitlist.machine_freed(m.id, m.zone)
+
+
 @router.get("", response_model=List[MachineOut])
 async def list_machines(
     request: Request,
@@ -47,6 +90,40 @@ async def list_machines(
     return [MachineOut.model_validate(row, from_attributes=True) for row in rows]
 
 
+@router.get("/availability", response_model=MachineAvailabilityOut)
+async def machine_availability(
+    start_at: datetime,
+    end_at: datetime,
+    zone: Zone | None = None,
+    count: int = Query(default=1, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    ПК зоны, свободные на весь интервал [start_at, end_at): без активных броней
+    и без открытых сессий, чей auto_end_at позже start_at. Один запрос к БД.
+    """
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    if _role_value(user.role) not in {"admin", "operator"}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
+
+    if end_at <= start_at:
+        raise HTTPException(status_code=400, detail="end_at must be greater than start_at")
+
+    rows = (await db.execute(free_machines_query(start_at, end_at, zone))).scalars().all()
+
+    return MachineAvailabilityOut(
+        zone=zone,
+        start_at=start_at,
+        end_at=end_at,
+        requested=count,
+        enough=len(rows) >= count,
+        machines=[MachineOut.model_validate(m, from_attributes=True) for m in rows],
+    )
+
+
 @router.post("", response_model=MachineOut, status_code=status.HTTP_201_CREATED)
 async def create_machine(
     payload: MachineCreate,
@@ -78,6 +155,8 @@ async def create_machine(
         )
 
     await db.refresh(m)
+    _machine_added(m)
+    timeline_cache.clear()
 
     # 🔹 логируем создание ПК
     await log_action(
@@ -93,6 +172,237 @@ async def create_machine(
     return MachineOut.model_validate(m, from_attributes=True)
 
 
+def _read_csv(body: bytes) -> tuple[list[tuple[int, MachineCreate]], list[MachineImportConflict]]:
+    """
+    CSV с заголовком name,zone[,watt] -> (строки, ошибки проверки).
+    Номера строк — с 1, без заголовка.
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+
+    reader = csv.DictReader(io.StringIO(text))
+    if reader.fieldnames is None or not {"name", "zone"} <= {f.strip() for f in reader.fieldnames}:
+        raise HTTPException(status_code=400, detail="CSV header must contain name and zone")
+
+    items: list[tuple[int, MachineCreate]] = []
+    invalid: list[MachineImportConflict] = []
+    for row_no, raw in enumerate(reader, start=1):
+        if row_no > MAX_IMPORT_MACHINES:
+            raise HTTPException(status_code=400, detail=f"Too many rows (max {MAX_IMPORT_MACHINES})")
+        # лишние значения без заголовка DictReader кладёт под ключ None — пропускаем
+        row = {k.strip(): (v or "").strip() for k, v in raw.items() if k is not None}
+        data = {"name": row.get("name"), "zone": row.get("zone")}
+        if row.get("watt"):
+            data["watt"] = row["watt"]
+        try:
+            items.append((row_no, MachineCreate.model_validate(data)))
+        except ValidationError as e:
+            invalid.append(MachineImportConflict(
+                row=row_no,
+                name=data["name"] or None,
+                reason="invalid",
+                detail="; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()),
+            ))
+
+    if not items and not invalid:
+        raise HTTPException(status_code=400, detail="CSV has no rows")
+    return items, invalid
+
+
+async def _import_machines(
+    db: AsyncSession,
+    request: Request,
+    user,
+    items: list[tuple[int, MachineCreate]],
+    conflicts: list[MachineImportConflict],
+    mode: str,
+    source: str,
+) -> MachineImportOut:
+    """
+    Общая часть импорта: конфликты имён одним SELECT, затем один
+    многострочный INSERT ... RETURNING и одна запись в audit log.
+    """
+    requested = len(items) + len(conflicts)
+
+    # 1) повторы внутри импорта и уже занятые имена
+    names = {m.name for _, m in items}
+    existing = set((await db.execute(select(Machine.name).where(Machine.name.in_(sorted(names))))).scalars())
+
+    seen: set[str] = set()
+    rows: list[tuple[int, MachineCreate]] = []
+    for row_no, m in items:
+        if m.name in existing:
+            conflicts.append(MachineImportConflict(row=row_no, name=m.name, reason="exists"))
+        elif m.name in seen:
+            conflicts.append(MachineImportConflict(row=row_no, name=m.name, reason="duplicate"))
+        else:
+            seen.add(m.name)
+            rows.append((row_no, m))
+    conflicts.sort(key=lambda c: c.row)
+
+    if conflicts and mode == "all_or_nothing":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Machine import conflicts", "conflicts": jsonable_encoder(conflicts)},
+        )
+
+    # 2) один INSERT; уникальность имени в БД по-прежнему страхует от гонок
+    values = [
+        {"name": m.name, "zone": m.zone.value, "status": MachineStatusEnum.available, "watt": m.watt}
+        for _, m in rows
+    ]
+    created: list[Machine] = []
+    if values:
+        if mode == "all_or_nothing":
+            stmt = insert(Machine).returning(Machine)
+        else:
+            # имя, занятое параллельной записью, пропускаем и отдаём как exists
+            stmt = pg_insert(Machine).on_conflict_do_nothing(index_elements=["name"]).returning(Machine)
+        try:
+            created = list(await db.scalars(stmt, values))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Machine name already exists",
+            )
+
+    if len(created) < len(rows):
+        inserted = {m.name for m in created}
+        conflicts += [
+            MachineImportConflict(row=row_no, name=m.name, reason="exists")
+            for row_no, m in rows
+            if m.name not in inserted
+        ]
+        conflicts.sort(key=lambda c: c.row)
+
+    for m in created:
+        _machine_added(m)
+    if created:
+        timeline_cache.clear()
+
+    await log_action(
+        db,
+        user=user,
+        action="IMPORT_MACHINES",
+        entity="machine",
+        entity_id=None,
+        details=(
+            f"source={source}, mode={mode}, requested={requested}, "
+            f"created={len(created)}, conflicts={len(conflicts)}"
+        ),
+        ip_address=_ip(request),
+    )
+
+    return MachineImportOut(
+        requested=requested,
+        created=[MachineOut.model_validate(m, from_attributes=True) for m in created],
+        conflicts=conflicts,
+    )
+
+
+@router.post("/import", response_model=MachineImportOut)
+async def import_machines(
+    payload: MachineImportIn,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Создание многих ПК одним INSERT (например, при открытии нового зала)."""
+    _require_staff(user)
+    items = list(enumerate(payload.machines, start=1))
+    return await _import_machines(db, request, user, items, [], payload.mode, "json")
+
+
+@router.post("/import.csv", response_model=MachineImportOut)
+async def import_machines_csv(
+    request: Request,
+    mode: Literal["all_or_nothing", "best_effort"] = Query(default="all_or_nothing"),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Тот же импорт из CSV в теле запроса (Content-Type: text/csv):
+    заголовок name,zone[,watt], по строке на ПК. Строки с ошибками проверки
+    возвращаются в conflicts как invalid (в all_or_nothing — 409).
+    """
+    _require_staff(user)
+    items, invalid = _read_csv(await request.body())
+    return await _import_machines(db, request, user, items, invalid, mode, "csv")
+
+
+@router.patch("/status", response_model=MachineBulkStatusOut)
+async def set_status_bulk(
+    patch: MachineBulkStatusPatch,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Статус для всех ПК по фильтру (зона и/или id) одним UPDATE — например,
+    перевести зону на обслуживание. Как и PATCH /machines/{id}/status,
+    снимает признак автоматического offline. Занятые ПК (busy или с открытой
+    сессией) не трогаются и возвращаются в skipped_ids.
+    """
+    _require_staff(user)
+
+    conditions = []
+    if patch.zone is not None:
+        conditions.append(Machine.zone == patch.zone.value)
+    if patch.ids is not None:
+        conditions.append(Machine.id.in_(patch.ids))
+
+    occupied = or_(
+        Machine.status == MachineStatusEnum.busy,
+        exists().where(Session.machine_id == Machine.id, Session.ended_at.is_(None)),
+    )
+    new_status = MachineStatusEnum(patch.status.value)
+    machines = list(await db.scalars(
+        update(Machine)
+        .where(*conditions, ~occupied)
+        .values(status=new_status, auto_offline=False)
+        .returning(Machine)
+        .execution_options(synchronize_session=False)
+    ))
+    skipped_ids = list(await db.scalars(
+        select(Machine.id).where(*conditions, occupied).order_by(Machine.id)
+    ))
+    await db.commit()
+
+    for m in machines:
+        dashboard.machine_set(m.id, m.zone, m.status)
+        free_index.machine_set(m.id, m.zone, m.status)
+        kiosk.machine_status(m.id, m.status)
+        heartbeats.status_set(m.id)
+        if m.status == MachineStatusEnum.available:
+            waitlist.machine_freed(m.id, m.zone)
+    if machines:
+        timeline_cache.clear()
+
+    await log_action(
+        db,
+        user=user,
+        action="SET_MACHINES_STATUS_BULK",
+        entity="machine",
+        entity_id=None,
+        details=(
+            f"status={new_status.value}, zone={patch.zone.value if patch.zone else None}, "
+            f"ids={patch.ids}, updated={len(machines)}, skipped={len(skipped_ids)}"
+        ),
+        ip_address=_ip(request),
+    )
+
+    machines.sort(key=lambda m: m.id)
+    return MachineBulkStatusOut(
+        updated=len(machines),
+        machines=[MachineOut.model_validate(m, from_attributes=True) for m in machines],
+        skipped_ids=skipped_ids,
+    )
+
+
 @router.patch("/{machine_id}/status", response_model=MachineOut)
 async def set_status(
     machine_id: int,
@@ -113,8 +423,50 @@ async def set_status(
 
     # ключевая строка
     m.status = MachineStatusEnum(patch.status.value)
+    # ручной статус — heartbeat его больше не переопределяет
+    m.auto_offline = False
     
     await db.commit()
     await db.refresh(m)
+    dashboard.machine_set(m.id, m.zone, m.status)
+    free_index.machine_set(m.id, m.zone, m.status)
+    timeline_cache.clear()
+    kiosk.machine_status(m.id, m.status)
+    heartbeats.status_set(m.id)
+    if m.status == MachineStatusEnum.available:
+        waitlist.machine_freed(m.id, m.zone)
     return MachineOut.model_validate(m, from_attributes=True)
 
+
+@router.post("/{machine_id}/agent-token", response_model=MachineAgentTokenOut)
+async def issue_agent_token(
+    machine_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Токен для клиента на ПК (X-Machine-Token). Выдаётся при установке клиента; сменить — только сменой SECRET_KEY."""
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if _role_value(user.role) not in {"admin", "operator"}:
+        raise HTTPException(status_code=403, detail="Insufficient role")
+
+    m = (await db.execute(select(Machine.id).where(Machine.id == machine_id))).scalar_one_or_none()
+    if m is None:
+        raise HTTPException(status_code=404, detail="Machine not found")
+
+    await log_action(
+        db,
+        user=user,
+        action="ISSUE_MACHINE_TOKEN",
+        entity="machine",
+        entity_id=machine_id,
+        details=None,
+        ip_address=_ip(request),
+    )
+
+    return MachineAgentTokenOut(
+        machine_id=machine_id,
+        token=create_machine_token(machine_id, settings.secret_key),
+    )
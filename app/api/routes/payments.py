@@ -13,8 +13,11 @@ from app.models.payment import PaymentStatus as PaymentStatusEnum
 from app.schemas.payment import FakeOnlinePaymentCreate
 from app.api.deps import get_db, get_current_user
 from app.core.audit import log_action
-from app.core.payment_provider import create_payment
+from app.core.payment_provider import PaymentProviderError, create_payment
 from app.core.pricing import calculate_total_price
+from app.core.report_cache import PAYMENT_REPORTS, report_cache
+from app.core.dashboard import dashboard
+from app.core.rollups import add_payment, move_payment
 from app.models.machine import Zone
 from app.models.payment import (
     Payment,
@@ -115,8 +118,12 @@ async def create_cash_payment(
     )
 
     db.add(p)
+    await db.flush()  # created_at проставляется при flush
+    revenue = await add_payment(db, p)
     await db.commit()
+    dashboard.revenue_apply(revenue)
     await db.refresh(p)
+    report_cache.invalidate(p.created_at, reports=PAYMENT_REPORTS)
 
     ip = request.client.host if request.client else None
     await log_action(
@@ -166,16 +173,34 @@ async def create_online_payment(
         amount=amount,
     )
     db.add(payment)
+    await db.flush()
+    revenue = await add_payment(db, payment)
     await db.commit()
+    dashboard.revenue_apply(revenue)
     await db.refresh(payment)
 
-    # создаём платёж у провайдера (заглушка)
-    provider = create_payment(float(amount))
+    # создаём платёж у провайдера (не блокирует event loop)
+    try:
+        provider = await create_payment(payment.id, amount)
+    except PaymentProviderError:
+        payment.status = PaymentStatusEnum.failed
+        payment.note = "provider unavailable"
+        revenue = await move_payment(db, payment, PaymentStatusEnum.created)
+        await db.commit()
+        dashboard.revenue_apply(revenue)
+        report_cache.invalidate(payment.created_at, reports=PAYMENT_REPORTS)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Payment provider unavailable",
+        )
 
     payment.provider_payment_id = provider["provider_payment_id"]
     payment.status = PaymentStatusEnum.pending
+    revenue = await move_payment(db, payment, PaymentStatusEnum.created)
 
     await db.commit()
+    dashboard.revenue_apply(revenue)
+    report_cache.invalidate(payment.created_at, reports=PAYMENT_REPORTS)
 
     ip = request.client.host if request.client else None
     await log_action(
@@ -230,8 +255,11 @@ async def fake_online_payment(
     )
 
     db.add(payment)
+    revenue = await add_payment(db, payment)
     await db.commit()
+    dashboard.revenue_apply(revenue)
     await db.refresh(payment)
+    report_cache.invalidate(payment.created_at, reports=PAYMENT_REPORTS)
 
     # эмуляция платёжки
     async def _simulate_success():
@@ -239,7 +267,10 @@ async def fake_online_payment(
 
         payment.status = PaymentStatusEnum.succeeded
         payment.provider_payment_id = f"fake_{uuid.uuid4().hex}"
+        revenue = await move_payment(db, payment, PaymentStatusEnum.pending)
         await db.commit()
+        dashboard.revenue_apply(revenue)
+        report_cache.invalidate(payment.created_at, reports=PAYMENT_REPORTS)
 
     asyncio.create_task(_simulate_success())
 
@@ -264,9 +295,13 @@ async def payment_webhook(
     if payment.status == PaymentStatusEnum.succeeded:
         return {"ok": True}
 
+    old_status = payment.status
     payment.status = PaymentStatusEnum(getattr(payload.status, "value", payload.status))
     payment.provider_payment_id = payload.provider_payment_id
+    revenue = await move_payment(db, payment, old_status)
     await db.commit()
+    dashboard.revenue_apply(revenue)
+    report_cache.invalidate(payment.created_at, reports=PAYMENT_REPORTS)
 
     # АВТОПРОДЛЕНИЕ: если онлайн-оплата успешна — продляем активную сессию
     if payment.method == PaymentMethodEnum.online and payment.status == PaymentStatusEnum.succeeded:
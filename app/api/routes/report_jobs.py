@@ -0,0 +1,171 @@
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, get_current_user
+from app.core.audit import log_action
+from app.core.config import settings
+from app.core.excel import XLSX_MEDIA_TYPE
+from app.core.report_jobs import ACTIVE_STATUSES, WORKER_ID, remove_result, submit_job
+from app.models.report_job import ReportJob, ReportJobStatus
+from app.models.user import User
+from app.schemas.report_job import ReportJobCreate, ReportJobOut
+
+router = APIRouter(prefix="/report-jobs", tags=["reports"])
+
+
+def _require_operator(user):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    role = getattr(user.role, "value", user.role)
+    if role != "operator":
+        raise HTTPException(status_code=403, detail="Only operator allowed")
+
+
+def _ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
+async def _get_own_job(db: AsyncSession, job_id: str, user) -> ReportJob:
+    job = await db.get(ReportJob, job_id)
+    if not job or job.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@router.post("", response_model=ReportJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_report_job(
+    data: ReportJobCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    _require_operator(user)
+
+    # строка пользователя под блокировкой до commit: параллельные запросы
+    # считают активные задачи по очереди, и лимит не обходится гонкой
+    await db.execute(select(User.id).where(User.id == user.id).with_for_update())
+    active = (await db.execute(
+        select(func.count())
+        .select_from(ReportJob)
+        .where(ReportJob.user_id == user.id, ReportJob.status.in_(ACTIVE_STATUSES))
+    )).scalar_one()
+    if active >= settings.report_jobs_per_user:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many active report jobs (limit {settings.report_jobs_per_user})",
+        )
+
+    now = datetime.now(timezone.utc)
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        user_id=user.id,
+        report=data.report,
+        format=data.format,
+        params=data.model_dump(mode="json"),
+        status=ReportJobStatus.queued,
+        progress=0,
+        created_at=now,
+        worker_id=WORKER_ID,
+        heartbeat_at=now,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    submit_job(job.id)
+
+    await log_action(
+        db,
+        user=user,
+        action="CREATE_REPORT_JOB",
+        entity="report_job",
+        entity_id=None,
+        details=f"job={job.id} report={job.report} format={job.format}",
+        ip_address=_ip(request),
+    )
+
+    return job
+
+
+@router.get("", response_model=List[ReportJobOut])
+async def list_report_jobs(
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    _require_operator(user)
+
+    res = await db.execute(
+        select(ReportJob)
+        .where(ReportJob.user_id == user.id)
+        .order_by(ReportJob.created_at.desc())
+    )
+    return res.scalars().all()
+
+
+@router.get("/{job_id}", response_model=ReportJobOut)
+async def get_report_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    _require_operator(user)
+    return await _get_own_job(db, job_id, user)
+
+
+@router.get("/{job_id}/result")
+async def download_report_job_result(
+    job_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    _require_operator(user)
+    job = await _get_own_job(db, job_id, user)
+
+    if job.status != ReportJobStatus.succeeded or not job.result_path:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status.value}")
+
+    await log_action(
+        db,
+        user=user,
+        action="DOWNLOAD_REPORT_JOB",
+        entity="report_job",
+        entity_id=None,
+        details=f"job={job.id} report={job.report} format={job.format}",
+        ip_address=_ip(request),
+    )
+
+    return FileResponse(
+        job.result_path,
+        media_type=XLSX_MEDIA_TYPE if job.format == "xlsx" else "application/json",
+        filename=job.result_filename,
+    )
+
+
+@router.delete("/{job_id}")
+async def delete_report_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Удаляет задачу и её файл. Задача из очереди просто не будет запущена;
+    выполняющуюся удалить нельзя — дождитесь окончания.
+    """
+    _require_operator(user)
+    job = await _get_own_job(db, job_id, user)
+
+    if job.status == ReportJobStatus.running:
+        raise HTTPException(status_code=409, detail="Report job is running")
+
+    remove_result(job)
+    await db.delete(job)
+    await db.commit()
+
+    return {"ok": True}
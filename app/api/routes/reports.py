@@ -1,26 +1,27 @@
-from collections import defaultdict
-from datetime import datetime, date
-from typing import cast
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import Response
-from sqlalchemy import select, and_
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user
 from app.core.audit import log_action
-from app.core.excel import make_workbook
-from app.core.power import overlap_seconds, energy_kwh
-from app.models.machine import Machine
-from app.models.session_model import Session
-from app.models.payment import Payment
-from app.models.employee import Employee
-from app.models.shift import Shift
-from app.schemas.reports import (
-    PowerReportOut, PowerRow,
-    SalariesReportOut, SalaryRow,
-    FinanceReportOut
+from app.core.excel import XLSX_MEDIA_TYPE, stream_workbook
+from app.core.report_cache import FINANCE, OCCUPANCY, POWER, SALARIES, report_cache
+from app.core.reports import (
+    build_finance_report,
+    build_occupancy_report,
+    build_power_report,
+    build_salaries_report,
+    finance_table,
+    month_bounds,
+    occupancy_table,
+    power_table,
+    salaries_table,
 )
+from app.core.rollups import day_start
+from app.schemas.reports import PowerReportOut, PowerSource, SalariesReportOut, FinanceReportOut, OccupancyReportOut
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -37,6 +38,44 @@ def _ip(request: Request) -> str | None:
     return request.client.host if request.client else None
 
 
+def _xlsx_response(chunks, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ================= CACHE =================
+@router.get("/cache/stats")
+async def report_cache_stats(user=Depends(get_current_user)):
+    _require_operator(user)
+    return report_cache.stats()
+
+
+@router.delete("/cache")
+async def clear_report_cache(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Полный сброс — например, после внесения смен или backfill агрегатов в обход API."""
+    _require_operator(user)
+    cleared = report_cache.clear()
+
+    await log_action(
+        db,
+        user=user,
+        action="CLEAR_REPORT_CACHE",
+        entity="report",
+        entity_id=None,
+        details=f"entries={cleared}",
+        ip_address=_ip(request),
+    )
+
+    return {"ok": True, "cleared": cleared}
+
+
 # ================= POWER REPORT =================
 @router.get("/power", response_model=PowerReportOut)
 async def power_report(
@@ -44,58 +83,17 @@ async def power_report(
     date_to: datetime,
     request: Request,
     price_per_kwh: float = Query(default=7.0),
+    source: PowerSource = Query(default="nameplate", description="nameplate — паспортная мощность, measured — замеры с ПК"),
     db: AsyncSession = Depends(get_db),
     user=Depends(get_current_user),
 ):
     _require_operator(user)
 
-    machines = (await db.execute(select(Machine))).scalars().all()
-    machine_map = {m.id: m for m in machines}
-
-    sessions = (await db.execute(
-        select(Session).where(
-            Session.ended_at.is_not(None),
-            Session.started_at < date_to,
-            Session.ended_at > date_from,
-        )
-    )).scalars().all()
-
-    seconds_map = defaultdict(float)
-
-    for s in sessions:
-        sec = overlap_seconds(
-            cast(datetime, s.started_at),
-            cast(datetime, s.ended_at),
-            date_from,
-            date_to
-        )
-        seconds_map[s.machine_id] += sec
-
-    rows = []
-    total_kwh = 0.0
-    total_cost = 0.0
-
-    for mid, sec in seconds_map.items():
-        m = machine_map[mid]
-        kwh = energy_kwh(m.watt, sec)
-        rows.append(PowerRow(
-            machine_id=m.id,
-            machine_name=m.name,
-            watt=m.watt,
-            hours_used=round(sec / 3600, 2),
-            kwh_used=round(kwh, 3),
-        ))
-        total_kwh += kwh
-        total_cost += kwh * price_per_kwh
-
-    result = PowerReportOut(
-        date_from=date_from,
-        date_to=date_to,
-        price_per_kwh=price_per_kwh,
-        rows=rows,
-        total_kwh=round(total_kwh, 3),
-        total_cost=round(total_cost, 2),
-    )
+    key = report_cache.key(POWER, date_from=date_from, date_to=date_to, price_per_kwh=price_per_kwh, source=source)
+    result = report_cache.get(key)
+    if result is None:
+        result = await build_power_report(db, date_from, date_to, price_per_kwh, source)
+        report_cache.set(key, result, date_from, date_to)
 
     await log_action(
         db,
@@ -103,7 +101,7 @@ async def power_report(
         action="GENERATE_REPORT_POWER",
         entity="report",
         entity_id=None,
-        details=f"from={date_from.isoformat()} to={date_to.isoformat()} price_per_kwh={price_per_kwh}",
+        details=f"from={date_from.isoformat()} to={date_to.isoformat()} price_per_kwh={price_per_kwh} source={source}",
         ip_address=_ip(request),
     )
 
@@ -116,6 +114,7 @@ async def power_report_xlsx(
     date_to: datetime,
     request: Request,
     price_per_kwh: float = Query(default=7.0, ge=0.0),
+    source: PowerSource = Query(default="nameplate"),
     db: AsyncSession = Depends(get_db),
     user=Depends(get_current_user),
 ):
@@ -126,19 +125,13 @@ async def power_report_xlsx(
         date_to=date_to,
         request=request,
         price_per_kwh=price_per_kwh,
+        source=source,
         db=db,
         user=user,
     )
 
-    headers = ["Machine ID", "Machine Name", "Watt", "Hours Used", "kWh Used"]
-    rows = [
-        [r.machine_id, r.machine_name, r.watt, r.hours_used, r.kwh_used]
-        for r in report.rows
-    ]
-    rows.append([None, "TOTAL", None, report.total_kwh, report.total_cost])
-
-    content = make_workbook("PowerReport", headers, rows)
-    filename = f"power_report_{date_from.date()}_{date_to.date()}.xlsx"
+    table = power_table(report)
+    chunks = await stream_workbook(table.title, table.headers, table.rows)
 
     await log_action(
         db,
@@ -150,11 +143,7 @@ async def power_report_xlsx(
         ip_address=_ip(request),
     )
 
-    return Response(
-        content=content,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return _xlsx_response(chunks, table.filename)
 
 
 # ================= SALARY REPORT =================
@@ -167,48 +156,12 @@ async def salaries_report(
 ):
     _require_operator(user)
 
-    year, m = map(int, month.split("-"))
-    start = date(year, m, 1)
-    end = date(year + (m == 12), (m % 12) + 1, 1)
-
-    shifts = (await db.execute(
-        select(Shift).where(and_(Shift.shift_date >= start, Shift.shift_date < end))
-    )).scalars().all()
-
-    employees = (await db.execute(select(Employee))).scalars().all()
-    emp_map = {e.id: e.full_name for e in employees}
-
-    count = defaultdict(int)
-    for s in shifts:
-        count[s.employee_id] += 1
-
-    PAY_PER_SHIFT = 2500
-    TAX_RATE = 0.13
-
-    rows = []
-    total_salary = 0.0
-    total_taxes = 0.0
-
-    for emp_id, shifts_count in count.items():
-        salary = shifts_count * PAY_PER_SHIFT
-        tax = salary * TAX_RATE
-        rows.append(SalaryRow(
-            employee_id=emp_id,
-            full_name=emp_map.get(emp_id, "Unknown"),
-            shifts=shifts_count,
-            pay_per_shift=PAY_PER_SHIFT,
-            total_salary=salary,
-            taxes=tax,
-        ))
-        total_salary += salary
-        total_taxes += tax
-
-    result = SalariesReportOut(
-        month=month,
-        rows=rows,
-        total_salary=total_salary,
-        total_taxes=total_taxes,
-    )
+    key = report_cache.key(SALARIES, month=month)
+    result = report_cache.get(key)
+    if result is None:
+        result = await build_salaries_report(db, month)
+        start, end = month_bounds(month)
+        report_cache.set(key, result, day_start(start), day_start(end))
 
     await log_action(
         db,
@@ -234,15 +187,8 @@ async def salaries_report_xlsx(
 
     report = await salaries_report(month=month, request=request, db=db, user=user)
 
-    headers = ["Employee ID", "Full Name", "Shifts", "Pay per shift", "Total salary", "Taxes"]
-    rows = [
-        [r.employee_id, r.full_name, r.shifts, r.pay_per_shift, r.total_salary, r.taxes]
-        for r in report.rows
-    ]
-    rows.append([None, "TOTAL", None, None, report.total_salary, report.total_taxes])
-
-    content = make_workbook("SalariesReport", headers, rows)
-    filename = f"salaries_report_{month}.xlsx"
+    table = salaries_table(report)
+    chunks = await stream_workbook(table.title, table.headers, table.rows)
 
     await log_action(
         db,
@@ -254,11 +200,7 @@ async def salaries_report_xlsx(
         ip_address=_ip(request),
     )
 
-    return Response(
-        content=content,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return _xlsx_response(chunks, table.filename)
 
 
 # ================= FINANCE REPORT =================
@@ -272,65 +214,11 @@ async def finance_report(
 ):
     _require_operator(user)
 
-    payments = (await db.execute(
-        select(Payment).where(
-            Payment.created_at >= date_from,
-            Payment.created_at <= date_to,
-        )
-    )).scalars().all()
-
-    income = sum(float(p.amount) for p in payments)
-
-    machines = (await db.execute(select(Machine))).scalars().all()
-    machine_map = {m.id: m for m in machines}
-
-    sessions = (await db.execute(
-        select(Session).where(
-            Session.ended_at.is_not(None),
-            Session.started_at < date_to,
-            Session.ended_at > date_from,
-        )
-    )).scalars().all()
-
-    total_kwh = 0.0
-    for s in sessions:
-        sec = overlap_seconds(
-            cast(datetime, s.started_at),
-            cast(datetime, s.ended_at),
-            date_from,
-            date_to
-        )
-        total_kwh += energy_kwh(machine_map[s.machine_id].watt, sec)
-
-    ELECTRICITY_PRICE = 7
-    RENT = 65000
-
-    expense_electricity = total_kwh * ELECTRICITY_PRICE
-
-    shifts = (await db.execute(
-        select(Shift).where(
-            Shift.shift_date >= date_from.date(),
-            Shift.shift_date <= date_to.date(),
-        )
-    )).scalars().all()
-
-    salaries = len(shifts) * 2500
-    taxes = salaries * 0.13
-
-    total_expenses = RENT + salaries + taxes + expense_electricity
-    profit = income - total_expenses
-
-    result = FinanceReportOut(
-        date_from=date_from,
-        date_to=date_to,
-        income=income,
-        expense_rent=RENT,
-        expense_salaries=salaries,
-        expense_taxes=taxes,
-        expense_electricity=round(expense_electricity, 2),
-        total_expenses=round(total_expenses, 2),
-        profit=round(profit, 2),
-    )
+    key = report_cache.key(FINANCE, date_from=date_from, date_to=date_to)
+    result = report_cache.get(key)
+    if result is None:
+        result = await build_finance_report(db, date_from, date_to)
+        report_cache.set(key, result, date_from, date_to)
 
     await log_action(
         db,
@@ -357,21 +245,8 @@ async def finance_report_xlsx(
 
     report = await finance_report(date_from=date_from, date_to=date_to, request=request, db=db, user=user)
 
-    headers = ["Metric", "Value"]
-    rows = [
-        ["date_from", str(report.date_from)],
-        ["date_to", str(report.date_to)],
-        ["income", report.income],
-        ["expense_rent", report.expense_rent],
-        ["expense_salaries", report.expense_salaries],
-        ["expense_taxes", report.expense_taxes],
-        ["expense_electricity", report.expense_electricity],
-        ["total_expenses", report.total_expenses],
-        ["profit", report.profit],
-    ]
-
-    content = make_workbook("FinanceReport", headers, rows)
-    filename = f"finance_report_{date_from.date()}_{date_to.date()}.xlsx"
+    table = finance_table(report)
+    chunks = await stream_workbook(table.title, table.headers, table.rows)
 
     await log_action(
         db,
@@ -383,8 +258,79 @@ async def finance_report_xlsx(
         ip_address=_ip(request),
     )
 
-    return Response(
-        content=content,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return _xlsx_response(chunks, table.filename)
+
+
+# ================= OCCUPANCY REPORT =================
+@router.get("/occupancy", response_model=OccupancyReportOut)
+async def occupancy_report(
+    date_from: datetime,
+    date_to: datetime,
+    request: Request,
+    tz: str = Query(default="UTC"),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Загрузка зон по часам недели, пик одновременно занятых ПК и пиковая мощность."""
+    _require_operator(user)
+
+    if date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+
+    key = report_cache.key(OCCUPANCY, date_from=date_from, date_to=date_to, tz=tz)
+    result = report_cache.get(key)
+    if result is None:
+        result = await build_occupancy_report(db, date_from, date_to, tz)
+        report_cache.set(key, result, date_from, date_to)
+
+    await log_action(
+        db,
+        user=user,
+        action="GENERATE_REPORT_OCCUPANCY",
+        entity="report",
+        entity_id=None,
+        details=f"from={date_from.isoformat()} to={date_to.isoformat()} tz={tz}",
+        ip_address=_ip(request),
+    )
+
+    return result
+
+
+@router.get("/occupancy.xlsx")
+async def occupancy_report_xlsx(
+    date_from: datetime,
+    date_to: datetime,
+    request: Request,
+    tz: str = Query(default="UTC"),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    _require_operator(user)
+
+    report = await occupancy_report(
+        date_from=date_from,
+        date_to=date_to,
+        request=request,
+        tz=tz,
+        db=db,
+        user=user,
     )
+
+    table = occupancy_table(report)
+    chunks = await stream_workbook(table.title, table.headers, table.rows)
+
+    await log_action(
+        db,
+        user=user,
+        action="EXPORT_REPORT_OCCUPANCY_XLSX",
+        entity="report",
+        entity_id=None,
+        details=f"from={date_from.isoformat()} to={date_to.isoformat()} tz={tz}",
+        ip_address=_ip(request),
+    )
+
+    return _xlsx_response(chunks, table.filename)
@@ -7,11 +7,18 @@ from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user
+from app.core.assign import free_index
 from app.core.audit import log_action
+from app.core.dashboard import dashboard
+from app.core.kiosk import kiosk
 from app.core.pricing import calculate_total_price
+from app.core.report_cache import SESSION_REPORTS, report_cache
+from app.core.rollups import add_payment, add_session_usage
+from app.core.session_open import SessionStartError, open_session, session_opened
+from app.core.timeline import invalidate_timeline
+from app.core.waitlist import waitlist
 from app.models.machine import Machine, MachineStatus as MachineStatusEnum
 from app.models.session_model import Session
-from app.models.user import User
 from app.models.payment import (
     Payment,
     PaymentMethod as PaymentMethodEnum,
@@ -27,6 +34,9 @@ from app.schemas.session import (
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+# сколько ПК из best-fit списка пробуем, если индекс в памяти отстал от БД
+ASSIGN_ATTEMPTS = 5
+
 
 def _role_value(r) -> str:
     if r is None:
@@ -80,73 +90,41 @@ async def start_session(
     if role not in {"admin", "operator"}:
         raise HTTPException(status_code=403, detail="Insufficient role")
 
-    # 0) Проверяем существование пользователя
-    target_user = (
-        await db.execute(select(User).where(User.id == payload.user_id))
-    ).scalar_one_or_none()
-    if not target_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # 1) Запрет: у пользователя уже есть активная сессия
-    active_user = (
-        await db.execute(
-            select(Session).where(
-                Session.user_id == payload.user_id,
-                Session.ended_at.is_(None),
-            )
-        )
-    ).scalar_one_or_none()
-    if active_user:
-        raise HTTPException(status_code=409, detail="User already has an active session")
-
-    # 2) Запрет: на ПК уже есть активная сессия
-    active_machine = (
-        await db.execute(
-            select(Session).where(
-                Session.machine_id == payload.machine_id,
-                Session.ended_at.is_(None),
-            )
-        )
-    ).scalar_one_or_none()
-    if active_machine:
-        raise HTTPException(status_code=409, detail="Machine already has an active session")
-
-    # 3) Проверяем машину
-    machine = (
-        await db.execute(select(Machine).where(Machine.id == payload.machine_id))
-    ).scalar_one_or_none()
-    if not machine:
-        raise HTTPException(status_code=404, detail="Machine not found")
-
-    if machine.status != MachineStatusEnum.available:
-        raise HTTPException(status_code=400, detail="Machine is not available")
-
-    # 4) Создаём сессию
     now = datetime.now(timezone.utc)
-    paid_minutes = payload.hours * 60
-    auto_end_at = now + timedelta(minutes=paid_minutes)
-
-    # помечаем машину занятой
-    machine.status = MachineStatusEnum.busy
-
-    s = Session(
-        user_id=payload.user_id,
-        machine_id=payload.machine_id,
-        started_at=now,
-        ended_at=None,
-        paid_minutes=paid_minutes,
-        auto_end_at=auto_end_at,
-        billed_minutes=None,
-        amount=Decimal("0.00"),
-    )
-
-    db.add(s)
-    # machine уже в сессии db (если загружена через select), но добавлять не вредно:
-    db.add(machine)
+    if payload.machine_id is not None:
+        machine_ids = [payload.machine_id]
+    else:
+        if free_index.refreshed_at is None:
+            await free_index.refresh(db)
+        # ПК, придержанные за очередью ожидания, не раздаём
+        held = waitlist.held_machines()
+        machine_ids = [
+            mid for mid in free_index.candidates(payload.zone, now, now + timedelta(hours=payload.hours))
+            if mid not in held
+        ][:ASSIGN_ATTEMPTS]
+        if not machine_ids:
+            raise HTTPException(status_code=409, detail="No free machine in zone")
+
+    for attempt, machine_id in enumerate(machine_ids, start=1):
+        try:
+            s, machine = await open_session(
+                db,
+                user_id=payload.user_id,
+                machine_id=machine_id,
+                hours=payload.hours,
+                now=now,
+            )
+            break
+        except SessionStartError as e:
+            await db.rollback()
+            if payload.machine_id is None and e.machine_conflict and attempt < len(machine_ids):
+                continue
+            if payload.machine_id is None and e.machine_conflict:
+                raise HTTPException(status_code=409, detail="No free machine in zone")
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
 
     await db.commit()
-    await db.refresh(s)
-    await db.refresh(machine)
+    session_opened(s, machine)
 
     ip = request.client.host if request.client else None
     await log_action(
@@ -155,7 +133,10 @@ async def start_session(
         action="START_SESSION",
         entity="session",
         entity_id=s.id,
-        details=f"user_id={payload.user_id}, machine_id={payload.machine_id}, hours={payload.hours}",
+        details=(
+            f"user_id={payload.user_id}, machine_id={machine.id}, hours={payload.hours}"
+            + (f", auto_zone={payload.zone.value}" if payload.machine_id is None else "")
+        ),
         ip_address=ip,
     )
 
@@ -194,6 +175,10 @@ async def extend_session(
     await db.commit()
     await db.refresh(s)
 
+    dashboard.session_extended(s.id, s.auto_end_at)
+    kiosk.session_extended(s.machine_id, s.auto_end_at)
+    invalidate_timeline(datetime.now(timezone.utc), s.auto_end_at)
+
     ip = request.client.host if request.client else None
     await log_action(
         db,
@@ -282,6 +267,16 @@ async def stop_session(
             updated_at=now,
         )
         db.add(payment)
+        revenue = await add_payment(db, payment)
+
+    # суточные агрегаты обновляем в той же транзакции
+    await add_session_usage(
+        db,
+        machine_id=machine.id,
+        watt=machine.watt,
+        started_at=started_at,
+        ended_at=now,
+    )
 
     db.add(s)  # Убеждаемся, что сессия тоже в сессии
     db.add(machine)
@@ -292,6 +287,17 @@ async def stop_session(
     if not existing_payment:
         await db.refresh(payment)
 
+    report_cache.invalidate(started_at, now, SESSION_REPORTS)
+    # до остановки сессия рисовалась до auto_end_at
+    invalidate_timeline(started_at, max(now, s.auto_end_at or now))
+    dashboard.session_ended(s.id, s.user_id)
+    dashboard.machine_status(machine.id, machine.status)
+    if not existing_payment:
+        dashboard.revenue_apply(revenue)
+    free_index.machine_status(machine.id, machine.status)
+    kiosk.session_ended(machine.id, machine.status)
+    waitlist.machine_freed(machine.id, machine.zone)
+
     ip = request.client.host if request.client else None
     await log_action(
         db,
@@ -334,6 +340,20 @@ async def delete_ended_session(
     if s.ended_at is None:
         raise HTTPException(status_code=400, detail="Only ended sessions can be deleted")
 
+    # вычитаем наработку удаляемой сессии из суточных агрегатов
+    machine = (
+        await db.execute(select(Machine).where(Machine.id == s.machine_id))
+    ).scalar_one_or_none()
+    if machine:
+        await add_session_usage(
+            db,
+            machine_id=machine.id,
+            watt=machine.watt,
+            started_at=cast(datetime, s.started_at),
+            ended_at=cast(datetime, s.ended_at),
+            sign=-1,
+        )
+
     # Отвязываем платежи, чтобы не нарушить FK (Payment.session_id -> Session.id)
     await db.execute(
         update(Payment).where(Payment.session_id == s.id).values(session_id=None)
@@ -342,6 +362,9 @@ async def delete_ended_session(
     await db.execute(delete(Session).where(Session.id == session_id))
     await db.commit()
 
+    report_cache.invalidate(s.started_at, s.ended_at, SESSION_REPORTS)
+    invalidate_timeline(s.started_at, s.ended_at)
+
     ip = request.client.host if request.client else None
     await log_action(
         db,
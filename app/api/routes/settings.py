@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, get_current_user
+from app.core.app_settings import PAY_PER_SHIFT, TAX_RATE, get_pay_rates, set_values
+from app.core.audit import log_action
+from app.core.report_cache import SHIFT_REPORTS, report_cache
+from app.schemas.settings import PayRatesOut, PayRatesUpdate
+
+router = APIRouter(prefix="/settings", tags=["settings"])
+
+
+def _require_operator(user):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    role = getattr(user.role, "value", user.role)
+    if role != "operator":
+        raise HTTPException(status_code=403, detail="Only operator allowed")
+
+
+def _ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
+@router.get("/pay-rates", response_model=PayRatesOut)
+async def get_pay_rates_endpoint(
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    _require_operator(user)
+    rates = await get_pay_rates(db)
+    return PayRatesOut(pay_per_shift=rates.pay_per_shift, tax_rate=rates.tax_rate)
+
+
+@router.put("/pay-rates", response_model=PayRatesOut)
+async def update_pay_rates(
+    payload: PayRatesUpdate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Ставка за смену и налог для отчётов по зарплатам и финансам."""
+    _require_operator(user)
+
+    values = {}
+    if payload.pay_per_shift is not None:
+        values[PAY_PER_SHIFT] = str(payload.pay_per_shift)
+    if payload.tax_rate is not None:
+        values[TAX_RATE] = str(payload.tax_rate)
+
+    await set_values(db, values)
+    # ставки влияют на все периоды — сбрасываем закешированные отчёты целиком
+    report_cache.invalidate_reports(SHIFT_REPORTS)
+
+    rates = await get_pay_rates(db)
+
+    await log_action(
+        db,
+        user=user,
+        action="UPDATE_PAY_RATES",
+        entity="settings",
+        entity_id=None,
+        details=f"pay_per_shift={rates.pay_per_shift} tax_rate={rates.tax_rate}",
+        ip_address=_ip(request),
+    )
+
+    return PayRatesOut(pay_per_shift=rates.pay_per_shift, tax_rate=rates.tax_rate)
@@ -0,0 +1,215 @@
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, get_current_user
+from app.core.audit import log_action
+from app.core.session_open import SessionStartError, open_session, session_opened
+from app.core.waitlist import OPEN_STATUSES, waitlist
+from app.models.machine import Zone
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
+from app.schemas.session import SessionOut
+from app.schemas.waitlist import WaitlistEntryOut, WaitlistJoinIn
+
+router = APIRouter(prefix="/waitlist", tags=["waitlist"])
+
+
+def _role_value(r) -> str:
+    if r is None:
+        return "user"
+    return getattr(r, "value", str(r))
+
+
+def _ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
+def _is_staff(user) -> bool:
+    return _role_value(user.role) in {"admin", "operator"}
+
+
+async def _get_entry(db: AsyncSession, entry_id: int, user, lock: bool = False) -> WaitlistEntry:
+    stmt = select(WaitlistEntry).where(WaitlistEntry.id == entry_id)
+    if lock:
+        stmt = stmt.with_for_update()
+    entry = (await db.execute(stmt)).scalar_one_or_none()
+    if not entry or (not _is_staff(user) and entry.user_id != user.id):
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    return entry
+
+
+@router.get("", response_model=List[WaitlistEntryOut])
+async def list_waitlist(
+    zone: Zone | None = None,
+    user=Depends(get_current_user),
+):
+    """
+    Живая очередь (ожидающие и предложения) из памяти, без запросов к БД
+    кроме авторизации. Клиенту — только его запись. Не пишется в audit log.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    rows = waitlist.snapshot(zone)
+    if not _is_staff(user):
+        rows = [r for r in rows if r["user_id"] == user.id]
+    return rows
+
+
+@router.post("", response_model=WaitlistEntryOut, status_code=201)
+async def join_waitlist(
+    payload: WaitlistJoinIn,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    # клиент встаёт в очередь только сам и без приоритета
+    staff = _is_staff(user)
+    entry = WaitlistEntry(
+        user_id=payload.user_id if staff else user.id,
+        zone=payload.zone,
+        hours=payload.hours,
+        priority=payload.priority if staff else 0,
+        note=payload.note,
+        status=WaitlistStatus.waiting,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.add(entry)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        name = getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+        if name == "waitlist_entries_user_id_fkey":
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=409, detail="User is already in the waitlist")
+
+    waitlist.entry_added(entry)
+
+    await log_action(
+        db,
+        user=user,
+        action="JOIN_WAITLIST",
+        entity="waitlist",
+        entity_id=entry.id,
+        details=f"user_id={entry.user_id}, zone={payload.zone.value}, hours={entry.hours}, priority={entry.priority}",
+        ip_address=_ip(request),
+    )
+
+    live = waitlist.get(entry.id)
+    return waitlist.as_dict(live) if live else WaitlistEntryOut.model_validate(entry)
+
+
+@router.get("/{entry_id}", response_model=WaitlistEntryOut)
+async def get_waitlist_entry(
+    entry_id: int,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    live = waitlist.get(entry_id)
+    if live is not None and (_is_staff(user) or live.user_id == user.id):
+        return waitlist.as_dict(live)
+    return WaitlistEntryOut.model_validate(await _get_entry(db, entry_id, user))
+
+
+@router.post("/{entry_id}/accept", response_model=SessionOut)
+async def accept_waitlist_offer(
+    entry_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Клиент подошёл к предложенному ПК: открываем сессию и закрываем запись одной транзакцией."""
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if not _is_staff(user):
+        raise HTTPException(status_code=403, detail="Insufficient role")
+
+    entry = await _get_entry(db, entry_id, user, lock=True)
+    if entry.status != WaitlistStatus.offered or entry.machine_id is None:
+        raise HTTPException(status_code=400, detail="Waitlist entry has no active offer")
+
+    try:
+        s, machine = await open_session(
+            db,
+            user_id=entry.user_id,
+            machine_id=entry.machine_id,
+            hours=entry.hours,
+            now=datetime.now(timezone.utc),
+        )
+    except SessionStartError as e:
+        await db.rollback()
+        if e.machine_conflict:
+            # ПК заняли в обход очереди — возвращаем клиента на его место
+            entry = await _get_entry(db, entry_id, user, lock=True)
+            if entry.status == WaitlistStatus.offered:
+                entry.status = WaitlistStatus.waiting
+                entry.machine_id = None
+                entry.offered_at = None
+                entry.offer_expires_at = None
+                await db.commit()
+                waitlist.entry_requeued(entry_id)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    await db.flush()
+    entry.status = WaitlistStatus.accepted
+    entry.session_id = s.id
+    await db.commit()
+
+    session_opened(s, machine)
+    waitlist.entry_closed(entry_id, WaitlistStatus.accepted)
+
+    await log_action(
+        db,
+        user=user,
+        action="ACCEPT_WAITLIST_OFFER",
+        entity="waitlist",
+        entity_id=entry_id,
+        details=f"session_id={s.id}, user_id={entry.user_id}, machine_id={machine.id}, hours={entry.hours}",
+        ip_address=_ip(request),
+    )
+
+    return SessionOut.model_validate(s, from_attributes=True)
+
+
+@router.post("/{entry_id}/cancel", response_model=WaitlistEntryOut)
+async def cancel_waitlist_entry(
+    entry_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    entry = await _get_entry(db, entry_id, user, lock=True)
+    if entry.status not in OPEN_STATUSES:
+        raise HTTPException(status_code=400, detail="Waitlist entry is not active")
+
+    entry.status = WaitlistStatus.cancelled
+    await db.commit()
+
+    waitlist.entry_closed(entry_id, WaitlistStatus.cancelled)
+
+    await log_action(
+        db,
+        user=user,
+        action="CANCEL_WAITLIST",
+        entity="waitlist",
+        entity_id=entry_id,
+        details=f"user_id={entry.user_id}, zone={getattr(entry.zone, 'value', entry.zone)}",
+        ip_address=_ip(request),
+    )
+
+    return WaitlistEntryOut.model_validate(entry)
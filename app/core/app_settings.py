@@ -0,0 +1,78 @@
+"""
+Чтение таблицы app_settings с кешем в памяти процесса.
+
+Отчёты берут ставки отсюда на каждом запросе, поэтому значения кешируются
+на APP_SETTINGS_CACHE_TTL секунд; запись через set_values сбрасывает кеш сразу.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.app_setting import AppSetting
+
+PAY_PER_SHIFT = "pay_per_shift"
+TAX_RATE = "tax_rate"
+
+# на случай, если строки ещё нет в таблице
+DEFAULTS = {
+    PAY_PER_SHIFT: "2500",
+    TAX_RATE: "0.13",
+}
+
+
+@dataclass(frozen=True)
+class PayRates:
+    pay_per_shift: float
+    tax_rate: float
+
+
+class AppSettingsCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values: dict[str, str] | None = None
+        self._expires_at = 0.0
+
+    async def get_all(self, db: AsyncSession) -> dict[str, str]:
+        if self._values is None or self._expires_at < time.monotonic():
+            rows = (await db.execute(select(AppSetting.key, AppSetting.value))).all()
+            self._values = {**DEFAULTS, **dict(rows)}
+            self._expires_at = time.monotonic() + self.ttl
+        return self._values
+
+    def invalidate(self) -> None:
+        self._values = None
+
+
+app_settings_cache = AppSettingsCache(ttl=settings.app_settings_cache_ttl)
+
+
+async def get_pay_rates(db: AsyncSession) -> PayRates:
+    values = await app_settings_cache.get_all(db)
+    return PayRates(
+        pay_per_shift=float(values[PAY_PER_SHIFT]),
+        tax_rate=float(values[TAX_RATE]),
+    )
+
+
+async def set_values(db: AsyncSession, values: dict[str, str]) -> None:
+    """Upsert настроек одним запросом и сброс кеша."""
+    if not values:
+        return
+    now = datetime.now(timezone.utc)
+    stmt = pg_insert(AppSetting).values(
+        [{"key": k, "value": v, "updated_at": now} for k, v in values.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AppSetting.key],
+        set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+    )
+    await db.execute(stmt)
+    await db.commit()
+    app_settings_cache.invalidate()
@@ -0,0 +1,158 @@
+"""
+Автоподбор ПК для сессии «без брони» (best-fit по промежуткам до броней).
+
+Индекс в памяти процесса: по зоне — ПК со статусом и отсортированными активными
+бронями. Для сессии [start, end) подходят свободные ПК, на которых ни одна бронь
+не пересекает интервал; из них первым идёт тот, у кого до следующей брони
+остаётся самый короткий промежуток, а ПК без будущих броней — в конце. Так
+короткие сессии занимают «щели» перед бронями, а длинные окна остаются целыми.
+
+Пути записи (брони, сессии, ПК) обновляют индекс после коммита,
+free_index_refresh_loop перечитывает его из БД на случай дрейфа. Индекс — только
+подсказка: open_session всё равно проверяет ПК и брони под блокировкой строки.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.booking import Booking, BookingStatus
+from app.models.machine import Machine, MachineStatus
+
+
+def _value(v) -> str:
+    return getattr(v, "value", v)
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+@dataclass
+class _MachineSlots:
+    zone: str
+    status: str
+    # активные брони (start, end, booking_id) по возрастанию start; по ограничению
+    # ex_bookings_machine_overlap они не пересекаются, значит, упорядочены и по end
+    bookings: list[tuple[datetime, datetime, int]] = field(default_factory=list)
+
+
+class FreeIntervalIndex:
+    def __init__(self) -> None:
+        self._machines: dict[int, _MachineSlots] = {}
+        self._zones: dict[str, set[int]] = {}
+        self._booking_machine: dict[int, int] = {}   # booking_id -> machine_id
+        self.refreshed_at: datetime | None = None
+
+    # ---------- machines ----------
+    def machine_set(self, machine_id: int, zone, status) -> None:
+        zone, status = _value(zone), _value(status)
+        m = self._machines.get(machine_id)
+        if m is None:
+            self._machines[machine_id] = _MachineSlots(zone=zone, status=status)
+        else:
+            if m.zone != zone:
+                self._zones[m.zone].discard(machine_id)
+            m.zone, m.status = zone, status
+        self._zones.setdefault(zone, set()).add(machine_id)
+
+    def machine_status(self, machine_id: int, status) -> None:
+        m = self._machines.get(machine_id)
+        if m is not None:
+            m.status = _value(status)
+
+    # ---------- bookings ----------
+    def booking_added(self, booking_id: int, machine_id: int, start_at: datetime, end_at: datetime) -> None:
+        m = self._machines.get(machine_id)
+        if m is None or booking_id in self._booking_machine:
+            return
+        bisect.insort(m.bookings, (_utc(start_at), _utc(end_at), booking_id))
+        self._booking_machine[booking_id] = machine_id
+
+    def booking_removed(self, booking_id: int) -> None:
+        machine_id = self._booking_machine.pop(booking_id, None)
+        m = self._machines.get(machine_id) if machine_id is not None else None
+        if m is not None:
+            m.bookings = [b for b in m.bookings if b[2] != booking_id]
+
+    # ---------- read ----------
+    def status_of(self, machine_id: int) -> str | None:
+        m = self._machines.get(machine_id)
+        return m.status if m is not None else None
+
+    def candidates(self, zone, start_at: datetime, end_at: datetime) -> list[int]:
+        """
+        Свободные ПК зоны, на которые помещается [start_at, end_at),
+        в порядке best-fit: сначала самый короткий промежуток до следующей брони.
+        """
+        start_at, end_at = _utc(start_at), _utc(end_at)
+        fits: list[tuple[bool, float, int]] = []
+        for mid in self._zones.get(_value(zone), ()):
+            m = self._machines[mid]
+            if m.status != MachineStatus.available.value:
+                continue
+            # первая бронь, которая заканчивается позже start_at
+            i = bisect.bisect_right(m.bookings, start_at, key=lambda b: b[1])
+            if i < len(m.bookings):
+                next_start = m.bookings[i][0]
+                if next_start < end_at:
+                    continue
+                fits.append((False, (next_start - end_at).total_seconds(), mid))
+            else:
+                fits.append((True, 0.0, mid))
+        fits.sort()
+        return [mid for _, _, mid in fits]
+
+    # ---------- reconcile ----------
+    async def refresh(self, db: AsyncSession) -> None:
+        now = datetime.now(timezone.utc)
+        machines = (await db.execute(select(Machine.id, Machine.zone, Machine.status))).all()
+        bookings = (await db.execute(
+            select(Booking.id, Booking.machine_id, Booking.start_at, Booking.end_at)
+            .where(Booking.status == BookingStatus.active, Booking.end_at > now)
+            .order_by(Booking.machine_id, Booking.start_at)
+        )).all()
+
+        machine_map: dict[int, _MachineSlots] = {}
+        zones: dict[str, set[int]] = {}
+        for mid, zone, status in machines:
+            machine_map[mid] = _MachineSlots(zone=_value(zone), status=_value(status))
+            zones.setdefault(_value(zone), set()).add(mid)
+
+        booking_machine: dict[int, int] = {}
+        for bid, mid, start_at, end_at in bookings:
+            m = machine_map.get(mid)
+            if m is not None:
+                m.bookings.append((_utc(start_at), _utc(end_at), bid))
+                booking_machine[bid] = mid
+
+        self._machines = machine_map
+        self._zones = zones
+        self._booking_machine = booking_machine
+        self.refreshed_at = datetime.now(timezone.utc)
+
+
+free_index = FreeIntervalIndex()
+
+
+async def free_index_refresh_loop() -> None:
+    """
+    Фоновая сверка индекса автоподбора с БД (заодно выбрасывает прошедшие брони).
+    Запускается при старте приложения.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                await free_index.refresh(db)
+        except Exception:
+            # защищаем фоновую задачу от падения
+            pass
+
+        await asyncio.sleep(settings.free_index_refresh_interval)
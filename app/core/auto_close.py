@@ -5,9 +5,16 @@ from typing import cast
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.assign import free_index
+from app.core.dashboard import dashboard
+from app.core.kiosk import kiosk
 from app.core.pricing import calculate_total_price
+from app.core.report_cache import SESSION_REPORTS, report_cache
+from app.core.rollups import RevenueDeltas, add_payment, add_session_usage
+from app.core.timeline import invalidate_timeline
+from app.core.waitlist import waitlist
 from app.db.session import async_session
-from app.models.machine import Machine, MachineStatus as MachineStatusEnum
+from app.models.machine import Machine, MachineStatus as MachineStatusEnum, Zone
 from app.models.session_model import Session
 from app.models.payment import (
     Payment,
@@ -34,6 +41,9 @@ async def _close_due_sessions_once(db: AsyncSession) -> int:
 
     sessions = (await db.execute(stmt)).scalars().all()
     closed = 0
+    closed_spans: list[tuple[datetime, datetime]] = []
+    closed_ids: list[tuple[int, int, int, Zone]] = []
+    revenue: RevenueDeltas = []
 
     for s in sessions:
         # получаем машину
@@ -81,12 +91,34 @@ async def _close_due_sessions_once(db: AsyncSession) -> int:
             )
             db.add(payment)
             db.add(s)  # Убеждаемся, что сессия тоже в сессии
+            revenue += await add_payment(db, payment)
+
+        await add_session_usage(
+            db,
+            machine_id=machine.id,
+            watt=machine.watt,
+            started_at=start_at,
+            ended_at=end_at,
+        )
 
         machine.status = MachineStatusEnum.available
         closed += 1
+        closed_spans.append((start_at, end_at))
+        closed_ids.append((s.id, s.user_id, machine.id, machine.zone))
 
     if closed > 0:
         await db.commit()
+        dashboard.revenue_apply(revenue)
+
+        for start_at, end_at in closed_spans:
+            report_cache.invalidate(start_at, end_at, SESSION_REPORTS)
+            invalidate_timeline(start_at, end_at)
+        for session_id, user_id, machine_id, zone in closed_ids:
+            dashboard.session_ended(session_id, user_id)
+            dashboard.machine_status(machine_id, MachineStatusEnum.available)
+            free_index.machine_status(machine_id, MachineStatusEnum.available)
+            kiosk.session_ended(machine_id, MachineStatusEnum.available)
+            waitlist.machine_freed(machine_id, zone)
 
     return closed
 
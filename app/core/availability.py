@@ -0,0 +1,96 @@
+"""
+Поиск свободных ПК на интервал времени.
+
+ПК свободен на [start_at, end_at), если он не offline, на нём нет активной
+брони, пересекающей интервал (GiST-индекс ограничения ex_bookings_machine_overlap),
+и нет открытой сессии, которая продлится дольше start_at (ix_sessions_open_machine).
+
+bulk_conflicts_query проверяет сразу все повторения групповой брони одним
+запросом: список кандидатов передаётся как VALUES и соединяется с активными
+бронями по && на during.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime, Integer, Select, and_, column, exists, func, literal_column, or_, select, values,
+)
+
+from app.models.booking import Booking, BookingStatus
+from app.models.machine import Machine, MachineStatus, Zone
+from app.models.session_model import Session
+
+
+def window_range(start_at: datetime, end_at: datetime):
+    return func.tstzrange(start_at, end_at, literal_column("'[)'"))
+
+
+def booking_overlaps(start_at: datetime, end_at: datetime):
+    """Активная бронь этого ПК пересекает интервал."""
+    return exists().where(
+        Booking.machine_id == Machine.id,
+        Booking.status == BookingStatus.active,
+        Booking.during.op("&&")(window_range(start_at, end_at)),
+    )
+
+
+def session_blocks(start_at: datetime):
+    """Открытая сессия на ПК ещё идёт в момент start_at (без auto_end_at — бессрочно)."""
+    return exists().where(
+        Session.machine_id == Machine.id,
+        Session.ended_at.is_(None),
+        or_(Session.auto_end_at.is_(None), Session.auto_end_at > start_at),
+    )
+
+
+def free_machines_query(
+    start_at: datetime,
+    end_at: datetime,
+    zone: Zone | None = None,
+) -> Select:
+    stmt = (
+        select(Machine)
+        .where(
+            Machine.status != MachineStatus.offline,
+            ~booking_overlaps(start_at, end_at),
+            ~session_blocks(start_at),
+        )
+        .order_by(Machine.id)
+    )
+    if zone is not None:
+        stmt = stmt.where(Machine.zone == zone)
+    return stmt
+
+
+def bulk_conflicts_query(
+    user_id: int,
+    candidates: list[tuple[int, datetime, datetime]],
+) -> Select:
+    """
+    Пары (индекс кандидата, id брони, тот же ПК?) для кандидатов
+    [(machine_id, start_at, end_at)], которые пересекаются с активной бронью
+    того же ПК или того же пользователя. Пересечения по ПК идут первыми.
+    """
+    c = values(
+        column("idx", Integer),
+        column("machine_id", Integer),
+        column("start_at", DateTime(timezone=True)),
+        column("end_at", DateTime(timezone=True)),
+        name="candidates",
+    ).data([(i, m, s, e) for i, (m, s, e) in enumerate(candidates)])
+
+    same_machine = Booking.machine_id == c.c.machine_id
+    return (
+        select(c.c.idx, Booking.id, same_machine)
+        .select_from(c)
+        .join(
+            Booking,
+            and_(
+                Booking.status == BookingStatus.active,
+                or_(same_machine, Booking.user_id == user_id),
+                Booking.during.op("&&")(window_range(c.c.start_at, c.c.end_at)),
+            ),
+        )
+        .order_by(c.c.idx, same_machine.desc(), Booking.id)
+    )
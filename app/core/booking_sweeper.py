@@ -0,0 +1,69 @@
+"""
+Фоновая чистка броней.
+
+Активные брони, по которым никто не пришёл за BOOKING_NO_SHOW_GRACE минут,
+получают статус no_show, а те, чьё время уже прошло, — expired. Оба перевода
+делаются одним UPDATE ... RETURNING каждый (по частичным индексам
+ix_bookings_active_start / ix_bookings_active_end), поэтому множество
+активных броней — и GiST-индексы ограничений пересечений — остаются маленькими.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.assign import free_index
+from app.core.config import settings
+from app.core.timeline import invalidate_timeline
+from app.db.session import async_session
+from app.models.booking import Booking, BookingStatus
+
+
+async def _mark(db: AsyncSession, condition, new_status: BookingStatus):
+    res = await db.execute(
+        update(Booking)
+        .where(Booking.status == BookingStatus.active, condition)
+        .values(status=new_status)
+        .returning(Booking.id, Booking.start_at, Booking.end_at)
+        .execution_options(synchronize_session=False)
+    )
+    return res.all()
+
+
+async def _sweep_bookings_once(db: AsyncSession) -> int:
+    """Возвращает количество закрытых броней."""
+    now = datetime.now(timezone.utc)
+    changed = []
+
+    if settings.booking_no_show_grace > 0:
+        cutoff = now - timedelta(minutes=settings.booking_no_show_grace)
+        changed += await _mark(db, Booking.start_at <= cutoff, BookingStatus.no_show)
+
+    changed += await _mark(db, Booking.end_at <= now, BookingStatus.expired)
+
+    if changed:
+        await db.commit()
+        for booking_id, start_at, end_at in changed:
+            invalidate_timeline(start_at, end_at)
+            free_index.booking_removed(booking_id)
+
+    return len(changed)
+
+
+async def booking_sweeper_loop() -> None:
+    """
+    Фоновый цикл чистки броней.
+    Запускается при старте приложения.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                await _sweep_bookings_once(db)
+        except Exception:
+            # защищаем фоновую задачу от падения
+            pass
+
+        await asyncio.sleep(settings.booking_sweep_interval)
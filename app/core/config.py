@@ -16,6 +16,70 @@ class Settings(BaseSettings):
     # API configuration
     api_port: int = Field(default=8000, alias="API_PORT")
 
+    # Payment provider (пустой URL — локальная заглушка без HTTP)
+    payment_provider_url: str = Field(default="", alias="PAYMENT_PROVIDER_URL")
+    payment_webhook_url: str = Field(default="", alias="PAYMENT_WEBHOOK_URL")
+    payment_provider_timeout: float = Field(default=5.0, alias="PAYMENT_PROVIDER_TIMEOUT")
+    payment_provider_connect_timeout: float = Field(default=2.0, alias="PAYMENT_PROVIDER_CONNECT_TIMEOUT")
+    payment_provider_max_retries: int = Field(default=2, alias="PAYMENT_PROVIDER_MAX_RETRIES")
+    payment_provider_backoff: float = Field(default=0.2, alias="PAYMENT_PROVIDER_BACKOFF")
+    payment_provider_max_connections: int = Field(default=50, alias="PAYMENT_PROVIDER_MAX_CONNECTIONS")
+    payment_provider_breaker_threshold: int = Field(default=5, alias="PAYMENT_PROVIDER_BREAKER_THRESHOLD")
+    payment_provider_breaker_reset: float = Field(default=30.0, alias="PAYMENT_PROVIDER_BREAKER_RESET")
+
+    # Сверка зависших платежей (created/pending без webhook)
+    payment_reconcile_interval: int = Field(default=60, alias="PAYMENT_RECONCILE_INTERVAL")
+    payment_reconcile_after: int = Field(default=300, alias="PAYMENT_RECONCILE_AFTER")
+    payment_reconcile_batch: int = Field(default=200, alias="PAYMENT_RECONCILE_BATCH")
+
+    # Кеш отчётов: прошедшие периоды живут долго, текущие — коротко
+    report_cache_closed_ttl: int = Field(default=86400, alias="REPORT_CACHE_CLOSED_TTL")
+    report_cache_open_ttl: int = Field(default=30, alias="REPORT_CACHE_OPEN_TTL")
+    report_cache_max_entries: int = Field(default=512, alias="REPORT_CACHE_MAX_ENTRIES")
+
+    # Фоновые задачи отчётов: пул процессов и результаты на локальном диске
+    report_jobs_dir: str = Field(default="var/report_jobs", alias="REPORT_JOBS_DIR")
+    report_jobs_workers: int = Field(default=2, alias="REPORT_JOBS_WORKERS")
+    report_jobs_per_user: int = Field(default=2, alias="REPORT_JOBS_PER_USER")
+    report_jobs_ttl: int = Field(default=86400, alias="REPORT_JOBS_TTL")
+    report_jobs_cleanup_interval: int = Field(default=600, alias="REPORT_JOBS_CLEANUP_INTERVAL")
+    # активная задача без отметки процесса-владельца дольше этого — его уже нет
+    report_jobs_stale_after: int = Field(default=300, alias="REPORT_JOBS_STALE_AFTER")
+
+    # Кеш сетки занятости ПК (календарь броней) для текущих и будущих дней
+    timeline_cache_ttl: int = Field(default=300, alias="TIMELINE_CACHE_TTL")
+
+    # Брони: неявка через N минут после начала (0 — не отменять), период фоновой чистки
+    booking_no_show_grace: int = Field(default=15, alias="BOOKING_NO_SHOW_GRACE")
+    booking_sweep_interval: int = Field(default=60, alias="BOOKING_SWEEP_INTERVAL")
+
+    # Кеш таблицы app_settings (ставки оплаты смен и налога)
+    app_settings_cache_ttl: int = Field(default=60, alias="APP_SETTINGS_CACHE_TTL")
+
+    # Сверка счётчиков дашборда с БД
+    dashboard_refresh_interval: int = Field(default=60, alias="DASHBOARD_REFRESH_INTERVAL")
+
+    # Сверка индекса автоподбора ПК (POST /sessions/start по зоне) с БД
+    free_index_refresh_interval: int = Field(default=60, alias="FREE_INDEX_REFRESH_INTERVAL")
+
+    # Очередь ожидания: сколько секунд ПК придерживается за клиентом, период проверки
+    waitlist_offer_ttl: int = Field(default=120, alias="WAITLIST_OFFER_TTL")
+    waitlist_check_interval: int = Field(default=5, alias="WAITLIST_CHECK_INTERVAL")
+
+    # Heartbeat клиентов на ПК: период записи в БД, через сколько секунд тишины ПК — offline
+    heartbeat_flush_interval: int = Field(default=10, alias="HEARTBEAT_FLUSH_INTERVAL")
+    heartbeat_offline_after: int = Field(default=60, alias="HEARTBEAT_OFFLINE_AFTER")
+
+    # Замеры мощности от клиентов на ПК: период записи буфера, размер пачки, предел
+    # буфера в памяти (дальше — 503), сколько дней хранить сырые точки
+    power_flush_interval: int = Field(default=2, alias="POWER_FLUSH_INTERVAL")
+    power_flush_batch: int = Field(default=5000, alias="POWER_FLUSH_BATCH")
+    power_buffer_max: int = Field(default=200000, alias="POWER_BUFFER_MAX")
+    power_raw_retention_days: int = Field(default=7, alias="POWER_RAW_RETENTION_DAYS")
+    # «измеренный» отчёт держит мощность до следующего замера не дольше этого (секунд);
+    # агент должен слать замеры чаще, иначе пробел считается выключенным ПК
+    power_sample_hold: int = Field(default=300, alias="POWER_SAMPLE_HOLD")
+
     model_config = {
         "env_file": ".env",
         "case_sensitive": False
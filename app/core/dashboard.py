@@ -0,0 +1,175 @@
+"""
+Счётчики для /dashboard/summary в памяти процесса.
+
+Пути записи (сессии, платежи, ПК) сразу обновляют счётчики, поэтому ответ
+дашборда не ходит в БД. dashboard_refresh_loop периодически перечитывает
+состояние из БД и исправляет возможный дрейф (откат транзакции после хука,
+правки в обход API, несколько процессов API).
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.machine import Machine
+from app.models.payment import PaymentStatus
+from app.models.rollup import DailyRevenue
+from app.models.session_model import Session
+
+MACHINE_STATUSES = ("available", "busy", "offline")
+
+
+def _value(v) -> str:
+    return getattr(v, "value", v)
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+class DashboardCounters:
+    def __init__(self) -> None:
+        self._machines: dict[int, tuple[str, str]] = {}          # id -> (zone, status)
+        self._by_zone: dict[str, Counter] = defaultdict(Counter)  # zone -> status -> count
+        self._active: dict[int, datetime | None] = {}             # session_id -> auto_end_at
+        self._active_by_user: dict[int, int] = {}                 # user_id -> session_id
+        self._revenue_day: date = datetime.now(timezone.utc).date()
+        self._revenue = Decimal("0.00")
+        self.refreshed_at: datetime | None = None
+
+    # ---------- machines ----------
+    def machine_set(self, machine_id: int, zone, status) -> None:
+        new = (_value(zone), _value(status))
+        old = self._machines.get(machine_id)
+        if old == new:
+            return
+        if old is not None:
+            self._by_zone[old[0]][old[1]] -= 1
+        self._by_zone[new[0]][new[1]] += 1
+        self._machines[machine_id] = new
+
+    def machine_status(self, machine_id: int, status) -> None:
+        old = self._machines.get(machine_id)
+        if old is not None:
+            self.machine_set(machine_id, old[0], status)
+
+    # ---------- sessions ----------
+    def session_started(self, session_id: int, user_id: int, auto_end_at: datetime | None) -> None:
+        self._active[session_id] = _utc(auto_end_at) if auto_end_at else None
+        self._active_by_user[user_id] = session_id
+
+    def session_extended(self, session_id: int, auto_end_at: datetime | None) -> None:
+        if session_id in self._active:
+            self._active[session_id] = _utc(auto_end_at) if auto_end_at else None
+
+    def sessions_extended_by_user(self, minutes_by_user: dict[int, int]) -> None:
+        for user_id, minutes in minutes_by_user.items():
+            sid = self._active_by_user.get(user_id)
+            end = self._active.get(sid) if sid is not None else None
+            if end is not None:
+                self._active[sid] = end + timedelta(minutes=minutes)
+
+    def session_ended(self, session_id: int, user_id: int | None = None) -> None:
+        self._active.pop(session_id, None)
+        if user_id is not None and self._active_by_user.get(user_id) == session_id:
+            del self._active_by_user[user_id]
+
+    # ---------- revenue ----------
+    def _roll_day(self, today: date) -> None:
+        if today != self._revenue_day:
+            self._revenue_day = today
+            self._revenue = Decimal("0.00")
+
+    def revenue_add(self, created_at: datetime, amount) -> None:
+        """Успешный платёж: в «выручку сегодня» идёт по дню created_at (UTC), как в отчётах."""
+        self._roll_day(datetime.now(timezone.utc).date())
+        if _utc(created_at).astimezone(timezone.utc).date() == self._revenue_day:
+            self._revenue += Decimal(amount)
+
+    def revenue_apply(self, deltas) -> None:
+        """Изменения выручки из add_payment/move_payment/add_revenue — только после коммита."""
+        for created_at, amount in deltas:
+            self.revenue_add(created_at, amount)
+
+    # ---------- read ----------
+    def summary(self, ending_within_minutes: int = 15) -> dict:
+        now = datetime.now(timezone.utc)
+        self._roll_day(now.date())
+        horizon = now + timedelta(minutes=ending_within_minutes)
+
+        zones = []
+        totals = Counter()
+        for zone in sorted(self._by_zone):
+            counts = self._by_zone[zone]
+            row = {s: counts.get(s, 0) for s in MACHINE_STATUSES}
+            if not any(row.values()):
+                continue
+            totals.update(row)
+            zones.append({"zone": zone, "total": sum(row.values()), **row})
+
+        return {
+            "machines": {"total": sum(totals.values()), **{s: totals.get(s, 0) for s in MACHINE_STATUSES}},
+            "machines_by_zone": zones,
+            "active_sessions": len(self._active),
+            # активных сессий не больше, чем ПК, — проход по ним дешёвый
+            "ending_soon": sum(1 for end in self._active.values() if end is not None and end <= horizon),
+            "ending_within_minutes": ending_within_minutes,
+            "revenue_day": self._revenue_day,
+            "revenue_today": float(self._revenue),
+            "refreshed_at": self.refreshed_at,
+        }
+
+    # ---------- reconcile ----------
+    async def refresh(self, db: AsyncSession) -> None:
+        today = datetime.now(timezone.utc).date()
+
+        machines = (await db.execute(select(Machine.id, Machine.zone, Machine.status))).all()
+        active = (await db.execute(
+            select(Session.id, Session.user_id, Session.auto_end_at).where(Session.ended_at.is_(None))
+        )).all()
+        revenue = (await db.execute(
+            select(func.coalesce(func.sum(DailyRevenue.amount), 0)).where(
+                DailyRevenue.day == today,
+                DailyRevenue.status == PaymentStatus.succeeded,
+            )
+        )).scalar_one()
+
+        by_zone: dict[str, Counter] = defaultdict(Counter)
+        machine_map = {}
+        for mid, zone, status in machines:
+            machine_map[mid] = (_value(zone), _value(status))
+            by_zone[_value(zone)][_value(status)] += 1
+
+        self._machines = machine_map
+        self._by_zone = by_zone
+        self._active = {sid: _utc(end) if end else None for sid, _, end in active}
+        self._active_by_user = {uid: sid for sid, uid, _ in active}
+        self._revenue_day = today
+        self._revenue = Decimal(revenue)
+        self.refreshed_at = datetime.now(timezone.utc)
+
+
+dashboard = DashboardCounters()
+
+
+async def dashboard_refresh_loop() -> None:
+    """
+    Фоновая сверка счётчиков дашборда с БД.
+    Запускается при старте приложения.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                await dashboard.refresh(db)
+        except Exception:
+            # защищаем фоновую задачу от падения
+            pass
+
+        await asyncio.sleep(settings.dashboard_refresh_interval)
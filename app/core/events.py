@@ -0,0 +1,69 @@
+"""
+Push-события для клиентов (SSE, GET /events).
+
+Подписчик — очередь asyncio на одно подключение. Событие получают все
+admin/operator и пользователь, которому оно адресовано. Медленный клиент
+не тормозит остальных: при переполнении его очереди старые события
+выбрасываются.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from fastapi.encoders import jsonable_encoder
+
+QUEUE_SIZE = 100
+# комментарий-пинг, чтобы прокси не закрывали «тихое» соединение
+KEEPALIVE_SECONDS = 15
+
+
+@dataclass(eq=False)
+class Subscriber:
+    user_id: int
+    staff: bool
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=QUEUE_SIZE))
+
+
+class EventHub:
+    def __init__(self) -> None:
+        self._subscribers: set[Subscriber] = set()
+
+    def subscribe(self, user_id: int, staff: bool) -> Subscriber:
+        sub = Subscriber(user_id=user_id, staff=staff)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subscribers.discard(sub)
+
+    def publish(self, event: str, data: dict, user_id: int | None = None) -> None:
+        message = (event, jsonable_encoder(data))
+        for sub in self._subscribers:
+            if not sub.staff and sub.user_id != user_id:
+                continue
+            if sub.queue.full():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(message)
+
+
+events = EventHub()
+
+
+async def sse_stream(user_id: int, staff: bool, is_disconnected) -> AsyncIterator[str]:
+    """Поток text/event-stream: подписка живёт, пока клиент читает ответ."""
+    sub = events.subscribe(user_id, staff)
+    try:
+        yield f": connected {datetime.now(timezone.utc).isoformat()}\n\n"
+        while not await is_disconnected():
+            try:
+                event, data = await asyncio.wait_for(sub.queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    finally:
+        events.unsubscribe(sub)
@@ -1,39 +1,99 @@
 from __future__ import annotations
 
+import asyncio
 from io import BytesIO
-from typing import Iterable, Sequence, Any, cast
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, Iterable, Iterator, Sequence
 
 from openpyxl import Workbook
-from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.utils import get_column_letter
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
-def _autosize_columns(ws: Worksheet) -> None:
-    for col in range(1, ws.max_column + 1):
-        letter = get_column_letter(col)
-        max_len = 0
-        for cell in ws[letter]:
-            if cell.value is None:
+MAX_COLUMN_WIDTH = 45
+CHUNK_SIZE = 64 * 1024
+# до этого размера файл собирается в памяти, больше — уходит во временный файл на диске
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def _column_widths(headers: Sequence[Any], rows: Sequence[Sequence[Any]]) -> list[int]:
+    """
+    Ширины колонок по длине значений — считаются за один проход по строкам,
+    без создания ячеек openpyxl.
+    """
+    widths = [len(str(h)) if h is not None else 0 for h in headers]
+    for r in rows:
+        for i, v in enumerate(r):
+            if v is None:
                 continue
-            max_len = max(max_len, len(str(cell.value)))
-        ws.column_dimensions[letter].width = min(max_len + 2, 45)
+            n = len(str(v))
+            if i >= len(widths):
+                widths.append(n)
+            elif n > widths[i]:
+                widths[i] = n
+    return [min(w + 2, MAX_COLUMN_WIDTH) for w in widths]
 
 
-def make_workbook(title: str, headers: list[str], rows: Iterable[Sequence[Any]]) -> bytes:
+def write_workbook(
+    fileobj: IO[bytes],
+    title: str,
+    headers: list[str],
+    rows: Iterable[Sequence[Any]],
+) -> None:
     """
-    Создаёт Excel-файл (xlsx) в памяти и возвращает bytes.
-    rows: любая последовательность значений (int/float/str/None и т.д.)
+    Пишет xlsx в fileobj в write-only режиме openpyxl: строки сразу сериализуются
+    в XML, объекты ячеек в памяти не копятся.
+
+    В write-only листе <cols> пишется до первой строки, поэтому ширины колонок
+    считаются заранее по значениям (а не повторным обходом ячеек книги).
     """
-    wb = Workbook()
-    ws = cast(Worksheet, wb.active)   # для Pylance: active существует и это Worksheet
-    ws.title = title[:31]            # Excel ограничение на имя листа
+    rows = rows if isinstance(rows, Sequence) else list(rows)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title[:31])   # Excel ограничение на имя листа
+
+    for col, width in enumerate(_column_widths(headers, rows), start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
 
     ws.append(headers)
     for r in rows:
         ws.append(list(r))
 
-    _autosize_columns(ws)
+    wb.save(fileobj)
+
 
+def make_workbook(title: str, headers: list[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """
+    Создаёт Excel-файл (xlsx) в памяти и возвращает bytes.
+    rows: любая последовательность значений (int/float/str/None и т.д.)
+    """
     bio = BytesIO()
-    wb.save(bio)
+    write_workbook(bio, title, headers, rows)
     return bio.getvalue()
+
+
+def _iter_chunks(f: IO[bytes]) -> Iterator[bytes]:
+    try:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        f.close()
+
+
+async def stream_workbook(
+    title: str,
+    headers: list[str],
+    rows: Iterable[Sequence[Any]],
+) -> Iterator[bytes]:
+    """
+    Собирает xlsx в рабочем потоке (event loop не блокируется) и возвращает
+    итератор по кускам файла — для StreamingResponse.
+    """
+    f = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        await asyncio.to_thread(write_workbook, f, title, headers, rows)
+        f.seek(0)
+    except BaseException:
+        f.close()
+        raise
+    return _iter_chunks(f)
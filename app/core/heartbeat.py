@@ -0,0 +1,171 @@
+"""
+Heartbeat клиентов на ПК и автоматический offline.
+
+POST /kiosk/heartbeat только записывает время в словарь в памяти. Раз в
+HEARTBEAT_FLUSH_INTERVAL секунд heartbeat_flush_loop:
+- пишет накопившиеся last_seen_at одним UPDATE ... FROM (VALUES ...);
+- переводит в offline (auto_offline) свободные ПК, которые молчат дольше
+  HEARTBEAT_OFFLINE_AFTER секунд;
+- возвращает в available ПК, снятые так автоматически, когда они снова на связи.
+
+Следятся только ПК, от которых хоть раз был heartbeat (last_seen_at не NULL).
+ПК с открытой сессией не трогаются: за ними есть живой клиент и оператор.
+Offline, выставленный оператором, автоматически не снимается.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, Integer, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.assign import free_index
+from app.core.config import settings
+from app.core.dashboard import dashboard
+from app.core.kiosk import kiosk
+from app.core.timeline import timeline_cache
+from app.core.waitlist import waitlist
+from app.db.session import async_session
+from app.models.machine import Machine, MachineStatus
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+class HeartbeatRegistry:
+    def __init__(self) -> None:
+        self._seen: dict[int, datetime] = {}   # machine_id -> последний heartbeat
+        self._dirty: set[int] = set()          # ещё не записаны в БД
+        self._auto_offline: set[int] = set()   # сняты в offline автоматически
+        self._started_at = datetime.now(timezone.utc)
+        self.loaded = False
+
+    # ---------- пути записи ----------
+    def beat(self, machine_id: int) -> None:
+        self._seen[machine_id] = datetime.now(timezone.utc)
+        self._dirty.add(machine_id)
+
+    def status_set(self, machine_id: int) -> None:
+        """Оператор сменил статус вручную — детектор его больше не отменяет."""
+        self._auto_offline.discard(machine_id)
+
+    def last_seen(self, machine_id: int) -> datetime | None:
+        return self._seen.get(machine_id)
+
+    # ---------- фоновая запись ----------
+    async def load(self, db: AsyncSession) -> None:
+        rows = (await db.execute(
+            select(Machine.id, Machine.last_seen_at, Machine.auto_offline)
+            .where(Machine.last_seen_at.is_not(None))
+        )).all()
+        for mid, last_seen_at, auto_offline in rows:
+            # после перезапуска API даём клиентам время снова отметиться
+            self._seen.setdefault(mid, max(_utc(last_seen_at), self._started_at))
+            if auto_offline:
+                self._auto_offline.add(mid)
+        self.loaded = True
+
+    async def flush(self, db: AsyncSession) -> tuple[int, list, list]:
+        """Возвращает (записано heartbeat, ушли в offline, вернулись) — списки (id, zone)."""
+        if not self.loaded:
+            await self.load(db)
+
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=settings.heartbeat_offline_after)
+
+        dirty = {mid: self._seen[mid] for mid in self._dirty}
+        self._dirty = set()
+        try:
+            result = await self._write(db, dirty, cutoff)
+        except Exception:
+            # не записанное повторим в следующий раз
+            self._dirty.update(dirty)
+            raise
+        return (len(dirty), *result)
+
+    async def _write(self, db: AsyncSession, dirty: dict[int, datetime], cutoff: datetime) -> tuple[list, list]:
+        if dirty:
+            beats = values(
+                column("id", Integer),
+                column("seen", DateTime(timezone=True)),
+                name="beats",
+            ).data(list(dirty.items()))
+            await db.execute(
+                update(Machine)
+                .where(Machine.id == beats.c.id)
+                .values(last_seen_at=beats.c.seen)
+                .execution_options(synchronize_session=False)
+            )
+
+        # молчащие ПК, свободные по индексу автоподбора (занятые и offline не трогаем);
+        # сам UPDATE ещё раз проверяет статус в БД
+        went_offline: list = []
+        stale = [
+            mid for mid, seen in self._seen.items()
+            if seen < cutoff and free_index.status_of(mid) == MachineStatus.available.value
+        ]
+        if stale:
+            went_offline = (await db.execute(
+                update(Machine)
+                .where(Machine.id.in_(stale), Machine.status == MachineStatus.available)
+                .values(status=MachineStatus.offline, auto_offline=True)
+                .returning(Machine.id, Machine.zone)
+                .execution_options(synchronize_session=False)
+            )).all()
+
+        came_back: list = []
+        alive = [mid for mid in self._auto_offline if mid in self._seen and self._seen[mid] >= cutoff]
+        if alive:
+            came_back = (await db.execute(
+                update(Machine)
+                .where(
+                    Machine.id.in_(alive),
+                    Machine.status == MachineStatus.offline,
+                    Machine.auto_offline.is_(True),
+                )
+                .values(status=MachineStatus.available, auto_offline=False)
+                .returning(Machine.id, Machine.zone)
+                .execution_options(synchronize_session=False)
+            )).all()
+
+        await db.commit()
+
+        # в памяти — только после коммита
+        self._auto_offline.update(mid for mid, _ in went_offline)
+        self._auto_offline.difference_update(alive)
+        return went_offline, came_back
+
+
+heartbeats = HeartbeatRegistry()
+
+
+def _status_changed(machine_id: int, zone, status: MachineStatus) -> None:
+    dashboard.machine_status(machine_id, status)
+    free_index.machine_status(machine_id, status)
+    kiosk.machine_status(machine_id, status)
+    if status == MachineStatus.available:
+        waitlist.machine_freed(machine_id, zone)
+
+
+async def heartbeat_flush_loop() -> None:
+    """
+    Фоновая запись heartbeat и перевод молчащих ПК в offline.
+    Запускается при старте приложения.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                _, went_offline, came_back = await heartbeats.flush(db)
+            for mid, zone in went_offline:
+                _status_changed(mid, zone, MachineStatus.offline)
+            for mid, zone in came_back:
+                _status_changed(mid, zone, MachineStatus.available)
+            if went_offline or came_back:
+                timeline_cache.clear()
+        except Exception:
+            # защищаем фоновую задачу от падения
+            pass
+
+        await asyncio.sleep(settings.heartbeat_flush_interval)
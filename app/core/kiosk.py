@@ -0,0 +1,156 @@
+"""
+Состояние ПК для клиента-киоска (GET /kiosk/state, long-poll).
+
+По каждому ПК в памяти хранится текущая сессия и номер версии. Киоск
+присылает последнюю известную версию: если она устарела, ответ приходит сразу,
+иначе запрос ждёт на asyncio.Event этого ПК, пока пути записи (старт,
+продление, остановка, автозакрытие, смена статуса) не поменяют состояние.
+Ждущие клиенты не делают запросов к БД; из БД состояние читается только при
+первом обращении к ПК и после сброса (массовое продление при сверке платежей).
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from app.db.session import async_session
+from app.models.machine import Machine
+from app.models.session_model import Session
+
+
+def _value(v) -> str:
+    return getattr(v, "value", v)
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+@dataclass(frozen=True)
+class KioskState:
+    machine_id: int
+    version: int
+    status: str
+    session_id: int | None = None
+    user_id: int | None = None
+    started_at: datetime | None = None
+    auto_end_at: datetime | None = None
+
+
+class KioskWatch:
+    def __init__(self) -> None:
+        self._states: dict[int, KioskState] = {}
+        self._events: dict[int, asyncio.Event] = {}
+        self._dirty: set[int] = set()   # ПК, поменявшиеся во время чтения из БД
+        # версии растут и между перезапусками, чтобы старая версия киоска не совпала с новой
+        self._versions = itertools.count(time.time_ns() // 1000)
+
+    def _set(self, machine_id: int, **changes) -> None:
+        old = self._states.get(machine_id)
+        if old is None:
+            # состояние ещё не загружено — его прочитает из БД первый же запрос
+            self._dirty.add(machine_id)
+            self._wake(machine_id)
+            return
+        self._states[machine_id] = replace(old, version=next(self._versions), **changes)
+        self._wake(machine_id)
+
+    def _wake(self, machine_id: int) -> None:
+        event = self._events.pop(machine_id, None)
+        if event is not None:
+            event.set()
+
+    # ---------- хуки путей записи (после коммита) ----------
+    def session_started(self, machine_id: int, session_id: int, user_id: int,
+                        started_at: datetime, auto_end_at: datetime | None, status) -> None:
+        self._set(
+            machine_id,
+            status=_value(status),
+            session_id=session_id,
+            user_id=user_id,
+            started_at=_utc(started_at),
+            auto_end_at=_utc(auto_end_at),
+        )
+
+    def session_extended(self, machine_id: int, auto_end_at: datetime | None) -> None:
+        self._set(machine_id, auto_end_at=_utc(auto_end_at))
+
+    def session_ended(self, machine_id: int, status) -> None:
+        self._set(machine_id, status=_value(status), session_id=None, user_id=None,
+                  started_at=None, auto_end_at=None)
+
+    def machine_status(self, machine_id: int, status) -> None:
+        self._set(machine_id, status=_value(status))
+
+    def users_changed(self, user_ids) -> None:
+        """Сессии этих пользователей изменились в обход хуков (массовое продление) — перечитать из БД."""
+        user_ids = set(user_ids)
+        for machine_id, state in list(self._states.items()):
+            if state.user_id in user_ids:
+                del self._states[machine_id]
+                self._wake(machine_id)
+
+    # ---------- чтение ----------
+    async def _read(self, machine_id: int):
+        async with async_session() as db:
+            status = (await db.execute(
+                select(Machine.status).where(Machine.id == machine_id)
+            )).scalar_one_or_none()
+            if status is None:
+                return None, None
+            s = (await db.execute(
+                select(Session.id, Session.user_id, Session.started_at, Session.auto_end_at)
+                .where(Session.machine_id == machine_id, Session.ended_at.is_(None))
+            )).first()
+        return status, s
+
+    async def _load(self, machine_id: int) -> KioskState | None:
+        # если ПК поменялся, пока шло чтение, читаем ещё раз (не больше пары попыток)
+        for _ in range(3):
+            self._dirty.discard(machine_id)
+            status, s = await self._read(machine_id)
+            if status is None:
+                return None
+            if machine_id not in self._dirty:
+                break
+
+        state = KioskState(
+            machine_id=machine_id,
+            version=next(self._versions),
+            status=_value(status),
+            session_id=s.id if s else None,
+            user_id=s.user_id if s else None,
+            started_at=_utc(s.started_at) if s else None,
+            auto_end_at=_utc(s.auto_end_at) if s else None,
+        )
+        # параллельный запрос того же ПК мог загрузить состояние раньше
+        return self._states.setdefault(machine_id, state)
+
+    async def get(self, machine_id: int) -> KioskState | None:
+        state = self._states.get(machine_id)
+        if state is None:
+            state = await self._load(machine_id)
+        return state
+
+    async def wait_change(self, machine_id: int, version: int | None, timeout: float) -> KioskState | None:
+        """Текущее состояние, если version устарела; иначе ждёт изменения не дольше timeout."""
+        state = await self.get(machine_id)
+        if state is None or version is None or state.version != version or timeout <= 0:
+            return state
+
+        event = self._events.setdefault(machine_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await self.get(machine_id)
+
+
+kiosk = KioskWatch()
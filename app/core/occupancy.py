@@ -0,0 +1,131 @@
+"""
+Загрузка зала: sweep-line по событиям начала/конца сессий.
+
+События (время, +1/-1) сортируются один раз — O(n log n), дальше один проход
+держит текущее число занятых ПК по зонам и суммарную мощность. Между соседними
+событиями состояние постоянно, поэтому отрезок целиком раскладывается по
+часам недели (машино-секунды), а максимумы проверяются только в точках событий.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Iterable
+
+HOURS_PER_WEEK = 7 * 24
+
+
+@dataclass
+class ZoneOccupancy:
+    zone: str
+    machines: int
+    # машино-секунды занятости по часам недели (0 = пн 00:00 в часовом поясе отчёта)
+    busy_seconds: list[float] = field(default_factory=lambda: [0.0] * HOURS_PER_WEEK)
+    max_concurrent: int = 0
+    max_concurrent_at: datetime | None = None
+
+
+@dataclass
+class OccupancyResult:
+    zones: dict[str, ZoneOccupancy]
+    # сколько секунд каждого часа недели попало в период (знаменатель загрузки)
+    hour_seconds: list[float]
+    max_concurrent: int = 0
+    max_concurrent_at: datetime | None = None
+    peak_watt: int = 0
+    peak_watt_at: datetime | None = None
+
+
+def _hour_of_week(t: datetime, tz: tzinfo) -> int:
+    local = t.astimezone(tz)
+    return local.weekday() * 24 + local.hour
+
+
+def _spread(
+    t0: datetime,
+    t1: datetime,
+    tz: tzinfo,
+    add,
+) -> None:
+    """
+    Раскладывает отрезок [t0, t1) по часам недели: add(hour_of_week, seconds).
+    Режется по границам местных часов tz (для +05:30, +09:30 и т.п. они не
+    совпадают с часами UTC): начало местного часа переводится обратно в UTC.
+    """
+    cur = t0
+    while cur < t1:
+        hour_start = cur.astimezone(tz).replace(minute=0, second=0, microsecond=0)
+        next_hour = hour_start.astimezone(timezone.utc) + timedelta(hours=1)
+        part_end = min(t1, next_hour)
+        add(_hour_of_week(cur, tz), (part_end - cur).total_seconds())
+        cur = part_end
+
+
+def sweep_occupancy(
+    sessions: Iterable[tuple[str, int, datetime, datetime]],
+    machines_per_zone: dict[str, int],
+    period_start: datetime,
+    period_end: datetime,
+    tz: tzinfo = timezone.utc,
+) -> OccupancyResult:
+    """
+    sessions: (zone, watt, started_at, ended_at) — ended_at активных сессий
+    подставляется вызывающим кодом (обычно «сейчас»). Интервалы обрезаются
+    по [period_start, period_end).
+    """
+    events: list[tuple[datetime, int, str, int]] = []
+    for zone, watt, start, end in sessions:
+        start = max(start, period_start)
+        end = min(end, period_end)
+        if end <= start:
+            continue
+        events.append((start, 1, zone, watt))
+        events.append((end, -1, zone, watt))
+
+    # при равном времени конец раньше начала: сессии «встык» не пересекаются
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    zones = {z: ZoneOccupancy(zone=z, machines=n) for z, n in machines_per_zone.items()}
+    hour_seconds = [0.0] * HOURS_PER_WEEK
+
+    def add_period(how: int, sec: float) -> None:
+        hour_seconds[how] += sec
+
+    _spread(period_start, period_end, tz, add_period)
+    result = OccupancyResult(zones=zones, hour_seconds=hour_seconds)
+
+    busy: dict[str, int] = defaultdict(int)
+    total_busy = 0
+    total_watt = 0
+    prev_t = period_start
+
+    for t, delta, zone, watt in events:
+        if t > prev_t and total_busy:
+            for z, n in busy.items():
+                if n:
+                    zone_busy = zones.setdefault(z, ZoneOccupancy(zone=z, machines=0)).busy_seconds
+
+                    def add_busy(how: int, sec: float, n=n, acc=zone_busy) -> None:
+                        acc[how] += n * sec
+
+                    _spread(prev_t, t, tz, add_busy)
+        prev_t = t
+
+        busy[zone] += delta
+        total_busy += delta
+        total_watt += delta * watt
+
+        if delta > 0:
+            zo = zones.setdefault(zone, ZoneOccupancy(zone=zone, machines=0))
+            if busy[zone] > zo.max_concurrent:
+                zo.max_concurrent = busy[zone]
+                zo.max_concurrent_at = t
+            if total_busy > result.max_concurrent:
+                result.max_concurrent = total_busy
+                result.max_concurrent_at = t
+            if total_watt > result.peak_watt:
+                result.peak_watt = total_watt
+                result.peak_watt_at = t
+
+    return result
@@ -1,14 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from decimal import Decimal
 from uuid import uuid4
 
+import httpx
+
+from app.core.config import settings
+
+
+class PaymentProviderError(Exception):
+    """Провайдер недоступен или ответил ошибкой (после всех повторов)."""
+
+
+class CircuitOpenError(PaymentProviderError):
+    """Circuit breaker разомкнут — запросы к провайдеру временно не отправляются."""
+
+
+class CircuitBreaker:
+    """
+    Простой circuit breaker:
+      closed    -> запросы идут, считаем подряд идущие ошибки
+      open      -> после failure_threshold ошибок запросы сразу отклоняются
+      half-open -> через reset_timeout секунд пропускаем один пробный запрос
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Пробный запрос завершился без вердикта (отмена, неожиданное исключение)."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class PaymentProviderClient:
+    """
+    Асинхронный клиент платёжного провайдера.
+    Один httpx.AsyncClient на процесс (keep-alive пул соединений),
+    таймауты на каждый вызов, ограниченные повторы и circuit breaker.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        timeout: float,
+        connect_timeout: float,
+        max_retries: int,
+        backoff: float,
+        max_connections: int,
+        breaker: CircuitBreaker,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self.breaker = breaker
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: dict | None = None,
+        headers: dict | None = None,
+    ) -> dict:
+        if not self.breaker.allow():
+            raise CircuitOpenError("Payment provider circuit is open")
+        # этот вызов — пробный запрос half-open; флаг снимаем при любом исходе
+        trial = self.breaker.state == "half-open"
+        try:
+            return await self._attempts(method, path, json=json, headers=headers)
+        finally:
+            if trial:
+                self.breaker.release_trial()
+
+    async def _attempts(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: dict | None,
+        headers: dict | None,
+    ) -> dict:
+        client = self._get_client()
+        last_error: Exception | None = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = await client.request(method, path, json=json, headers=headers)
+            except httpx.TransportError as e:  # таймауты, обрывы соединения
+                last_error = e
+            else:
+                # 5xx и 429 — временные ошибки, повторяем
+                if resp.status_code >= 500 or resp.status_code == 429:
+                    last_error = PaymentProviderError(f"Provider responded {resp.status_code}")
+                elif resp.status_code >= 400:
+                    # ошибка в самом запросе — повторять бессмысленно, провайдер при этом жив
+                    self.breaker.record_success()
+                    raise PaymentProviderError(f"Provider rejected request: {resp.status_code} {resp.text}")
+                else:
+                    try:
+                        data = resp.json()
+                    except ValueError as e:
+                        # 2xx с телом не-JSON — считаем сбоем провайдера, повторяем
+                        last_error = PaymentProviderError(f"Provider returned invalid JSON: {e}")
+                    else:
+                        self.breaker.record_success()
+                        return data
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+
+        self.breaker.record_failure()
+        raise PaymentProviderError(f"Payment provider request failed: {method} {path}") from last_error
+
+    async def create_payment(self, payment_id: int, amount: Decimal, callback_url: str | None = None) -> dict:
+        # Idempotency-Key делает повтор POST безопасным: провайдер вернёт тот же платёж
+        return await self._request(
+            "POST",
+            "/payments",
+            json={
+                "payment_id": payment_id,
+                "amount": str(amount),
+                "callback_url": callback_url,
+            },
+            headers={"Idempotency-Key": f"payment-{payment_id}"},
+        )
+
+    async def get_payment(self, provider_payment_id: str) -> dict:
+        return await self._request("GET", f"/payments/{provider_payment_id}")
+
+    async def get_payment_statuses(self, provider_payment_ids: list[str]) -> dict[str, str]:
+        """Статусы пачки платежей одним запросом: {provider_payment_id: status}."""
+        data = await self._request("POST", "/payments/status", json={"ids": provider_payment_ids})
+        return data.get("statuses", {})
 
-def create_payment(amount: float) -> dict:
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+provider_client = PaymentProviderClient(
+    settings.payment_provider_url,
+    timeout=settings.payment_provider_timeout,
+    connect_timeout=settings.payment_provider_connect_timeout,
+    max_retries=settings.payment_provider_max_retries,
+    backoff=settings.payment_provider_backoff,
+    max_connections=settings.payment_provider_max_connections,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.payment_provider_breaker_threshold,
+        reset_timeout=settings.payment_provider_breaker_reset,
+    ),
+)
+
+
+async def create_payment(payment_id: int, amount: Decimal) -> dict:
+    """
+    Создаёт платёж у провайдера.
+    Если PAYMENT_PROVIDER_URL не задан — локальная заглушка без сетевых вызовов.
     """
-    Имитация платёжного провайдера
+    if not settings.payment_provider_url:
+        provider_payment_id = str(uuid4())
+        return {
+            "provider_payment_id": provider_payment_id,
+            "payment_url": f"https://fake-payments.local/pay/{provider_payment_id}",
+        }
+
+    return await provider_client.create_payment(
+        payment_id,
+        amount,
+        callback_url=settings.payment_webhook_url or None,
+    )
+
+
+async def get_payment_statuses(provider_payment_ids: list[str]) -> dict[str, str]:
     """
-    provider_payment_id = str(uuid4())
-    payment_url = f"https://fake-payments.local/pay/{provider_payment_id}"
+    Статусы платежей у провайдера. Неизвестные провайдеру id в ответ не попадают.
+    Локальная заглушка статусов не знает и возвращает пустой dict.
+    """
+    if not settings.payment_provider_url or not provider_payment_ids:
+        return {}
+    return await provider_client.get_payment_statuses(provider_payment_ids)
+
 
-    return {
-        "provider_payment_id": provider_payment_id,
-        "payment_url": payment_url,
-    }
+async def close_provider_client() -> None:
+    await provider_client.aclose()
@@ -0,0 +1,186 @@
+"""
+Приём замеров мощности от клиентов на ПК (POST /kiosk/power).
+
+Запрос только проверяет точки и дописывает их в буфер в памяти — без обращения
+к БД. power_flush_loop раз в POWER_FLUSH_INTERVAL секунд (или сразу, как
+набралось POWER_FLUSH_BATCH точек) пишет буфер пачками: каждая пачка — один
+запрос, который через unnest(массивы) вставляет сырые точки в power_samples и
+тут же добавляет вставленные в поминутные агрегаты power_minutes. Повторно
+присланные точки (тот же ПК и ts) отбрасываются ON CONFLICT и в агрегаты не
+попадают.
+
+Если буфер дорос до POWER_BUFFER_MAX (БД не успевает или недоступна), приём
+отвечает 503 — агент повторит позже. Сырые точки старше
+POWER_RAW_RETENTION_DAYS дней удаляются, минутные агрегаты хранятся всегда.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.report_cache import POWER, report_cache
+from app.db.session import async_session
+from app.models.power import PowerSample
+
+# точки из будущего дальше этого — сбитые часы на ПК
+MAX_CLOCK_SKEW = timedelta(seconds=60)
+PRUNE_INTERVAL = 3600
+
+_INSERT_SQL = """
+WITH ins AS (
+    INSERT INTO power_samples (machine_id, ts, watts)
+    SELECT * FROM unnest(
+        CAST(:machine_ids AS integer[]),
+        CAST(:ts AS timestamptz[]),
+        CAST(:watts AS smallint[])
+    )
+    ON CONFLICT DO NOTHING
+    RETURNING machine_id, ts, watts
+)
+INSERT INTO power_minutes (machine_id, minute, samples, watts_sum, watts_max)
+SELECT machine_id, date_trunc('minute', ts), count(*), sum(watts), max(watts)
+FROM ins
+GROUP BY 1, 2
+ON CONFLICT (machine_id, minute) DO UPDATE SET
+    samples = power_minutes.samples + EXCLUDED.samples,
+    watts_sum = power_minutes.watts_sum + EXCLUDED.watts_sum,
+    watts_max = GREATEST(power_minutes.watts_max, EXCLUDED.watts_max)
+"""
+
+
+class PowerBufferFull(Exception):
+    pass
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+class PowerIngest:
+    def __init__(self) -> None:
+        # колонки, а не список кортежей: в запрос уходят готовыми массивами
+        self._machine_ids: list[int] = []
+        self._ts: list[datetime] = []
+        self._watts: list[int] = []
+        self._full = asyncio.Event()
+        self._pruned_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    # ---------- приём ----------
+    def add(self, machine_id: int, samples: Iterable[tuple[datetime, int]]) -> tuple[int, int]:
+        """Дописывает точки ПК в буфер. Возвращает (принято, отброшено)."""
+        samples = list(samples)
+        if len(self) + len(samples) > settings.power_buffer_max:
+            raise PowerBufferFull()
+
+        now = datetime.now(timezone.utc)
+        oldest = now - timedelta(days=settings.power_raw_retention_days)
+        newest = now + MAX_CLOCK_SKEW
+
+        accepted = 0
+        for ts, watts in samples:
+            ts = _utc(ts)
+            if not oldest <= ts <= newest:
+                continue
+            self._machine_ids.append(machine_id)
+            self._ts.append(ts)
+            self._watts.append(watts)
+            accepted += 1
+
+        if len(self) >= settings.power_flush_batch:
+            self._full.set()
+        return accepted, len(samples) - accepted
+
+    # ---------- фоновая запись ----------
+    def _take(self) -> tuple[list[int], list[datetime], list[int]]:
+        taken = self._machine_ids, self._ts, self._watts
+        self._machine_ids, self._ts, self._watts = [], [], []
+        self._full.clear()
+        return taken
+
+    def _restore(self, machine_ids: list[int], ts: list[datetime], watts: list[int]) -> None:
+        # не записанное — в начало буфера; предел буфера остановит приём, если БД лежит долго
+        self._machine_ids = machine_ids + self._machine_ids
+        self._ts = ts + self._ts
+        self._watts = watts + self._watts
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Пишет весь буфер одной транзакцией, пачками по POWER_FLUSH_BATCH точек."""
+        machine_ids, ts, watts = self._take()
+        if not ts:
+            return 0
+
+        batch = settings.power_flush_batch
+        try:
+            for i in range(0, len(ts), batch):
+                await db.execute(text(_INSERT_SQL), {
+                    "machine_ids": machine_ids[i:i + batch],
+                    "ts": ts[i:i + batch],
+                    "watts": watts[i:i + batch],
+                })
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            self._restore(machine_ids, ts, watts)
+            raise
+
+        # «измеренный» отчёт по мощности за эти минуты устарел; новая точка меняет
+        # и удержание предыдущей минуты — до POWER_SAMPLE_HOLD секунд назад
+        report_cache.invalidate(
+            min(ts) - timedelta(seconds=settings.power_sample_hold),
+            max(ts),
+            frozenset({POWER}),
+        )
+        return len(ts)
+
+    async def prune(self, db: AsyncSession) -> None:
+        """Удаляет сырые точки старше POWER_RAW_RETENTION_DAYS (не чаще раза в час)."""
+        if time.monotonic() - self._pruned_at < PRUNE_INTERVAL:
+            return
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.power_raw_retention_days)
+        await db.execute(delete(PowerSample).where(PowerSample.ts < cutoff))
+        await db.commit()
+        self._pruned_at = time.monotonic()
+
+    async def wait_for_work(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._full.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+power_ingest = PowerIngest()
+
+
+async def flush_power_buffer() -> None:
+    """Запись остатка буфера при остановке API."""
+    try:
+        async with async_session() as db:
+            await power_ingest.flush(db)
+    except Exception:
+        pass
+
+
+async def power_flush_loop() -> None:
+    """
+    Фоновая запись замеров мощности из буфера в БД и очистка старых сырых точек.
+    Запускается при старте приложения.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                await power_ingest.flush(db)
+                await power_ingest.prune(db)
+        except Exception:
+            # защищаем фоновую задачу от падения
+            pass
+
+        await power_ingest.wait_for_work(settings.power_flush_interval)
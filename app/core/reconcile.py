@@ -0,0 +1,152 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.kiosk import kiosk
+from app.core.payment_provider import PaymentProviderError, get_payment_statuses
+from app.core.report_cache import PAYMENT_REPORTS, report_cache
+from app.core.dashboard import dashboard
+from app.core.rollups import add_revenue
+from app.core.session_extend import extend_active_sessions_bulk
+from app.core.timeline import FAR_FUTURE, invalidate_timeline
+from app.db.session import async_session
+from app.models.payment import (
+    Payment,
+    PaymentMethod as PaymentMethodEnum,
+    PaymentStatus as PaymentStatusEnum,
+)
+
+
+OPEN_STATUSES = (PaymentStatusEnum.created, PaymentStatusEnum.pending)
+
+
+async def _mark(
+    db: AsyncSession,
+    ids: list[int],
+    new_status: PaymentStatusEnum,
+    now: datetime,
+):
+    """
+    Переводит платежи в итоговый статус одним UPDATE.
+    Условие на статус защищает от гонки с webhook: уже закрытые платежи не трогаем.
+    """
+    return await db.execute(
+        update(Payment)
+        .where(Payment.id.in_(ids), Payment.status.in_(OPEN_STATUSES))
+        .values(status=new_status, updated_at=now)
+        .returning(Payment.id, Payment.user_id, Payment.method, Payment.hours)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _reconcile_stale_payments_once(db: AsyncSession) -> int:
+    """
+    Сверяет с провайдером платежи, застрявшие в created/pending дольше
+    PAYMENT_RECONCILE_AFTER секунд. Идёт пачками по частичному индексу
+    ix_payments_open (keyset по id), не сканируя всю таблицу.
+    Возвращает количество закрытых платежей.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=settings.payment_reconcile_after)
+
+    last_id = 0
+    closed = 0
+
+    while True:
+        rows = (
+            await db.execute(
+                select(
+                    Payment.id,
+                    Payment.provider_payment_id,
+                    Payment.status,
+                    Payment.method,
+                    Payment.amount,
+                    Payment.created_at,
+                )
+                .where(
+                    Payment.status.in_(OPEN_STATUSES),
+                    Payment.updated_at < cutoff,
+                    Payment.id > last_id,
+                )
+                .order_by(Payment.id)
+                .limit(settings.payment_reconcile_batch)
+            )
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        by_provider_id = {r.provider_payment_id: r.id for r in rows if r.provider_payment_id}
+        # платёж так и не дошёл до провайдера — закрывать его нечем
+        orphan_ids = [r.id for r in rows if not r.provider_payment_id]
+
+        try:
+            statuses = await get_payment_statuses(list(by_provider_id))
+        except PaymentProviderError:
+            # провайдер недоступен — попробуем в следующем цикле
+            break
+
+        succeeded_ids = [by_provider_id[pid] for pid, st in statuses.items() if st == "succeeded"]
+        failed_ids = orphan_ids + [by_provider_id[pid] for pid, st in statuses.items() if st == "failed"]
+
+        by_id = {r.id: r for r in rows}
+        moves = []
+        minutes_by_user: dict[int, int] = defaultdict(int)
+
+        if failed_ids:
+            res = await _mark(db, failed_ids, PaymentStatusEnum.failed, now)
+            for pid, *_ in res.all():
+                moves.append((by_id[pid], PaymentStatusEnum.failed))
+
+        if succeeded_ids:
+            res = await _mark(db, succeeded_ids, PaymentStatusEnum.succeeded, now)
+            for pid, user_id, method, hours in res.all():
+                moves.append((by_id[pid], PaymentStatusEnum.succeeded))
+                # как и в webhook: успешная онлайн-оплата продлевает активную сессию
+                if method == PaymentMethodEnum.online:
+                    minutes_by_user[user_id] += hours * 60
+            await extend_active_sessions_bulk(db, minutes_by_user)
+
+        # переносим закрытые платежи между корзинами daily_revenue одним upsert
+        entries = []
+        for r, new_status in moves:
+            entries.append((r.created_at, r.method, r.status, -r.amount, -1))
+            entries.append((r.created_at, r.method, new_status, r.amount, 1))
+        revenue = await add_revenue(db, entries)
+        closed += len(moves)
+
+        await db.commit()
+        dashboard.revenue_apply(revenue)
+
+        for r, _ in moves:
+            report_cache.invalidate(r.created_at, reports=PAYMENT_REPORTS)
+        if succeeded_ids:
+            # продлённые сессии теперь занимают ПК дольше
+            invalidate_timeline(now, FAR_FUTURE)
+        if minutes_by_user:
+            kiosk.users_changed(minutes_by_user)
+
+        if len(rows) < settings.payment_reconcile_batch:
+            break
+
+    return closed
+
+
+async def reconcile_payments_loop() -> None:
+    """
+    Фоновый цикл сверки зависших платежей.
+    Запускается при старте приложения.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                await _reconcile_stale_payments_once(db)
+        except Exception:
+            # защищаем фоновую задачу от падения
+            pass
+
+        await asyncio.sleep(settings.payment_reconcile_interval)
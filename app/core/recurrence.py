@@ -0,0 +1,104 @@
+"""
+Развёртка повторяющихся броней (подмножество RRULE: FREQ=DAILY|WEEKLY,
+INTERVAL, COUNT, UNTIL, BYDAY) в список интервалов.
+
+С tz повторения считаются по местным часам зоны: «вторник 18:00» остаётся
+18:00 и после перехода на зимнее/летнее время, а в UTC смещается на час.
+Без tz шаг — ровно сутки/недели в UTC, поэтому start_at со смещением,
+отличным от UTC, без tz не принимается (через переход серия «уехала» бы на час).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    freq: Literal["daily", "weekly"]
+    interval: int = 1
+    count: int | None = None
+    until: datetime | None = None
+    # 0 = понедельник; только для weekly, по умолчанию — день недели start_at
+    byweekday: tuple[int, ...] | None = None
+    # IANA-зона, по местному времени которой повторяется серия
+    tz: str | None = None
+
+
+class RecurrenceError(ValueError):
+    pass
+
+
+def expand(
+    start_at: datetime,
+    end_at: datetime,
+    rule: Recurrence | None,
+    limit: int,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Интервалы всех повторений, начиная с [start_at, end_at). Без правила —
+    один интервал. Больше limit повторений — RecurrenceError.
+    """
+    duration = end_at - start_at
+    if rule is None:
+        return [(start_at, end_at)]
+
+    if rule.count is None and rule.until is None:
+        raise RecurrenceError("count or until is required")
+    if rule.until is not None and (rule.until.tzinfo is None) != (start_at.tzinfo is None):
+        raise RecurrenceError("until and start_at must both be either naive or timezone-aware")
+
+    zone = None
+    if rule.tz is not None:
+        if start_at.tzinfo is None:
+            raise RecurrenceError("start_at must be timezone-aware when tz is given")
+        try:
+            zone = ZoneInfo(rule.tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise RecurrenceError(f"unknown timezone: {rule.tz}")
+    elif start_at.tzinfo is not None and start_at.utcoffset():
+        raise RecurrenceError("tz is required for recurring bookings with a non-UTC offset")
+
+    origin = start_at
+    if zone is not None:
+        # дальше считаем в местном «настенном» времени без tzinfo
+        start_at = start_at.astimezone(zone).replace(tzinfo=None)
+
+    def absolute(local: datetime) -> datetime:
+        if zone is None:
+            return local
+        return local.replace(tzinfo=zone).astimezone(origin.tzinfo)
+
+    if rule.freq == "daily":
+        step = timedelta(days=rule.interval)
+        offsets = [timedelta(0)]
+    else:
+        step = timedelta(weeks=rule.interval)
+        days = sorted(set(rule.byweekday)) if rule.byweekday else [start_at.weekday()]
+        week_start = start_at - timedelta(days=start_at.weekday())
+        offsets = [week_start + timedelta(days=d) - start_at for d in days]
+
+    # повторения одного ПК не должны перекрывать друг друга
+    gaps = [b - a for a, b in zip(offsets, offsets[1:])] + [step - offsets[-1] + offsets[0]]
+    if duration > min(gaps):
+        raise RecurrenceError("occurrences overlap each other")
+
+    result: list[tuple[datetime, datetime]] = []
+    period = 0
+    while True:
+        base = start_at + step * period
+        for off in offsets:
+            occ = base + off
+            if occ < start_at:
+                continue
+            occ_start, occ_end = absolute(occ), absolute(occ + duration)
+            if rule.until is not None and occ_start > rule.until:
+                return result
+            if rule.count is not None and len(result) >= rule.count:
+                return result
+            if len(result) >= limit:
+                raise RecurrenceError(f"too many occurrences (limit {limit})")
+            result.append((occ_start, occ_end))
+        period += 1
@@ -0,0 +1,130 @@
+"""
+Кеш результатов отчётов в памяти процесса.
+
+Ключ — (отчёт, нормализованные параметры). Отчёты за полностью прошедший период
+живут долго (REPORT_CACHE_CLOSED_TTL), периоды, задевающие «сейчас», — коротко
+(REPORT_CACHE_OPEN_TTL). Записи, меняющие данные за период (завершение/удаление
+сессий, платежи), сбрасывают пересекающиеся с ним записи через invalidate().
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import settings
+from app.core.rollups import as_utc
+
+POWER = "power"
+FINANCE = "finance"
+SALARIES = "salaries"
+OCCUPANCY = "occupancy"
+
+# какие отчёты зависят от каких данных
+SESSION_REPORTS = frozenset({POWER, FINANCE, OCCUPANCY})
+PAYMENT_REPORTS = frozenset({FINANCE})
+SHIFT_REPORTS = frozenset({SALARIES, FINANCE})
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return as_utc(value).isoformat()
+    if isinstance(value, float):
+        return repr(value)
+    return value
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    period_start: datetime
+    period_end: datetime
+
+
+class ReportCache:
+    def __init__(self, closed_ttl: float, open_ttl: float, max_entries: int):
+        self.closed_ttl = closed_ttl
+        self.open_ttl = open_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(report: str, **params: Any) -> tuple:
+        return (report, tuple(sorted((k, _normalize(v)) for k, v in params.items())))
+
+    def get(self, key: tuple) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: tuple, value: Any, period_start: datetime, period_end: datetime) -> None:
+        start, end = as_utc(period_start), as_utc(period_end)
+        closed = end < datetime.now(timezone.utc)
+        ttl = self.closed_ttl if closed else self.open_ttl
+
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, start, end)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(
+        self,
+        start: datetime,
+        end: datetime | None = None,
+        reports: frozenset[str] | None = None,
+    ) -> int:
+        """Сбрасывает записи указанных отчётов, чей период пересекается с [start, end]."""
+        start = as_utc(start)
+        end = as_utc(end) if end is not None else start
+        stale = [
+            k for k, e in self._entries.items()
+            if (reports is None or k[0] in reports)
+            and e.period_start <= end and start <= e.period_end
+        ]
+        for k in stale:
+            del self._entries[k]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_reports(self, reports: frozenset[str]) -> int:
+        """Сбрасывает все записи указанных отчётов, независимо от периода."""
+        stale = [k for k in self._entries if k[0] in reports]
+        for k in stale:
+            del self._entries[k]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> int:
+        n = len(self._entries)
+        self._entries.clear()
+        self.invalidations += n
+        return n
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+report_cache = ReportCache(
+    closed_ttl=settings.report_cache_closed_ttl,
+    open_ttl=settings.report_cache_open_ttl,
+    max_entries=settings.report_cache_max_entries,
+)
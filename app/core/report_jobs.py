@@ -0,0 +1,264 @@
+"""
+Фоновые задачи отчётов.
+
+API создаёт строку report_jobs и отдаёт задачу в пул процессов
+(REPORT_JOBS_WORKERS). Воркер — отдельный интерпретатор (spawn) со своим
+подключением к БД: строит отчёт теми же build_*_report, пишет JSON/XLSX
+в REPORT_JOBS_DIR и обновляет статус/прогресс в таблице. Event loop и пул
+соединений API при этом не заняты.
+
+Результаты старше REPORT_JOBS_TTL удаляет report_jobs_cleanup_loop. Он же
+отмечает heartbeat_at у активных задач своего процесса (worker_id) и снимает
+чужие активные задачи, чей владелец молчит дольше REPORT_JOBS_STALE_AFTER, —
+задачи живых соседних процессов API не трогаются.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import socket
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.excel import write_workbook
+from app.core.reports import (
+    build_finance_report,
+    build_occupancy_report,
+    build_power_report,
+    build_salaries_report,
+    finance_table,
+    occupancy_table,
+    power_table,
+    salaries_table,
+)
+from app.db.session import async_session
+from app.models import user  # noqa: F401  (users для FK report_jobs.user_id)
+from app.models.report_job import ReportJob, ReportJobStatus
+from app.schemas.report_job import ReportJobCreate
+
+ACTIVE_STATUSES = (ReportJobStatus.queued, ReportJobStatus.running)
+
+# владелец задач этого запуска API: после рестарта того же хоста id уже другой
+WORKER_ID = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_pool: ProcessPoolExecutor | None = None
+_tasks: set[asyncio.Task] = set()
+
+
+def jobs_dir() -> Path:
+    path = Path(settings.report_jobs_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: воркер не наследует event loop и соединения родителя
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.report_jobs_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ================= WORKER (в дочернем процессе) =================
+async def _set(db: AsyncSession, job_id: str, **values) -> None:
+    await db.execute(update(ReportJob).where(ReportJob.id == job_id).values(**values))
+    await db.commit()
+
+
+async def _build(db: AsyncSession, spec: ReportJobCreate):
+    if spec.report == "power":
+        report = await build_power_report(db, spec.date_from, spec.date_to, spec.price_per_kwh, spec.power_source)
+        return report, power_table
+    if spec.report == "salaries":
+        report = await build_salaries_report(db, spec.month)
+        return report, salaries_table
+    if spec.report == "occupancy":
+        report = await build_occupancy_report(db, spec.date_from, spec.date_to, spec.tz)
+        return report, occupancy_table
+    report = await build_finance_report(db, spec.date_from, spec.date_to)
+    return report, finance_table
+
+
+async def _run_job(job_id: str) -> None:
+    engine = create_async_engine(settings.database_url, poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with session_factory() as db:
+            # задачу могли удалить, пока она стояла в очереди
+            claimed = await db.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status == ReportJobStatus.queued)
+                .values(
+                    status=ReportJobStatus.running,
+                    started_at=datetime.now(timezone.utc),
+                    progress=10,
+                )
+                .returning(ReportJob.format, ReportJob.params)
+            )
+            row = claimed.first()
+            await db.commit()
+            if row is None:
+                return
+            fmt, params = row
+
+            try:
+                spec = ReportJobCreate.model_validate(params)
+                report, to_table = await _build(db, spec)
+                await _set(db, job_id, progress=60)
+
+                table = to_table(report)
+                path = jobs_dir() / f"{job_id}.{fmt}"
+                part = path.with_suffix(".part")
+                if fmt == "xlsx":
+                    with open(part, "wb") as f:
+                        write_workbook(f, table.title, table.headers, table.rows)
+                    filename = table.filename
+                else:
+                    part.write_text(report.model_dump_json(), encoding="utf-8")
+                    filename = table.filename.removesuffix(".xlsx") + ".json"
+                os.replace(part, path)
+
+                await _set(
+                    db, job_id,
+                    status=ReportJobStatus.succeeded,
+                    progress=100,
+                    result_path=str(path),
+                    result_filename=filename,
+                    finished_at=datetime.now(timezone.utc),
+                )
+            except Exception as e:
+                await db.rollback()
+                await _set(
+                    db, job_id,
+                    status=ReportJobStatus.failed,
+                    error=f"{type(e).__name__}: {e}"[:500],
+                    finished_at=datetime.now(timezone.utc),
+                )
+    finally:
+        await engine.dispose()
+
+
+def run_job(job_id: str) -> None:
+    """Точка входа в процессе пула."""
+    asyncio.run(_run_job(job_id))
+
+
+# ================= API-процесс =================
+async def _execute(job_id: str) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_get_pool(), run_job, job_id)
+    except Exception as e:
+        # упал сам воркер (BrokenProcessPool и т.п.) — фиксируем, чтобы задача не висела
+        async with async_session() as db:
+            await db.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status.in_(ACTIVE_STATUSES))
+                .values(
+                    status=ReportJobStatus.failed,
+                    error=f"worker crashed: {type(e).__name__}"[:500],
+                    finished_at=datetime.now(timezone.utc),
+                )
+            )
+            await db.commit()
+
+
+def submit_job(job_id: str) -> None:
+    task = asyncio.create_task(_execute(job_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def remove_result(job: ReportJob) -> None:
+    if job.result_path:
+        try:
+            os.remove(job.result_path)
+        except FileNotFoundError:
+            pass
+
+
+async def _touch_own_jobs(db: AsyncSession) -> None:
+    """Отметка «процесс жив» для активных задач, поставленных этим процессом."""
+    await db.execute(
+        update(ReportJob)
+        .where(ReportJob.worker_id == WORKER_ID, ReportJob.status.in_(ACTIVE_STATUSES))
+        .values(heartbeat_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+
+
+async def _fail_interrupted_jobs(db: AsyncSession) -> None:
+    """Задачи остановленных процессов API, которые уже никто не выполнит."""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.report_jobs_stale_after)
+    await db.execute(
+        update(ReportJob)
+        .where(
+            ReportJob.status.in_(ACTIVE_STATUSES),
+            ReportJob.worker_id.is_distinct_from(WORKER_ID),
+            # строки до появления heartbeat_at — по времени создания
+            func.coalesce(ReportJob.heartbeat_at, ReportJob.created_at) < stale,
+        )
+        .values(
+            status=ReportJobStatus.failed,
+            error="interrupted by restart",
+            finished_at=now,
+        )
+    )
+    await db.commit()
+
+
+async def _cleanup_expired_jobs_once(db: AsyncSession) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.report_jobs_ttl)
+    expired = (await db.execute(
+        select(ReportJob).where(
+            ReportJob.status.not_in(ACTIVE_STATUSES),
+            ReportJob.finished_at < cutoff,
+        )
+    )).scalars().all()
+    if not expired:
+        return 0
+
+    for job in expired:
+        remove_result(job)
+    await db.execute(delete(ReportJob).where(ReportJob.id.in_([j.id for j in expired])))
+    await db.commit()
+    return len(expired)
+
+
+async def report_jobs_cleanup_loop() -> None:
+    """
+    Фоновый цикл очистки результатов задач.
+    Запускается при старте приложения.
+    """
+    # отметки чаще порога, иначе соседи сочтут задачи этого процесса брошенными
+    interval = min(settings.report_jobs_cleanup_interval, settings.report_jobs_stale_after / 3)
+    while True:
+        try:
+            async with async_session() as db:
+                await _touch_own_jobs(db)
+                await _fail_interrupted_jobs(db)
+                await _cleanup_expired_jobs_once(db)
+        except Exception:
+            # защищаем фоновую задачу от падения
+            pass
+
+        await asyncio.sleep(interval)
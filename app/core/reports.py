@@ -0,0 +1,611 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Float, cast, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.app_settings import get_pay_rates
+from app.core.config import settings
+from app.core.occupancy import HOURS_PER_WEEK, sweep_occupancy
+from app.core.power import energy_kwh
+from app.core.rollups import as_utc, day_start
+from app.models.employee import Employee
+from app.models.machine import Machine
+from app.models.payment import Payment, PaymentMethod, PaymentStatus
+from app.models.power import PowerMinute
+from app.models.rollup import DailyMachineUsage, DailyRevenue
+from app.models.session_model import Session
+from app.models.shift import Shift
+from app.schemas.reports import (
+    PowerReportOut, PowerRow, PowerSource,
+    SalariesReportOut, SalaryRow,
+    FinanceReportOut, RevenueDayRow, RevenueMethodRow, PaymentStatusRow,
+    OccupancyReportOut, OccupancyCell, ZonePeakRow,
+)
+
+
+@dataclass
+class RevenueBucket:
+    day: date
+    method: PaymentMethod
+    status: PaymentStatus
+    amount: Decimal
+    payments: int
+
+
+@dataclass
+class MachineUsage:
+    machine_id: int
+    machine_name: str
+    watt: int
+    seconds: float
+
+
+@dataclass
+class RangeSplit:
+    """
+    Период отчёта, разбитый на целые сутки UTC [full_from, full_to),
+    которые читаются из суточных агрегатов, и «края» — неполные сутки,
+    которые считаются по сырым sessions/payments.
+    """
+    full_from: date | None
+    full_to: date | None
+    head: tuple[datetime, datetime] | None
+    tail: tuple[datetime, datetime] | None
+
+
+def split_range(date_from: datetime, date_to: datetime) -> RangeSplit:
+    start, end = as_utc(date_from), as_utc(date_to)
+
+    full_from = start.date() if start == day_start(start.date()) else start.date() + timedelta(days=1)
+    full_to = end.date()
+
+    if full_from >= full_to:
+        return RangeSplit(None, None, None, (start, end))
+
+    head_end = day_start(full_from)
+    head = (start, head_end) if start < head_end else None
+    return RangeSplit(full_from, full_to, head, (day_start(full_to), end))
+
+
+def _utc_day(column):
+    # литералы, а не bind-параметры: выражение в SELECT и GROUP BY должно совпадать текстуально
+    return func.date_trunc(literal_column("'day'"), func.timezone(literal_column("'UTC'"), column))
+
+
+# ================= REVENUE =================
+def revenue_query(date_from: datetime, date_to: datetime, *, end_inclusive: bool = True):
+    """SUM(amount) ... GROUP BY день (UTC), способ оплаты, статус — по сырым payments."""
+    day = _utc_day(Payment.created_at)
+    upper = Payment.created_at <= date_to if end_inclusive else Payment.created_at < date_to
+    return (
+        select(
+            day,
+            Payment.method,
+            Payment.status,
+            func.sum(Payment.amount),
+            func.count(),
+        )
+        .where(Payment.created_at >= date_from, upper)
+        .group_by(day, Payment.method, Payment.status)
+        .order_by(day)
+    )
+
+
+def rollup_revenue_query(full_from: date, full_to: date):
+    return (
+        select(
+            DailyRevenue.day,
+            DailyRevenue.method,
+            DailyRevenue.status,
+            DailyRevenue.amount,
+            DailyRevenue.payments,
+        )
+        .where(DailyRevenue.day >= full_from, DailyRevenue.day < full_to)
+        .order_by(DailyRevenue.day)
+    )
+
+
+async def revenue_breakdown(
+    db: AsyncSession,
+    date_from: datetime,
+    date_to: datetime,
+) -> list[RevenueBucket]:
+    """
+    Выручка за период по дням/способам/статусам. Целые сутки берутся из daily_revenue,
+    неполные — агрегатом по payments. Суммы — Decimal, без потери точности на float.
+    """
+    split = split_range(date_from, date_to)
+    buckets: list[RevenueBucket] = []
+
+    raw_parts = []
+    if split.head:
+        raw_parts.append(revenue_query(*split.head, end_inclusive=False))
+    if split.full_from is not None:
+        rows = (await db.execute(rollup_revenue_query(split.full_from, split.full_to))).all()
+        buckets += [
+            RevenueBucket(day=d, method=m, status=st, amount=amount, payments=count)
+            for d, m, st, amount, count in rows
+            if count
+        ]
+    if split.tail:
+        raw_parts.append(revenue_query(*split.tail))
+
+    for stmt in raw_parts:
+        rows = (await db.execute(stmt)).all()
+        buckets += [
+            RevenueBucket(
+                day=d.date(),
+                method=method,
+                status=status,
+                amount=amount or Decimal("0.00"),
+                payments=count,
+            )
+            for d, method, status, amount, count in rows
+        ]
+
+    buckets.sort(key=lambda b: b.day)
+    return buckets
+
+
+# ================= MACHINE USAGE =================
+def machine_usage_query(date_from: datetime, date_to: datetime):
+    """
+    Секунды работы каждого ПК по сырым sessions: завершённые сессии, обрезанные
+    по границам периода (GREATEST/LEAST), сумма по machine_id.
+    """
+    overlap = func.extract(
+        "epoch",
+        func.least(Session.ended_at, date_to) - func.greatest(Session.started_at, date_from),
+    )
+    return (
+        select(Session.machine_id, func.sum(overlap))
+        .where(
+            Session.ended_at.is_not(None),
+            Session.started_at < date_to,
+            Session.ended_at > date_from,
+        )
+        .group_by(Session.machine_id)
+    )
+
+
+def rollup_usage_query(full_from: date, full_to: date):
+    return (
+        select(DailyMachineUsage.machine_id, func.sum(DailyMachineUsage.seconds))
+        .where(DailyMachineUsage.day >= full_from, DailyMachineUsage.day < full_to)
+        .group_by(DailyMachineUsage.machine_id)
+    )
+
+
+async def machine_usage(
+    db: AsyncSession,
+    date_from: datetime,
+    date_to: datetime,
+) -> list[MachineUsage]:
+    """
+    Одна строка на ПК: целые сутки из daily_machine_usage (≈ дни × ПК строк),
+    неполные сутки на краях — агрегатом по sessions.
+    """
+    split = split_range(date_from, date_to)
+
+    parts = []
+    if split.head:
+        parts.append(machine_usage_query(*split.head))
+    if split.full_from is not None:
+        parts.append(rollup_usage_query(split.full_from, split.full_to))
+    if split.tail and split.tail[0] < split.tail[1]:
+        parts.append(machine_usage_query(*split.tail))
+
+    seconds: dict[int, float] = defaultdict(float)
+    for stmt in parts:
+        for mid, sec in (await db.execute(stmt)).all():
+            seconds[mid] += float(sec or 0)
+
+    seconds = {mid: sec for mid, sec in seconds.items() if sec > 0}
+    if not seconds:
+        return []
+
+    machines = (await db.execute(
+        select(Machine.id, Machine.name, Machine.watt)
+        .where(Machine.id.in_(seconds))
+        .order_by(Machine.id)
+    )).all()
+
+    return [
+        MachineUsage(machine_id=mid, machine_name=name, watt=watt, seconds=seconds[mid])
+        for mid, name, watt in machines
+    ]
+
+
+def measured_power_query(date_from: datetime, date_to: datetime, hold_seconds: int):
+    """
+    Замеры мощности по power_minutes с удержанием значения: средняя мощность
+    минуты (watts_sum / samples) действует до следующей минуты с замерами,
+    но не дольше hold_seconds (дольше — ПК считается выключенным), последняя
+    минута периода — 60 секунд. Так агент, шлющий замеры реже раза в минуту или
+    с пропусками, не занижает kWh. На каждый ПК — секунды и сумма W × секунды.
+    Минута входит, если начинается внутри периода.
+    """
+    avg_watts = cast(PowerMinute.watts_sum, Float) / PowerMinute.samples
+    next_minute = func.lead(PowerMinute.minute).over(
+        partition_by=PowerMinute.machine_id,
+        order_by=PowerMinute.minute,
+    )
+    held = func.least(
+        func.coalesce(func.extract("epoch", next_minute - PowerMinute.minute), 60),
+        max(hold_seconds, 60),
+    )
+    intervals = (
+        select(
+            PowerMinute.machine_id.label("machine_id"),
+            avg_watts.label("watts"),
+            held.label("seconds"),
+        )
+        .where(PowerMinute.minute >= date_from, PowerMinute.minute < date_to)
+        .subquery()
+    )
+    return (
+        select(
+            Machine.id,
+            Machine.name,
+            func.sum(intervals.c.seconds),
+            func.sum(intervals.c.watts * intervals.c.seconds),
+        )
+        .select_from(intervals)
+        .join(Machine, Machine.id == intervals.c.machine_id)
+        .group_by(Machine.id, Machine.name)
+        .order_by(Machine.id)
+    )
+
+
+async def measured_usage(
+    db: AsyncSession,
+    date_from: datetime,
+    date_to: datetime,
+) -> list[tuple[MachineUsage, float]]:
+    """
+    Наработка и kWh по замерам: интеграл мощности по интервалам между замерами
+    (см. measured_power_query, удержание — POWER_SAMPLE_HOLD секунд).
+    В watt — средняя измеренная мощность ПК за это время.
+    """
+    stmt = measured_power_query(date_from, date_to, settings.power_sample_hold)
+    result = []
+    for mid, name, seconds, watt_seconds in (await db.execute(stmt)).all():
+        seconds, watt_seconds = float(seconds or 0), float(watt_seconds or 0)
+        if seconds <= 0:
+            continue
+        usage = MachineUsage(
+            machine_id=mid,
+            machine_name=name,
+            watt=round(watt_seconds / seconds),
+            seconds=seconds,
+        )
+        result.append((usage, watt_seconds / 3600 / 1000))
+    return result
+
+
+# ================= SHIFTS =================
+def shift_counts_query(date_from: date, date_to: date):
+    """
+    Число смен каждого сотрудника за дни [date_from, date_to):
+    COUNT(*) ... GROUP BY employee_id по индексу ix_shifts_date_employee.
+    """
+    return (
+        select(Shift.employee_id, Employee.full_name, func.count())
+        .join(Employee, Employee.id == Shift.employee_id)
+        .where(Shift.shift_date >= date_from, Shift.shift_date < date_to)
+        .group_by(Shift.employee_id, Employee.full_name)
+        .order_by(Shift.employee_id)
+    )
+
+
+# ================= REPORT BUILDERS =================
+def month_bounds(month: str) -> tuple[date, date]:
+    """'2026-03' -> (2026-03-01, 2026-04-01)"""
+    year, m = map(int, month.split("-"))
+    return date(year, m, 1), date(year + (m == 12), (m % 12) + 1, 1)
+
+
+async def build_power_report(
+    db: AsyncSession,
+    date_from: datetime,
+    date_to: datetime,
+    price_per_kwh: float,
+    source: PowerSource = "nameplate",
+) -> PowerReportOut:
+    if source == "measured":
+        usage = await measured_usage(db, date_from, date_to)
+    else:
+        usage = [(u, energy_kwh(u.watt, u.seconds)) for u in await machine_usage(db, date_from, date_to)]
+
+    rows = []
+    total_kwh = 0.0
+    total_cost = 0.0
+
+    for u, kwh in usage:
+        rows.append(PowerRow(
+            machine_id=u.machine_id,
+            machine_name=u.machine_name,
+            watt=u.watt,
+            hours_used=round(u.seconds / 3600, 2),
+            kwh_used=round(kwh, 3),
+        ))
+        total_kwh += kwh
+        total_cost += kwh * price_per_kwh
+
+    return PowerReportOut(
+        date_from=date_from,
+        date_to=date_to,
+        price_per_kwh=price_per_kwh,
+        source=source,
+        rows=rows,
+        total_kwh=round(total_kwh, 3),
+        total_cost=round(total_cost, 2),
+    )
+
+
+async def build_salaries_report(db: AsyncSession, month: str) -> SalariesReportOut:
+    start, end = month_bounds(month)
+    rates = await get_pay_rates(db)
+
+    rows = []
+    total_salary = 0.0
+    total_taxes = 0.0
+
+    for emp_id, full_name, shifts_count in (await db.execute(shift_counts_query(start, end))).all():
+        salary = shifts_count * rates.pay_per_shift
+        tax = salary * rates.tax_rate
+        rows.append(SalaryRow(
+            employee_id=emp_id,
+            full_name=full_name,
+            shifts=shifts_count,
+            pay_per_shift=rates.pay_per_shift,
+            total_salary=salary,
+            taxes=tax,
+        ))
+        total_salary += salary
+        total_taxes += tax
+
+    return SalariesReportOut(
+        month=month,
+        rows=rows,
+        total_salary=total_salary,
+        total_taxes=total_taxes,
+    )
+
+
+async def build_finance_report(
+    db: AsyncSession,
+    date_from: datetime,
+    date_to: datetime,
+) -> FinanceReportOut:
+    buckets = await revenue_breakdown(db, date_from, date_to)
+
+    # в доход идут только успешные платежи; суммируем в Decimal
+    by_day: dict[date, list] = defaultdict(lambda: [Decimal("0.00"), 0])
+    by_method: dict[str, list] = defaultdict(lambda: [Decimal("0.00"), 0])
+    by_status: dict[str, list] = defaultdict(lambda: [Decimal("0.00"), 0])
+    for b in buckets:
+        st = by_status[b.status.value]
+        st[0] += b.amount
+        st[1] += b.payments
+        if b.status != PaymentStatus.succeeded:
+            continue
+        for acc in (by_day[b.day], by_method[b.method.value]):
+            acc[0] += b.amount
+            acc[1] += b.payments
+
+    income_dec = sum((v[0] for v in by_method.values()), Decimal("0.00"))
+    income = float(income_dec)
+
+    usage = await machine_usage(db, date_from, date_to)
+    total_kwh = sum(energy_kwh(u.watt, u.seconds) for u in usage)
+
+    ELECTRICITY_PRICE = 7
+    RENT = 65000
+
+    expense_electricity = total_kwh * ELECTRICITY_PRICE
+
+    # смены — по дням включительно, как и раньше
+    rates = await get_pay_rates(db)
+    shift_rows = (await db.execute(
+        shift_counts_query(date_from.date(), date_to.date() + timedelta(days=1))
+    )).all()
+
+    salaries = sum(n for _, _, n in shift_rows) * rates.pay_per_shift
+    taxes = salaries * rates.tax_rate
+
+    total_expenses = RENT + salaries + taxes + expense_electricity
+    profit = income - total_expenses
+
+    return FinanceReportOut(
+        date_from=date_from,
+        date_to=date_to,
+        income=income,
+        expense_rent=RENT,
+        expense_salaries=salaries,
+        expense_taxes=taxes,
+        expense_electricity=round(expense_electricity, 2),
+        total_expenses=round(total_expenses, 2),
+        profit=round(profit, 2),
+        income_by_day=[
+            RevenueDayRow(day=d, income=float(v[0]), payments=v[1])
+            for d, v in sorted(by_day.items())
+        ],
+        income_by_method=[
+            RevenueMethodRow(method=m, income=float(v[0]), payments=v[1])
+            for m, v in sorted(by_method.items())
+        ],
+        payments_by_status=[
+            PaymentStatusRow(status=st, amount=float(v[0]), payments=v[1])
+            for st, v in sorted(by_status.items())
+        ],
+    )
+
+
+def occupancy_query(date_from: datetime, date_to: datetime):
+    """Колоночная выборка для sweep-line: зона, мощность, начало/конец (NULL — активна)."""
+    return (
+        select(Machine.zone, Machine.watt, Session.started_at, Session.ended_at)
+        .join(Machine, Machine.id == Session.machine_id)
+        .where(
+            Session.started_at < date_to,
+            or_(Session.ended_at.is_(None), Session.ended_at > date_from),
+        )
+    )
+
+
+async def build_occupancy_report(
+    db: AsyncSession,
+    date_from: datetime,
+    date_to: datetime,
+    tz: str = "UTC",
+) -> OccupancyReportOut:
+    start, end = as_utc(date_from), as_utc(date_to)
+    now = datetime.now(timezone.utc)
+
+    rows = (await db.execute(occupancy_query(start, end))).all()
+    machines_per_zone = {
+        zone.value: n
+        for zone, n in (await db.execute(
+            select(Machine.zone, func.count()).group_by(Machine.zone)
+        )).all()
+    }
+
+    result = sweep_occupancy(
+        (
+            (zone.value, watt, as_utc(started), as_utc(ended) if ended else now)
+            for zone, watt, started, ended in rows
+        ),
+        machines_per_zone,
+        start,
+        end,
+        ZoneInfo(tz),
+    )
+
+    cells = []
+    for zone in sorted(result.zones.values(), key=lambda z: z.zone):
+        for how in range(HOURS_PER_WEEK):
+            period_sec = result.hour_seconds[how]
+            if not period_sec:
+                continue
+            avg_busy = zone.busy_seconds[how] / period_sec
+            cells.append(OccupancyCell(
+                zone=zone.zone,
+                weekday=how // 24,
+                hour=how % 24,
+                avg_busy=round(avg_busy, 3),
+                occupancy=round(avg_busy / zone.machines, 4) if zone.machines else 0.0,
+            ))
+
+    return OccupancyReportOut(
+        date_from=date_from,
+        date_to=date_to,
+        tz=tz,
+        cells=cells,
+        zones=[
+            ZonePeakRow(
+                zone=z.zone,
+                machines=z.machines,
+                max_concurrent=z.max_concurrent,
+                max_concurrent_at=z.max_concurrent_at,
+            )
+            for z in sorted(result.zones.values(), key=lambda z: z.zone)
+        ],
+        max_concurrent=result.max_concurrent,
+        max_concurrent_at=result.max_concurrent_at,
+        peak_kw=round(result.peak_watt / 1000, 3),
+        peak_kw_at=result.peak_watt_at,
+    )
+
+
+# ================= XLSX TABLES =================
+@dataclass
+class ReportTable:
+    """Отчёт в табличном виде для выгрузки в xlsx."""
+    title: str
+    filename: str
+    headers: list[str]
+    rows: list[list]
+
+
+def power_table(report: PowerReportOut) -> ReportTable:
+    rows = [
+        [r.machine_id, r.machine_name, r.watt, r.hours_used, r.kwh_used]
+        for r in report.rows
+    ]
+    rows.append([None, "TOTAL", None, report.total_kwh, report.total_cost])
+    return ReportTable(
+        title="PowerReport",
+        filename=f"power_report_{report.date_from.date()}_{report.date_to.date()}.xlsx",
+        headers=["Machine ID", "Machine Name", "Watt", "Hours Used", "kWh Used"],
+        rows=rows,
+    )
+
+
+def salaries_table(report: SalariesReportOut) -> ReportTable:
+    rows = [
+        [r.employee_id, r.full_name, r.shifts, r.pay_per_shift, r.total_salary, r.taxes]
+        for r in report.rows
+    ]
+    rows.append([None, "TOTAL", None, None, report.total_salary, report.total_taxes])
+    return ReportTable(
+        title="SalariesReport",
+        filename=f"salaries_report_{report.month}.xlsx",
+        headers=["Employee ID", "Full Name", "Shifts", "Pay per shift", "Total salary", "Taxes"],
+        rows=rows,
+    )
+
+
+def finance_table(report: FinanceReportOut) -> ReportTable:
+    rows = [
+        ["date_from", str(report.date_from)],
+        ["date_to", str(report.date_to)],
+        ["income", report.income],
+        ["expense_rent", report.expense_rent],
+        ["expense_salaries", report.expense_salaries],
+        ["expense_taxes", report.expense_taxes],
+        ["expense_electricity", report.expense_electricity],
+        ["total_expenses", report.total_expenses],
+        ["profit", report.profit],
+    ]
+    rows += [[f"income {r.day.isoformat()}", r.income] for r in report.income_by_day]
+    rows += [[f"income {r.method}", r.income] for r in report.income_by_method]
+    return ReportTable(
+        title="FinanceReport",
+        filename=f"finance_report_{report.date_from.date()}_{report.date_to.date()}.xlsx",
+        headers=["Metric", "Value"],
+        rows=rows,
+    )
+
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def occupancy_table(report: OccupancyReportOut) -> ReportTable:
+    """Тепловая карта: строка — зона и день недели, колонки — часы, значения — загрузка в %."""
+    grid: dict[tuple[str, int], list] = {}
+    for c in report.cells:
+        row = grid.setdefault((c.zone, c.weekday), [None] * 24)
+        row[c.hour] = round(c.occupancy * 100, 1)
+
+    rows = [
+        [zone, WEEKDAYS[weekday], *hours]
+        for (zone, weekday), hours in sorted(grid.items())
+    ]
+    for z in report.zones:
+        rows.append(["MAX CONCURRENT", z.zone, z.max_concurrent, str(z.max_concurrent_at or "")])
+    rows.append(["MAX CONCURRENT", "ALL", report.max_concurrent, str(report.max_concurrent_at or "")])
+    rows.append(["PEAK kW", "ALL", report.peak_kw, str(report.peak_kw_at or "")])
+
+    return ReportTable(
+        title="OccupancyReport",
+        filename=f"occupancy_report_{report.date_from.date()}_{report.date_to.date()}.xlsx",
+        headers=["Zone", "Weekday", *[f"{h:02d}" for h in range(24)]],
+        rows=rows,
+    )
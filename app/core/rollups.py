@@ -0,0 +1,215 @@
+"""
+Суточные агрегаты для отчётов (daily_machine_usage, daily_revenue).
+
+Обновляются в той же транзакции, что и исходная запись (завершение сессии,
+автозакрытие, создание/смена статуса платежа), поэтому отчёты за целые сутки
+читают готовые строки вместо сканирования sessions/payments.
+
+Пересборка из истории:
+    python -m app.core.rollups backfill [--from 2025-01-01] [--to 2026-01-01]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.power import energy_kwh
+from app.db.session import async_session
+from app.models.payment import PaymentMethod, PaymentStatus
+from app.models.rollup import DailyMachineUsage, DailyRevenue
+
+
+# изменения «выручки сегодня» на дашборде: (created_at, amount), применяются после коммита
+RevenueDeltas = list[tuple[datetime, Decimal]]
+
+
+def as_utc(dt: datetime) -> datetime:
+    """Naive datetime считаем UTC (так их пишет datetime.utcnow в моделях)."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def day_start(d: date) -> datetime:
+    return datetime.combine(d, time.min, tzinfo=timezone.utc)
+
+
+def split_by_day(start: datetime, end: datetime) -> list[tuple[date, float]]:
+    """Разбивает интервал на куски по суткам UTC: [(день, секунды), ...]."""
+    start, end = as_utc(start), as_utc(end)
+    parts = []
+    cur = start
+    while cur < end:
+        next_day = day_start(cur.date() + timedelta(days=1))
+        part_end = min(end, next_day)
+        parts.append((cur.date(), (part_end - cur).total_seconds()))
+        cur = part_end
+    return parts
+
+
+async def add_session_usage(
+    db: AsyncSession,
+    *,
+    machine_id: int,
+    watt: int,
+    started_at: datetime,
+    ended_at: datetime,
+    sign: int = 1,
+) -> None:
+    """
+    Добавляет наработку завершённой сессии в daily_machine_usage.
+    sign=-1 — вычесть (при удалении сессии). Коммит за вызывающим кодом.
+    """
+    rows = [
+        {
+            "day": d,
+            "machine_id": machine_id,
+            "seconds": sign * sec,
+            "kwh": sign * energy_kwh(watt, sec),
+        }
+        for d, sec in split_by_day(started_at, ended_at)
+    ]
+    if not rows:
+        return
+
+    stmt = pg_insert(DailyMachineUsage).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyMachineUsage.day, DailyMachineUsage.machine_id],
+        set_={
+            "seconds": DailyMachineUsage.seconds + stmt.excluded.seconds,
+            "kwh": DailyMachineUsage.kwh + stmt.excluded.kwh,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def add_revenue(
+    db: AsyncSession,
+    entries: Iterable[tuple[datetime, PaymentMethod, PaymentStatus, Decimal, int]],
+) -> RevenueDeltas:
+    """
+    Добавляет платежи в daily_revenue: (created_at, method, status, amount, count).
+    Отрицательные amount/count вычитают. Все записи сливаются в один upsert.
+
+    Возвращает изменения успешной выручки [(created_at, amount)] — вызывающий код
+    передаёт их в dashboard.revenue_apply после коммита.
+    """
+    acc: dict[tuple, list] = defaultdict(lambda: [Decimal("0.00"), 0])
+    succeeded: RevenueDeltas = []
+    for created_at, method, status, amount, count in entries:
+        bucket = acc[(as_utc(created_at).date(), method, status)]
+        bucket[0] += Decimal(amount)
+        bucket[1] += count
+        if status == PaymentStatus.succeeded:
+            succeeded.append((created_at, Decimal(amount)))
+
+    rows = [
+        {"day": d, "method": m, "status": st, "amount": v[0], "payments": v[1]}
+        for (d, m, st), v in acc.items()
+    ]
+    if not rows:
+        return succeeded
+
+    stmt = pg_insert(DailyRevenue).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyRevenue.day, DailyRevenue.method, DailyRevenue.status],
+        set_={
+            "amount": DailyRevenue.amount + stmt.excluded.amount,
+            "payments": DailyRevenue.payments + stmt.excluded.payments,
+        },
+    )
+    await db.execute(stmt)
+    return succeeded
+
+
+async def add_payment(db: AsyncSession, payment) -> RevenueDeltas:
+    """Учитывает новый платёж."""
+    return await add_revenue(db, [(payment.created_at, payment.method, payment.status, payment.amount, 1)])
+
+
+async def move_payment(db: AsyncSession, payment, old_status: PaymentStatus) -> RevenueDeltas:
+    """Переносит платёж из корзины old_status в текущий статус."""
+    if old_status == payment.status:
+        return []
+    return await add_revenue(db, [
+        (payment.created_at, payment.method, old_status, -payment.amount, -1),
+        (payment.created_at, payment.method, payment.status, payment.amount, 1),
+    ])
+
+
+# ================= BACKFILL =================
+_USAGE_BACKFILL_SQL = """
+-- всё в timestamp по UTC: границы суток и шаг '1 day' не зависят от TimeZone сессии БД
+INSERT INTO daily_machine_usage (day, machine_id, seconds, kwh)
+SELECT d::date,
+       s.machine_id,
+       sum(extract(epoch FROM least(s.ended_at AT TIME ZONE 'UTC', d + interval '1 day')
+                              - greatest(s.started_at AT TIME ZONE 'UTC', d))),
+       sum(extract(epoch FROM least(s.ended_at AT TIME ZONE 'UTC', d + interval '1 day')
+                              - greatest(s.started_at AT TIME ZONE 'UTC', d)))
+           * m.watt / 3600000.0
+FROM sessions s
+JOIN machines m ON m.id = s.machine_id
+CROSS JOIN LATERAL generate_series(
+    date_trunc('day', s.started_at AT TIME ZONE 'UTC'),
+    s.ended_at AT TIME ZONE 'UTC',
+    interval '1 day'
+) d
+WHERE s.ended_at IS NOT NULL
+  AND s.ended_at AT TIME ZONE 'UTC' > d
+  AND d AT TIME ZONE 'UTC' >= :day_from AND d AT TIME ZONE 'UTC' < :day_to
+GROUP BY 1, 2, m.watt
+"""
+
+_REVENUE_BACKFILL_SQL = """
+INSERT INTO daily_revenue (day, method, status, amount, payments)
+SELECT (created_at AT TIME ZONE 'UTC')::date, method, status, sum(amount), count(*)
+FROM payments
+WHERE created_at >= :day_from AND created_at < :day_to
+GROUP BY 1, 2, 3
+"""
+
+
+async def backfill(db: AsyncSession, day_from: date | None = None, day_to: date | None = None) -> None:
+    """
+    Пересобирает агрегаты за дни [day_from, day_to) из sessions/payments
+    (по умолчанию — за всю историю). Выполняется одной транзакцией.
+    """
+    day_from = day_from or date(1970, 1, 1)
+    day_to = day_to or datetime.now(timezone.utc).date() + timedelta(days=2)
+    params = {"day_from": day_start(day_from), "day_to": day_start(day_to)}
+
+    await db.execute(delete(DailyMachineUsage).where(
+        DailyMachineUsage.day >= day_from, DailyMachineUsage.day < day_to,
+    ))
+    await db.execute(delete(DailyRevenue).where(
+        DailyRevenue.day >= day_from, DailyRevenue.day < day_to,
+    ))
+    await db.execute(text(_USAGE_BACKFILL_SQL), params)
+    await db.execute(text(_REVENUE_BACKFILL_SQL), params)
+    await db.commit()
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.core.rollups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bf = sub.add_parser("backfill", help="rebuild daily rollups from sessions/payments")
+    bf.add_argument("--from", dest="day_from", type=date.fromisoformat, default=None)
+    bf.add_argument("--to", dest="day_to", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    async with async_session() as db:
+        await backfill(db, args.day_from, args.day_to)
+    print("Rollups rebuilt")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
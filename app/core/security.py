@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 import bcrypt
@@ -29,3 +31,20 @@ def decode_token(token: str, secret_key: str) -> dict | None:
         return jwt.decode(token, secret_key, algorithms=["HS256"])
     except JWTError:
         return None
+
+def _machine_signature(machine_id: int, secret_key: str) -> str:
+    msg = f"machine:{machine_id}".encode("utf-8")
+    return hmac.new(secret_key.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+
+def create_machine_token(machine_id: int, secret_key: str) -> str:
+    """Бессрочный токен агента ПК: «<machine_id>.<hmac>». Проверяется без запросов к БД."""
+    return f"{machine_id}.{_machine_signature(machine_id, secret_key)}"
+
+def decode_machine_token(token: str, secret_key: str) -> int | None:
+    machine_id, _, signature = token.partition(".")
+    # isdigit() пропускает и не-ASCII цифры («²»), на которых int() падает
+    if not (machine_id.isascii() and machine_id.isdigit()) or not signature:
+        return None
+    if not hmac.compare_digest(signature, _machine_signature(int(machine_id), secret_key)):
+        return None
+    return int(machine_id)
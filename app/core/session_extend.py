@@ -1,6 +1,9 @@
-from datetime import timedelta
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Integer, bindparam, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dashboard import dashboard
+from app.core.kiosk import kiosk
+from app.core.timeline import invalidate_timeline
 from app.models.session_model import Session
 
 
@@ -23,4 +26,39 @@ async def extend_active_session(
     session.auto_end_at += timedelta(minutes=add_minutes)
 
     await db.commit()
+    dashboard.session_extended(session.id, session.auto_end_at)
+    kiosk.session_extended(session.machine_id, session.auto_end_at)
+    invalidate_timeline(datetime.now(timezone.utc), session.auto_end_at)
     return session
+
+
+async def extend_active_sessions_bulk(
+    db: AsyncSession,
+    minutes_by_user: dict[int, int],
+) -> None:
+    """
+    Продлевает активные сессии сразу нескольких пользователей одним executemany.
+    Коммит остаётся за вызывающим кодом.
+    """
+    if not minutes_by_user:
+        return
+
+    t = Session.__table__
+    stmt = (
+        update(t)
+        .where(
+            t.c.user_id == bindparam("b_user_id"),
+            t.c.ended_at.is_(None),
+            t.c.auto_end_at.is_not(None),
+        )
+        .values(
+            paid_minutes=t.c.paid_minutes + bindparam("b_minutes", type_=Integer),
+            auto_end_at=t.c.auto_end_at
+            + func.make_interval(0, 0, 0, 0, 0, bindparam("b_minutes", type_=Integer)),
+        )
+    )
+    await db.execute(
+        stmt,
+        [{"b_user_id": uid, "b_minutes": minutes} for uid, minutes in minutes_by_user.items()],
+    )
+    dashboard.sessions_extended_by_user(minutes_by_user)
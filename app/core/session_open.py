@@ -0,0 +1,117 @@
+"""
+Открытие игровой сессии: общие проверки и запись для /sessions/start
+и для check-in по брони. Коммит — за вызывающим кодом, после него —
+session_opened() для счётчиков в памяти.
+
+ПК нельзя занять, если на время сессии он забронирован другим клиентом
+(свои брони клиента не мешают — так работает check-in) или придержан
+очередью ожидания для другого клиента (до принятия или истечения предложения).
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.assign import free_index
+from app.core.availability import window_range
+from app.core.dashboard import dashboard
+from app.core.kiosk import kiosk
+from app.core.timeline import invalidate_timeline
+from app.core.waitlist import waitlist
+from app.models.booking import Booking, BookingStatus
+from app.models.machine import Machine, MachineStatus as MachineStatusEnum
+from app.models.session_model import Session
+from app.models.user import User
+
+
+class SessionStartError(Exception):
+    def __init__(self, status_code: int, detail: str, machine_conflict: bool = False):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        # причина в самом ПК — при автоподборе можно попробовать следующий
+        self.machine_conflict = machine_conflict
+
+
+async def open_session(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    machine_id: int,
+    hours: int,
+    now: datetime,
+) -> tuple[Session, Machine]:
+    # 0) Проверяем существование пользователя
+    user_exists = (await db.execute(select(exists().where(User.id == user_id)))).scalar()
+    if not user_exists:
+        raise SessionStartError(404, "User not found")
+
+    # 1) Запрет: у пользователя уже есть активная сессия
+    active_user = (await db.execute(
+        select(exists().where(Session.user_id == user_id, Session.ended_at.is_(None)))
+    )).scalar()
+    if active_user:
+        raise SessionStartError(409, "User already has an active session")
+
+    # 2) Запрет: на ПК уже есть активная сессия
+    active_machine = (await db.execute(
+        select(exists().where(Session.machine_id == machine_id, Session.ended_at.is_(None)))
+    )).scalar()
+    if active_machine:
+        raise SessionStartError(409, "Machine already has an active session", machine_conflict=True)
+
+    # 3) Проверяем машину (блокируем строку до конца транзакции)
+    machine = (await db.execute(
+        select(Machine).where(Machine.id == machine_id).with_for_update()
+    )).scalar_one_or_none()
+    if not machine:
+        raise SessionStartError(404, "Machine not found")
+
+    if machine.status != MachineStatusEnum.available:
+        raise SessionStartError(400, "Machine is not available", machine_conflict=True)
+
+    # 4) На время сессии ПК не забронирован другим клиентом (GiST-индекс during)
+    paid_minutes = hours * 60
+    booked = (await db.execute(
+        select(exists().where(
+            Booking.machine_id == machine_id,
+            Booking.status == BookingStatus.active,
+            Booking.user_id != user_id,
+            Booking.during.op("&&")(window_range(now, now + timedelta(minutes=paid_minutes))),
+        ))
+    )).scalar()
+    if booked:
+        raise SessionStartError(409, "Machine is booked within the session time", machine_conflict=True)
+
+    # 5) ПК не придержан очередью ожидания для другого клиента
+    holder = waitlist.held_for(machine_id)
+    if holder is not None and holder != user_id:
+        raise SessionStartError(409, "Machine is held for a waitlist offer", machine_conflict=True)
+
+    # 6) Создаём сессию и помечаем машину занятой
+    machine.status = MachineStatusEnum.busy
+
+    s = Session(
+        user_id=user_id,
+        machine_id=machine_id,
+        started_at=now,
+        ended_at=None,
+        paid_minutes=paid_minutes,
+        auto_end_at=now + timedelta(minutes=paid_minutes),
+        billed_minutes=None,
+        amount=Decimal("0.00"),
+    )
+    db.add(s)
+    return s, machine
+
+
+def session_opened(s: Session, machine: Machine) -> None:
+    """Обновление кешей и счётчиков после коммита."""
+    dashboard.session_started(s.id, s.user_id, s.auto_end_at)
+    dashboard.machine_status(machine.id, machine.status)
+    free_index.machine_status(machine.id, machine.status)
+    kiosk.session_started(machine.id, s.id, s.user_id, s.started_at, s.auto_end_at, machine.status)
+    invalidate_timeline(s.started_at, s.auto_end_at)
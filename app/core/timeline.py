@@ -0,0 +1,142 @@
+"""
+Сетка занятости ПК за сутки для календаря броней.
+
+Для каждого ПК — битовая маска слотов (бит i = слот i занят бронью или сессией).
+Маски строятся из двух диапазонных запросов (брони по GiST-индексу during,
+сессии по started_at/ended_at) и кешируются по дню; записи, меняющие брони
+и сессии, сбрасывают затронутые дни через invalidate_timeline().
+"""
+from __future__ import annotations
+
+import base64
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.availability import window_range
+from app.core.config import settings
+from app.core.report_cache import ReportCache
+from app.core.rollups import as_utc
+from app.models.booking import Booking, BookingStatus
+from app.models.machine import Machine
+from app.models.session_model import Session
+from app.schemas.booking import MachineTimelineRow, TimelineOut
+
+TIMELINE = "timeline"
+
+# «до бесконечности» для сброса всех будущих дней (продление сессии и т.п.)
+FAR_FUTURE = datetime(9999, 1, 1, tzinfo=timezone.utc)
+
+timeline_cache = ReportCache(
+    closed_ttl=settings.report_cache_closed_ttl,
+    open_ttl=settings.timeline_cache_ttl,
+    max_entries=settings.report_cache_max_entries,
+)
+
+
+def invalidate_timeline(start: datetime, end: datetime | None = None) -> None:
+    timeline_cache.invalidate(start, end)
+
+
+def day_bounds(day: date, tz: str) -> tuple[datetime, datetime]:
+    zone = ZoneInfo(tz)
+    start = datetime.combine(day, time.min, tzinfo=zone)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=zone)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def _set_bits(
+    mask: int,
+    start: datetime,
+    end: datetime,
+    day_start: datetime,
+    slot_seconds: int,
+    slots: int,
+) -> int:
+    """Помечает занятыми все слоты, которые интервал [start, end) задевает хотя бы частично."""
+    lo = max(0, math.floor((start - day_start).total_seconds() / slot_seconds))
+    hi = min(slots, math.ceil((end - day_start).total_seconds() / slot_seconds))
+    if hi <= lo:
+        return mask
+    return mask | (((1 << (hi - lo)) - 1) << lo)
+
+
+async def build_timeline(
+    db: AsyncSession,
+    day: date,
+    slot_minutes: int,
+    tz: str = "UTC",
+) -> TimelineOut:
+    day_start, day_end = day_bounds(day, tz)
+    slot_seconds = slot_minutes * 60
+    # в дни перехода на летнее/зимнее время сутки не 24 часа
+    slots = math.ceil((day_end - day_start).total_seconds() / slot_seconds)
+    now = datetime.now(timezone.utc)
+
+    machines = (await db.execute(
+        select(Machine.id, Machine.name, Machine.zone, Machine.status).order_by(Machine.id)
+    )).all()
+
+    bookings = (await db.execute(
+        select(Booking.machine_id, Booking.start_at, Booking.end_at).where(
+            Booking.status == BookingStatus.active,
+            Booking.during.op("&&")(window_range(day_start, day_end)),
+        )
+    )).all()
+
+    # завершённые — по ix_sessions_ended_at_covering (ended_at > day_start)
+    ended = (await db.execute(
+        select(Session.machine_id, Session.started_at, Session.ended_at).where(
+            Session.ended_at.is_not(None),
+            Session.ended_at > day_start,
+            Session.started_at < day_end,
+        )
+    )).all()
+    # открытые — по ix_sessions_open_machine; ПК занят до auto_end_at (без него — до конца суток)
+    open_sessions = (await db.execute(
+        select(Session.machine_id, Session.started_at, Session.auto_end_at).where(
+            Session.ended_at.is_(None),
+            Session.started_at < day_end,
+            or_(Session.auto_end_at.is_(None), Session.auto_end_at > day_start),
+        )
+    )).all()
+    sessions = [*ended, *open_sessions]
+
+    masks: dict[int, int] = {}
+    for machine_id, start, end in [*bookings, *sessions]:
+        end = as_utc(end) if end is not None else max(day_end, now)
+        masks[machine_id] = _set_bits(
+            masks.get(machine_id, 0), as_utc(start), end, day_start, slot_seconds, slots,
+        )
+
+    nbytes = (slots + 7) // 8
+    return TimelineOut(
+        day=day,
+        tz=tz,
+        slot_minutes=slot_minutes,
+        slots=slots,
+        day_start=day_start,
+        machines=[
+            MachineTimelineRow(
+                machine_id=mid,
+                name=name,
+                zone=zone.value,
+                status=status.value,
+                busy=base64.b64encode(masks.get(mid, 0).to_bytes(nbytes, "little")).decode(),
+            )
+            for mid, name, zone, status in machines
+        ],
+    )
+
+
+async def get_timeline(db: AsyncSession, day: date, slot_minutes: int, tz: str = "UTC") -> TimelineOut:
+    key = timeline_cache.key(TIMELINE, day=day, slot_minutes=slot_minutes, tz=tz)
+    result = timeline_cache.get(key)
+    if result is None:
+        result = await build_timeline(db, day, slot_minutes, tz)
+        day_start, day_end = day_bounds(day, tz)
+        timeline_cache.set(key, result, day_start, day_end)
+    return result
@@ -0,0 +1,321 @@
+"""
+Очередь ожидания ПК по зонам.
+
+Записи хранятся в waitlist_entries, а рабочая копия очереди — в памяти:
+по зоне список (-priority, id) живых записей waiting. Когда в зоне освобождается
+ПК (stop_session, автозакрытие, смена статуса ПК), пути записи будят
+waitlist_offer_loop, и он предлагает ПК первому подходящему клиенту: запись
+переходит в offered, ПК придерживается до offer_expires_at, событие
+waitlist.offer уходит через push-канал (app.core.events). Свободные ПК берутся
+из индекса автоподбора (app.core.assign), поэтому цикл ходит в БД только
+когда действительно делает или снимает предложение.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.assign import free_index
+from app.core.config import settings
+from app.core.events import events
+from app.db.session import async_session
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
+
+OPEN_STATUSES = (WaitlistStatus.waiting, WaitlistStatus.offered)
+
+
+def _value(v) -> str:
+    return getattr(v, "value", v)
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+@dataclass
+class WaitEntry:
+    id: int
+    user_id: int
+    zone: str
+    hours: int
+    priority: int
+    status: str
+    machine_id: int | None
+    offer_expires_at: datetime | None
+    created_at: datetime
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return (-self.priority, self.id)
+
+    @classmethod
+    def from_row(cls, row: WaitlistEntry) -> "WaitEntry":
+        return cls(
+            id=row.id,
+            user_id=row.user_id,
+            zone=_value(row.zone),
+            hours=row.hours,
+            priority=row.priority,
+            status=_value(row.status),
+            machine_id=row.machine_id,
+            offer_expires_at=_utc(row.offer_expires_at),
+            created_at=_utc(row.created_at),
+        )
+
+
+class WaitlistQueues:
+    def __init__(self) -> None:
+        self._entries: dict[int, WaitEntry] = {}           # id -> живая запись (waiting/offered)
+        self._queues: dict[str, list[tuple[int, int]]] = {}  # zone -> [(-priority, id)] для waiting
+        self._held: dict[int, int] = {}                     # machine_id -> id предложения
+        self._wakeups: asyncio.Queue[str] = asyncio.Queue()
+        self.loaded = False
+
+    # ---------- память ----------
+    def _enqueue(self, entry: WaitEntry) -> None:
+        entry.status = WaitlistStatus.waiting.value
+        entry.machine_id = None
+        entry.offer_expires_at = None
+        self._entries[entry.id] = entry
+        bisect.insort(self._queues.setdefault(entry.zone, []), entry.sort_key)
+
+    def _unqueue(self, entry: WaitEntry) -> None:
+        queue = self._queues.get(entry.zone, [])
+        i = bisect.bisect_left(queue, entry.sort_key)
+        if i < len(queue) and queue[i] == entry.sort_key:
+            del queue[i]
+        if not queue:
+            self._queues.pop(entry.zone, None)
+
+    def _offer(self, entry: WaitEntry, machine_id: int, expires_at: datetime) -> None:
+        self._unqueue(entry)
+        entry.status = WaitlistStatus.offered.value
+        entry.machine_id = machine_id
+        entry.offer_expires_at = expires_at
+        self._held[machine_id] = entry.id
+
+    def _discard(self, entry_id: int) -> WaitEntry | None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        if entry.status == WaitlistStatus.waiting.value:
+            self._unqueue(entry)
+        elif entry.machine_id is not None and self._held.get(entry.machine_id) == entry.id:
+            del self._held[entry.machine_id]
+        return entry
+
+    def _publish(self, event: str, entry: WaitEntry, status: str | None = None) -> None:
+        data = self.as_dict(entry)
+        if status is not None:
+            data["status"] = status
+        events.publish(event, data, user_id=entry.user_id)
+
+    # ---------- чтение ----------
+    def get(self, entry_id: int) -> WaitEntry | None:
+        return self._entries.get(entry_id)
+
+    def held_machines(self) -> set[int]:
+        return set(self._held)
+
+    def held_for(self, machine_id: int) -> int | None:
+        """Клиент, которому сейчас предложен ПК из очереди (None — ПК не придержан)."""
+        entry_id = self._held.get(machine_id)
+        entry = self._entries.get(entry_id) if entry_id is not None else None
+        return entry.user_id if entry is not None else None
+
+    def position(self, entry: WaitEntry) -> int | None:
+        """Место в очереди зоны, с 1; у предложенных записей — None."""
+        if entry.status != WaitlistStatus.waiting.value:
+            return None
+        return bisect.bisect_left(self._queues.get(entry.zone, []), entry.sort_key) + 1
+
+    def as_dict(self, entry: WaitEntry) -> dict:
+        return {
+            "id": entry.id,
+            "user_id": entry.user_id,
+            "zone": entry.zone,
+            "hours": entry.hours,
+            "priority": entry.priority,
+            "status": entry.status,
+            "machine_id": entry.machine_id,
+            "offer_expires_at": entry.offer_expires_at,
+            "created_at": entry.created_at,
+            "position": self.position(entry),
+        }
+
+    def snapshot(self, zone=None) -> list[dict]:
+        """Живые записи: по зонам, сначала предложения, затем очередь по порядку."""
+        zone = _value(zone) if zone is not None else None
+        entries = [e for e in self._entries.values() if zone is None or e.zone == zone]
+        entries.sort(key=lambda e: (e.zone, e.status != WaitlistStatus.offered.value, e.sort_key))
+        return [self.as_dict(e) for e in entries]
+
+    # ---------- хуки путей записи (после коммита) ----------
+    def poke(self, zone) -> None:
+        self._wakeups.put_nowait(_value(zone))
+
+    def machine_freed(self, machine_id: int, zone) -> None:
+        self.poke(zone)
+
+    def entry_added(self, row: WaitlistEntry) -> None:
+        entry = WaitEntry.from_row(row)
+        self._enqueue(entry)
+        self._publish("waitlist.update", entry)
+        self.poke(entry.zone)
+
+    def entry_closed(self, entry_id: int, status) -> None:
+        entry = self._discard(entry_id)
+        if entry is None:
+            return
+        self._publish("waitlist.update", entry, status=_value(status))
+        if entry.status == WaitlistStatus.offered.value and _value(status) != WaitlistStatus.accepted.value:
+            # придержанный ПК снова свободен для следующего в очереди
+            self.poke(entry.zone)
+
+    def entry_requeued(self, entry_id: int) -> None:
+        """Предложение не сработало (ПК заняли в обход очереди) — клиент снова ждёт на своём месте."""
+        entry = self._discard(entry_id)
+        if entry is None:
+            return
+        self._enqueue(entry)
+        self._publish("waitlist.update", entry)
+        self.poke(entry.zone)
+
+    # ---------- цикл предложений ----------
+    async def wait_for_work(self, timeout: float) -> set[str]:
+        """Зоны, где что-то освободилось; по таймауту — все зоны с очередью (страховка от пропущенных хуков)."""
+        if not self.loaded:
+            return set()
+        try:
+            zones = {await asyncio.wait_for(self._wakeups.get(), timeout)}
+        except asyncio.TimeoutError:
+            zones = set(self._queues)
+        while not self._wakeups.empty():
+            zones.add(self._wakeups.get_nowait())
+        return zones
+
+    async def load(self, db: AsyncSession) -> None:
+        rows = (await db.execute(
+            select(WaitlistEntry).where(WaitlistEntry.status.in_(OPEN_STATUSES)).order_by(WaitlistEntry.id)
+        )).scalars().all()
+
+        self._entries, self._queues, self._held = {}, {}, {}
+        for row in rows:
+            entry = WaitEntry.from_row(row)
+            if entry.status == WaitlistStatus.offered.value and entry.machine_id is not None:
+                self._entries[entry.id] = entry
+                self._held[entry.machine_id] = entry.id
+            else:
+                self._enqueue(entry)
+        self.loaded = True
+
+    async def expire_offers(self, db: AsyncSession) -> set[str]:
+        now = datetime.now(timezone.utc)
+        due = [
+            e.id for e in self._entries.values()
+            if e.status == WaitlistStatus.offered.value and e.offer_expires_at and e.offer_expires_at <= now
+        ]
+        if not due:
+            return set()
+
+        # только реально истёкшие: параллельный accept мог уже перевести запись в accepted
+        expired = (await db.execute(
+            update(WaitlistEntry)
+            .where(WaitlistEntry.id.in_(due), WaitlistEntry.status == WaitlistStatus.offered)
+            .values(status=WaitlistStatus.expired)
+            .returning(WaitlistEntry.id)
+            .execution_options(synchronize_session=False)
+        )).scalars().all()
+        await db.commit()
+
+        zones = set()
+        for entry_id in expired:
+            entry = self._discard(entry_id)
+            if entry is not None:
+                zones.add(entry.zone)
+                self._publish("waitlist.update", entry, status=WaitlistStatus.expired.value)
+        return zones
+
+    async def dispatch(self, db: AsyncSession, zone: str) -> int:
+        """Предлагает свободные ПК зоны ожидающим по порядку очереди. Возвращает число предложений."""
+        queue = self._queues.get(zone)
+        if not queue:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        held = self.held_machines()
+        offered = 0
+        for _, entry_id in list(queue):
+            entry = self._entries.get(entry_id)
+            if entry is None or entry.status != WaitlistStatus.waiting.value:
+                continue
+            free = [
+                mid for mid in free_index.candidates(zone, now, now + timedelta(hours=entry.hours))
+                if mid not in held
+            ]
+            if not free:
+                # клиенту нужно больше времени, чем есть, — следующий может поместиться
+                continue
+
+            machine_id = free[0]
+            expires_at = now + timedelta(seconds=settings.waitlist_offer_ttl)
+            row = (await db.execute(
+                update(WaitlistEntry)
+                .where(WaitlistEntry.id == entry_id, WaitlistEntry.status == WaitlistStatus.waiting)
+                .values(
+                    status=WaitlistStatus.offered,
+                    machine_id=machine_id,
+                    offered_at=now,
+                    offer_expires_at=expires_at,
+                )
+                .returning(WaitlistEntry.id)
+                .execution_options(synchronize_session=False)
+            )).first()
+            await db.commit()
+
+            if row is None:
+                # запись закрыли в обход памяти
+                self._discard(entry_id)
+                continue
+            if self._entries.get(entry_id) is not entry:
+                # пока шёл коммит, запись закрыли через API — хук уже отработал
+                continue
+
+            self._offer(entry, machine_id, expires_at)
+            held.add(machine_id)
+            offered += 1
+            self._publish("waitlist.offer", entry)
+        return offered
+
+    async def run_once(self, db: AsyncSession, zones: set[str]) -> None:
+        if not self.loaded:
+            await self.load(db)
+            zones = set(self._queues)
+        zones |= await self.expire_offers(db)
+        for zone in zones:
+            await self.dispatch(db, zone)
+
+
+waitlist = WaitlistQueues()
+
+
+async def waitlist_offer_loop() -> None:
+    """
+    Фоновый цикл предложений ПК из очереди ожидания.
+    Запускается при старте приложения (первый проход загружает очередь из БД).
+    """
+    while True:
+        zones = await waitlist.wait_for_work(settings.waitlist_check_interval)
+        try:
+            async with async_session() as db:
+                await waitlist.run_once(db, zones)
+        except Exception:
+            # защищаем фоновую задачу от падения
+            await asyncio.sleep(settings.waitlist_check_interval)
@@ -0,0 +1,168 @@
+"""
+Локальный фейковый платёжный провайдер для нагрузочного тестирования
+онлайн-оплаты без внешних сервисов.
+
+Запуск:
+    uvicorn app.fake_provider.main:app --port 9000
+
+Поведение настраивается переменными окружения:
+    FAKE_PROVIDER_LATENCY_MS        средняя задержка ответа (по умолчанию 50)
+    FAKE_PROVIDER_JITTER_MS         разброс задержки (по умолчанию 25)
+    FAKE_PROVIDER_ERROR_RATE        доля ответов 503 (0..1)
+    FAKE_PROVIDER_HANG_RATE         доля запросов, которые «зависают» на 30 секунд
+    FAKE_PROVIDER_SUCCESS_RATE      доля платежей, завершающихся успехом (остальные failed)
+    FAKE_PROVIDER_WEBHOOK_DELAY_S   через сколько секунд прислать webhook
+    FAKE_PROVIDER_WEBHOOK_DROP_RATE доля платежей, по которым webhook не придёт вовсе
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException
+from pydantic import BaseModel
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+LATENCY_MS = _env_float("FAKE_PROVIDER_LATENCY_MS", 50)
+JITTER_MS = _env_float("FAKE_PROVIDER_JITTER_MS", 25)
+ERROR_RATE = _env_float("FAKE_PROVIDER_ERROR_RATE", 0.0)
+HANG_RATE = _env_float("FAKE_PROVIDER_HANG_RATE", 0.0)
+SUCCESS_RATE = _env_float("FAKE_PROVIDER_SUCCESS_RATE", 0.9)
+WEBHOOK_DELAY_S = _env_float("FAKE_PROVIDER_WEBHOOK_DELAY_S", 2.0)
+WEBHOOK_DROP_RATE = _env_float("FAKE_PROVIDER_WEBHOOK_DROP_RATE", 0.0)
+
+
+class ProviderPaymentIn(BaseModel):
+    payment_id: int
+    amount: str
+    callback_url: str | None = None
+
+
+class StatusBatchIn(BaseModel):
+    ids: list[str]
+
+
+# provider_payment_id -> платёж
+_payments: dict[str, dict] = {}
+# Idempotency-Key -> provider_payment_id
+_idempotency: dict[str, str] = {}
+
+_http: httpx.AsyncClient | None = None
+# ссылки на отложенные вебхуки: иначе задачу может собрать GC до отправки
+_tasks: set[asyncio.Task] = set()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    global _http
+    _http = httpx.AsyncClient(timeout=5.0)
+    try:
+        yield
+    finally:
+        await _http.aclose()
+
+
+app = FastAPI(title="Fake payment provider", lifespan=lifespan)
+
+
+async def _simulate_network() -> None:
+    if HANG_RATE and random.random() < HANG_RATE:
+        await asyncio.sleep(30)
+    delay = max(0.0, random.gauss(LATENCY_MS, JITTER_MS)) / 1000
+    await asyncio.sleep(delay)
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        raise HTTPException(status_code=503, detail="Simulated provider failure")
+
+
+async def _complete_later(provider_payment_id: str) -> None:
+    await asyncio.sleep(WEBHOOK_DELAY_S)
+
+    p = _payments[provider_payment_id]
+    p["status"] = "succeeded" if random.random() < SUCCESS_RATE else "failed"
+
+    if not p["callback_url"] or random.random() < WEBHOOK_DROP_RATE:
+        return
+
+    assert _http is not None
+    for attempt in range(3):
+        try:
+            resp = await _http.post(
+                p["callback_url"],
+                json={
+                    "payment_id": p["payment_id"],
+                    "provider_payment_id": provider_payment_id,
+                    "status": p["status"],
+                },
+            )
+            if resp.status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(2 ** attempt)
+
+
+@app.post("/payments")
+async def create_payment(
+    payload: ProviderPaymentIn,
+    idempotency_key: str | None = Header(default=None),
+):
+    await _simulate_network()
+
+    if idempotency_key and idempotency_key in _idempotency:
+        existing = _payments[_idempotency[idempotency_key]]
+        return {"provider_payment_id": existing["id"], "payment_url": existing["payment_url"]}
+
+    provider_payment_id = str(uuid4())
+    payment = {
+        "id": provider_payment_id,
+        "payment_id": payload.payment_id,
+        "amount": payload.amount,
+        "status": "pending",
+        "callback_url": payload.callback_url,
+        "payment_url": f"http://fake-payments.local/pay/{provider_payment_id}",
+    }
+    _payments[provider_payment_id] = payment
+    if idempotency_key:
+        _idempotency[idempotency_key] = provider_payment_id
+
+    task = asyncio.create_task(_complete_later(provider_payment_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+    return {"provider_payment_id": provider_payment_id, "payment_url": payment["payment_url"]}
+
+
+@app.get("/payments/{provider_payment_id}")
+async def get_payment(provider_payment_id: str):
+    await _simulate_network()
+
+    p = _payments.get(provider_payment_id)
+    if not p:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return {"provider_payment_id": p["id"], "payment_id": p["payment_id"], "status": p["status"]}
+
+
+@app.post("/payments/status")
+async def get_payment_statuses(payload: StatusBatchIn):
+    await _simulate_network()
+
+    return {
+        "statuses": {
+            pid: _payments[pid]["status"]
+            for pid in payload.ids
+            if pid in _payments
+        }
+    }
+
+
+@app.get("/health")
+async def health():
+    return {"ok": True, "payments": len(_payments)}
@@ -1,12 +1,18 @@
 import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
 
-from app.db.session import engine, Base
-from app.api.routes import auth, machines, bookings, sessions, health, payments, reports, audit_logs, users
+from app.api.routes import auth, machines, bookings, sessions, health, payments, reports, report_jobs, audit_logs, users, dashboard, settings, waitlist, events, kiosk
+from app.core.assign import free_index_refresh_loop
 from app.core.auto_close import auto_close_loop
-from app.models import audit_log  # noqa: F401
+from app.core.booking_sweeper import booking_sweeper_loop
+from app.core.dashboard import dashboard_refresh_loop
+from app.core.heartbeat import heartbeat_flush_loop
+from app.core.payment_provider import close_provider_client
+from app.core.power_ingest import flush_power_buffer, power_flush_loop
+from app.core.reconcile import reconcile_payments_loop
+from app.core.report_jobs import report_jobs_cleanup_loop, shutdown_pool
+from app.core.waitlist import waitlist_offer_loop
 
 app = FastAPI(title="PC Club CRM API", version="0.1.0")
 
@@ -27,21 +33,55 @@ app.include_router(bookings.router)
 app.include_router(sessions.router)
 app.include_router(payments.router)
 app.include_router(reports.router)
+app.include_router(report_jobs.router)
 app.include_router(audit_logs.router)
 app.include_router(users.router)
+app.include_router(dashboard.router)
+app.include_router(settings.router)
+app.include_router(waitlist.router)
+app.include_router(events.router)
+app.include_router(kiosk.router)
 
 @app.on_event("startup")
 async def on_startup():
-    # Create tables automatically for dev/demo
-    # Обрабатываем ошибки подключения, чтобы приложение могло запуститься
-    try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-    except Exception as e:
-        # Логируем ошибку, но не блокируем запуск приложения
-        print(f"Warning: Could not create tables on startup: {e}")
-        print("Tables will be created when database is available")
+    # Схема БД не создаётся при старте: миграции применяются отдельным шагом
+    # (alembic upgrade head), поэтому здесь нет ни DDL, ни рефлексии таблиц.
 
     # Start background auto-close loop
     asyncio.create_task(auto_close_loop())
 
+    # Start background reconciliation of stale pending payments
+    asyncio.create_task(reconcile_payments_loop())
+
+    # Start background cleanup of expired report job results
+    asyncio.create_task(report_jobs_cleanup_loop())
+
+    # Start background reconciliation of dashboard counters (first pass fills them)
+    asyncio.create_task(dashboard_refresh_loop())
+
+    # Start background reconciliation of the machine auto-assign index (first pass fills it)
+    asyncio.create_task(free_index_refresh_loop())
+
+    # Start background expiry of no-show and past bookings
+    asyncio.create_task(booking_sweeper_loop())
+
+    # Start background seat offers for the per-zone waitlist (first pass loads the queue)
+    asyncio.create_task(waitlist_offer_loop())
+
+    # Start background flush of machine heartbeats and offline detection
+    asyncio.create_task(heartbeat_flush_loop())
+
+    # Start background flush of buffered machine power samples
+    asyncio.create_task(power_flush_loop())
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Закрываем пул соединений к платёжному провайдеру
+    await close_provider_client()
+
+    # Останавливаем пул процессов фоновых отчётов
+    shutdown_pool()
+
+    # Дописываем в БД замеры мощности, оставшиеся в буфере
+    await flush_power_buffer()
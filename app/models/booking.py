@@ -3,7 +3,8 @@ from __future__ import annotations
 import enum
 from datetime import datetime
 
-from sqlalchemy import Enum, ForeignKey, DateTime, String
+from sqlalchemy import Computed, Enum, ForeignKey, DateTime, Index, Integer, Sequence, String, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, Range, TSTZRANGE
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
@@ -12,10 +13,42 @@ from app.db.session import Base
 class BookingStatus(str, enum.Enum):
     active = "active"
     cancelled = "cancelled"
+    checked_in = "checked_in"   # клиент пришёл, по брони открыта сессия
+    no_show = "no_show"         # не пришёл за BOOKING_NO_SHOW_GRACE минут после начала
+    expired = "expired"         # время брони прошло
+
+
+# номер серии броней, созданных одним запросом /bookings/bulk
+booking_series_seq = Sequence("booking_series_id_seq")
 
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # фоновая чистка: активные брони, у которых прошло начало/конец
+        Index("ix_bookings_active_start", "start_at", postgresql_where=text("status = 'active'")),
+        Index("ix_bookings_active_end", "end_at", postgresql_where=text("status = 'active'")),
+        Index("ix_bookings_series_id", "series_id", postgresql_where=text("series_id IS NOT NULL")),
+        # пересечения активных броней запрещает сама БД (GiST + btree_gist),
+        # поэтому create_booking — один INSERT без предварительных SELECT и без гонок
+        ExcludeConstraint(
+            ("machine_id", "="),
+            ("during", "&&"),
+            name="ex_bookings_machine_overlap",
+            using="gist",
+            where=text("status = 'active'"),
+        ),
+        # брони одной серии (POST /bookings/bulk) могут пересекаться по пользователю:
+        # одиночные сравниваются по -id, т.е. всегда «разные»
+        ExcludeConstraint(
+            ("user_id", "="),
+            ("during", "&&"),
+            (text("coalesce(series_id, -id)"), "<>"),
+            name="ex_bookings_user_overlap",
+            using="gist",
+            where=text("status = 'active'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
 
@@ -25,8 +58,16 @@ class Booking(Base):
     start_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     end_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
+    # [start_at, end_at) — вычисляется БД, только для ограничений и поиска пересечений
+    during: Mapped[Range[datetime]] = mapped_column(
+        TSTZRANGE,
+        Computed("tstzrange(start_at, end_at, '[)')", persisted=True),
+    )
+
     note: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
+    series_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
     status: Mapped[BookingStatus] = mapped_column(
         Enum(BookingStatus),
         default=BookingStatus.active,
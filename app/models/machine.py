@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import Enum as SAEnum, Integer, String
+from sqlalchemy import Boolean, DateTime, Enum as SAEnum, Integer, String, false
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
@@ -42,3 +43,8 @@ class Machine(Base):
     )
 
     watt: Mapped[int] = mapped_column(Integer, nullable=False, default=450)
+
+    # последний heartbeat клиента на ПК (пишется пачками, см. app.core.heartbeat)
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # offline выставлен по пропавшему heartbeat, а не оператором — вернётся сам
+    auto_offline: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
@@ -4,7 +4,7 @@ import enum
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Numeric, String
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Numeric, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
@@ -24,6 +24,28 @@ class PaymentStatus(str, enum.Enum):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # частичный индекс: только незавершённые платежи (их единицы),
+        # по нему работает сверка зависших платежей без скана всей таблицы
+        Index(
+            "ix_payments_open",
+            "id",
+            postgresql_where=text("status IN ('created', 'pending')"),
+        ),
+        # finance_report: диапазон по created_at + сумма/статус/метод без обращения к таблице
+        Index(
+            "ix_payments_created_at_covering",
+            "created_at",
+            postgresql_include=["status", "method", "amount"],
+        ),
+        # баланс в /auth/me: WHERE user_id = ? AND status = 'succeeded', SUM(amount)
+        Index(
+            "ix_payments_user_status",
+            "user_id",
+            "status",
+            postgresql_include=["amount"],
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True,
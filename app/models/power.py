@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+class PowerSample(Base):
+    """
+    Замер потребления ПК от клиента-агента. Сырые точки хранятся
+    POWER_RAW_RETENTION_DAYS дней, отчёты читают power_minutes.
+
+    Без внешнего ключа на machines: вставка идёт пачками по тысячам строк,
+    machine_id берётся из проверенного токена ПК.
+    """
+
+    __tablename__ = "power_samples"
+    __table_args__ = (
+        # таблица только дописывается по времени — BRIN по ts крошечный и хватает для очистки
+        Index("ix_power_samples_ts_brin", "ts", postgresql_using="brin"),
+    )
+
+    machine_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    watts: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+
+
+class PowerMinute(Base):
+    """Замеры ПК, свёрнутые по минутам: средняя мощность = watts_sum / samples."""
+
+    __tablename__ = "power_minutes"
+    __table_args__ = (
+        Index("ix_power_minutes_minute_brin", "minute", postgresql_using="brin"),
+    )
+
+    machine_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    minute: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    watts_sum: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    watts_max: Mapped[int] = mapped_column(SmallInteger, nullable=False)
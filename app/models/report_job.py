@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import enum
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Enum, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+class ReportJobStatus(str, enum.Enum):
+    queued = "queued"       # ждёт свободного воркера
+    running = "running"     # считается в пуле процессов
+    succeeded = "succeeded" # результат лежит на диске
+    failed = "failed"       # ошибка / прерван перезапуском
+
+
+class ReportJob(Base):
+    """Фоновое построение отчёта/выгрузки. Результат — файл в REPORT_JOBS_DIR."""
+
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        # лимит активных задач пользователя и список «мои задачи»
+        Index("ix_report_jobs_user_status", "user_id", "status"),
+    )
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+
+    report: Mapped[str] = mapped_column(String(32), nullable=False)
+    format: Mapped[str] = mapped_column(String(8), nullable=False)
+    params: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+    status: Mapped[ReportJobStatus] = mapped_column(
+        Enum(ReportJobStatus),
+        nullable=False,
+        default=ReportJobStatus.queued,
+    )
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+
+    result_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    result_filename: Mapped[str | None] = mapped_column(String(128), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # процесс API, который поставил задачу в свой пул, и его последняя отметка «жив»
+    worker_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, Enum, Float, ForeignKey, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+from app.models.payment import PaymentMethod, PaymentStatus
+
+
+class DailyMachineUsage(Base):
+    """Наработка ПК за сутки (UTC): секунды завершённых сессий и kWh по паспортной мощности."""
+
+    __tablename__ = "daily_machine_usage"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    machine_id: Mapped[int] = mapped_column(ForeignKey("machines.id"), primary_key=True)
+
+    seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    kwh: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class DailyRevenue(Base):
+    """Сумма и количество платежей за сутки (UTC) по способу оплаты и статусу."""
+
+    __tablename__ = "daily_revenue"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    method: Mapped[PaymentMethod] = mapped_column(Enum(PaymentMethod), primary_key=True)
+    status: Mapped[PaymentStatus] = mapped_column(Enum(PaymentStatus), primary_key=True)
+
+    amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=Decimal("0.00"))
+    payments: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
@@ -11,6 +11,36 @@ from app.db.session import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # отчёты по энергии/финансам: завершённые сессии, пересекающие [date_from, date_to]
+        # (started_at < date_to AND ended_at > date_from) — по одному индексу на каждую границу
+        Index(
+            "ix_sessions_ended_at_covering",
+            "ended_at",
+            postgresql_include=["started_at", "machine_id"],
+            postgresql_where=text("ended_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_sessions_started_at_covering",
+            "started_at",
+            postgresql_include=["ended_at", "machine_id"],
+            postgresql_where=text("ended_at IS NOT NULL"),
+        ),
+        # баланс в /auth/me: SUM(amount) завершённых сессий пользователя
+        Index(
+            "ix_sessions_user_ended",
+            "user_id",
+            postgresql_include=["amount"],
+            postgresql_where=text("ended_at IS NOT NULL"),
+        ),
+        # поиск свободных ПК: открытая сессия на машине и когда она закончится
+        Index(
+            "ix_sessions_open_machine",
+            "machine_id",
+            postgresql_include=["auto_end_at"],
+            postgresql_where=text("ended_at IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
 
@@ -1,5 +1,5 @@
 from datetime import date
-from sqlalchemy import Date, ForeignKey
+from sqlalchemy import Date, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
@@ -7,6 +7,10 @@ from app.db.session import Base
 
 class Shift(Base):
     __tablename__ = "shifts"
+    __table_args__ = (
+        # подсчёт смен по сотрудникам за период — index-only scan без отдельной сводной таблицы
+        Index("ix_shifts_date_employee", "shift_date", "employee_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     employee_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), nullable=False)
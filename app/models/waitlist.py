@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import enum
+from datetime import datetime
+
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+from app.models.machine import Zone
+
+
+class WaitlistStatus(str, enum.Enum):
+    waiting = "waiting"       # в очереди зоны
+    offered = "offered"       # освободившийся ПК придержан за клиентом до offer_expires_at
+    accepted = "accepted"     # клиент сел, открыта сессия session_id
+    expired = "expired"       # не подошёл за WAITLIST_OFFER_TTL секунд
+    cancelled = "cancelled"
+
+
+class WaitlistEntry(Base):
+    """Очередь клиентов на ПК зоны. Рабочая копия очереди — в памяти (app.core.waitlist)."""
+
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        # один клиент — одна живая запись; заодно загрузка очереди при старте
+        Index(
+            "ux_waitlist_entries_user_open",
+            "user_id",
+            unique=True,
+            postgresql_where=text("status IN ('waiting', 'offered')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    zone: Mapped[Zone] = mapped_column(Enum(Zone, name="machine_zone"), nullable=False)
+    hours: Mapped[int] = mapped_column(Integer, nullable=False)
+    # больше — раньше; при равенстве — по порядку записи (id)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    note: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    status: Mapped[WaitlistStatus] = mapped_column(
+        Enum(WaitlistStatus),
+        nullable=False,
+        default=WaitlistStatus.waiting,
+    )
+
+    machine_id: Mapped[int | None] = mapped_column(ForeignKey("machines.id"), nullable=True)
+    offered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    offer_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    session_id: Mapped[int | None] = mapped_column(ForeignKey("sessions.id"), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+    )
@@ -1,20 +1,21 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
+from typing import Literal
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 
 
 class BookingStatus(str, Enum):
     active = "active"
     cancelled = "cancelled"
+    checked_in = "checked_in"
+    no_show = "no_show"
+    expired = "expired"
 
 
-class BookingCreate(BaseModel):
-    user_id: int
-    machine_id: int
+class BookingWindow(BaseModel):
     start_at: datetime
     end_at: datetime
-    note: str | None = None
 
     @field_validator("start_at")
     @classmethod
@@ -36,6 +37,52 @@ class BookingCreate(BaseModel):
         return end_at
 
 
+class BookingCreate(BookingWindow):
+    user_id: int
+    machine_id: int
+    note: str | None = None
+
+
+class BookingRecurrence(BaseModel):
+    freq: Literal["daily", "weekly"]
+    interval: int = Field(default=1, ge=1, le=52)
+    count: int | None = Field(default=None, ge=1)
+    until: datetime | None = None
+    # 0 = понедельник; для weekly, по умолчанию — день недели start_at
+    byweekday: list[int] | None = None
+    # IANA-зона клуба: повторения идут по местным часам и не сдвигаются при переходе
+    # на летнее/зимнее время; обязательна, если start_at задан со смещением не UTC
+    tz: str | None = None
+
+    @field_validator("byweekday")
+    @classmethod
+    def validate_byweekday(cls, byweekday: list[int] | None):
+        if byweekday is not None and (not byweekday or any(d < 0 or d > 6 for d in byweekday)):
+            raise ValueError("byweekday must contain days 0..6")
+        return byweekday
+
+
+class BookingBulkCreate(BookingWindow):
+    """start_at/end_at — первое повторение; без recurrence — одно на каждый ПК."""
+    user_id: int
+    machine_ids: list[int] = Field(min_length=1, max_length=50)
+    recurrence: BookingRecurrence | None = None
+    # all_or_nothing: при любом пересечении ничего не создаётся (409);
+    # best_effort: создаются свободные повторения, остальные — в conflicts
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+    note: str | None = None
+
+
+class BookingConflict(BaseModel):
+    machine_id: int
+    start_at: datetime
+    end_at: datetime
+    # machine / user — пересечение с бронью booking_id;
+    # concurrent — место заняли параллельной записью между проверкой и INSERT
+    reason: Literal["machine", "user", "concurrent"]
+    booking_id: int | None = None
+
+
 class BookingOut(BaseModel):
     id: int
     user_id: int
@@ -44,11 +91,42 @@ class BookingOut(BaseModel):
     end_at: datetime
     note: str | None
     status: BookingStatus
+    series_id: int | None = None
 
     class Config:
         from_attributes = True
 
 
+class BookingBulkOut(BaseModel):
+    series_id: int
+    requested: int
+    created: list[BookingOut]
+    conflicts: list[BookingConflict]
+
+
+class BookingCheckInIn(BaseModel):
+    # по умолчанию — оставшееся время брони, округлённое вверх до часа
+    hours: int | None = Field(default=None, ge=1, le=24)
+
+
 class BookingCancelOut(BaseModel):
     id: int
     status: str
+
+
+class MachineTimelineRow(BaseModel):
+    machine_id: int
+    name: str
+    zone: str
+    status: str
+    # base64 битовой маски слотов, little-endian: бит i (байт i // 8, бит i % 8) = слот i занят
+    busy: str
+
+
+class TimelineOut(BaseModel):
+    day: date
+    tz: str
+    slot_minutes: int
+    slots: int
+    day_start: datetime
+    machines: list[MachineTimelineRow]
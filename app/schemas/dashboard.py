@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+from app.schemas.booking import BookingOut
+from app.schemas.session import SessionOut
+
+
+class MachineCountsOut(BaseModel):
+    total: int
+    available: int
+    busy: int
+    offline: int
+
+
+class ZoneMachinesOut(MachineCountsOut):
+    zone: str
+
+
+class DashboardSummaryOut(BaseModel):
+    machines: MachineCountsOut
+    machines_by_zone: list[ZoneMachinesOut]
+
+    active_sessions: int
+    # активные сессии, у которых auto_end_at наступит в ближайшие ending_within_minutes
+    ending_soon: int
+    ending_within_minutes: int
+
+    # успешные платежи за текущие сутки (UTC)
+    revenue_day: date
+    revenue_today: float
+
+    # когда счётчики последний раз сверялись с БД
+    refreshed_at: datetime | None
+
+
+class SessionsDayOut(BaseModel):
+    day: date
+    sessions: int
+
+
+class DashboardActivityOut(BaseModel):
+    """Списки для дашборда — ограниченные выборки вместо полных /bookings и /sessions."""
+    tz: str
+    # активные брони, начинающиеся сегодня (по tz)
+    bookings_today: int
+    upcoming_bookings: list[BookingOut]
+    active_sessions: list[SessionOut]
+    # запущенные сессии по дням (tz), последние days дней включая сегодня
+    sessions_by_day: list[SessionsDayOut]
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class KioskStateOut(BaseModel):
+    machine_id: int
+    # передаётся обратно в ?version=, чтобы дождаться следующего изменения
+    version: int
+    status: str
+    session_id: int | None
+    started_at: datetime | None
+    auto_end_at: datetime | None
+    remaining_seconds: int | None
+    server_time: datetime
+
+
+class MachineAgentTokenOut(BaseModel):
+    machine_id: int
+    token: str
+
+
+class HeartbeatOut(BaseModel):
+    server_time: datetime
+    # сколько секунд без heartbeat ПК считается offline — клиенту слать чаще
+    offline_after: int
+    # замеры мощности слать не реже чем раз в столько секунд — больший пробел
+    # «измеренный» отчёт считает выключенным ПК
+    power_sample_hold: int
+
+
+class PowerSampleIn(BaseModel):
+    ts: datetime
+    watts: int = Field(ge=0, le=32767)
+
+
+class PowerBatchIn(BaseModel):
+    """
+    Замеры — мгновенная мощность; отчёт держит каждое значение до следующего
+    замера, но не дольше POWER_SAMPLE_HOLD секунд (см. HeartbeatOut.power_sample_hold).
+    """
+    # до часа посекундных замеров одним запросом
+    samples: list[PowerSampleIn] = Field(min_length=1, max_length=3600)
+
+
+class PowerIngestOut(BaseModel):
+    accepted: int
+    # слишком старые (старше хранения сырых точек) или из будущего
+    dropped: int
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+MAX_IMPORT_MACHINES = 1000
 
 
 class Zone(str, Enum):
@@ -28,12 +33,66 @@ class MachineStatusPatch(BaseModel):
     status: MachineStatus
 
 
+class MachineImportIn(BaseModel):
+    machines: list[MachineCreate] = Field(min_length=1, max_length=MAX_IMPORT_MACHINES)
+    # all_or_nothing: при любом конфликте ничего не создаётся (409);
+    # best_effort: создаются остальные ПК, конфликтные — в conflicts
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+
+class MachineImportConflict(BaseModel):
+    # номер строки во входных данных с 1 (в CSV — без заголовка)
+    row: int
+    name: str | None
+    # exists — ПК с таким именем уже есть; duplicate — имя повторяется в импорте;
+    # invalid — строка CSV не прошла проверку
+    reason: Literal["exists", "duplicate", "invalid"]
+    detail: str | None = None
+
+
+class MachineBulkStatusPatch(BaseModel):
+    """Новый статус для ПК по фильтру: зона и/или список id (хотя бы одно)."""
+    status: MachineStatus
+    zone: Zone | None = None
+    ids: list[int] | None = Field(default=None, min_length=1, max_length=MAX_IMPORT_MACHINES)
+
+    @model_validator(mode="after")
+    def _check_filter(self):
+        if self.zone is None and self.ids is None:
+            raise ValueError("zone or ids is required")
+        return self
+
+
 class MachineOut(BaseModel):
     id: int
     name: str
     zone: Zone
     status: MachineStatus
     watt: int
+    last_seen_at: datetime | None = None
 
     class Config:
         from_attributes = True
+
+
+class MachineAvailabilityOut(BaseModel):
+    """Свободные на весь интервал ПК (по возрастанию id)."""
+    zone: Zone | None
+    start_at: datetime
+    end_at: datetime
+    requested: int
+    enough: bool
+    machines: list[MachineOut]
+
+
+class MachineImportOut(BaseModel):
+    requested: int
+    created: list[MachineOut]
+    conflicts: list[MachineImportConflict]
+
+
+class MachineBulkStatusOut(BaseModel):
+    updated: int
+    machines: list[MachineOut]
+    # заняты (busy или открытая сессия) — статус не менялся
+    skipped_ids: list[int] = []
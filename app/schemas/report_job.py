@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Literal
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.schemas.reports import PowerSource
+
+
+class ReportJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class ReportJobCreate(BaseModel):
+    """
+    Что построить: отчёт и формат результата.
+    power/finance/occupancy — нужен период, salaries — месяц 'YYYY-MM'.
+    """
+    report: Literal["power", "salaries", "finance", "occupancy"]
+    format: Literal["json", "xlsx"] = "json"
+
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    month: str | None = Field(default=None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$")
+    price_per_kwh: float = Field(default=7.0, ge=0.0)
+    power_source: PowerSource = "nameplate"
+    tz: str = "UTC"
+
+    @model_validator(mode="after")
+    def _check_params(self):
+        if self.report == "salaries":
+            if self.month is None:
+                raise ValueError("month is required for salaries report")
+        elif self.date_from is None or self.date_to is None:
+            raise ValueError("date_from and date_to are required")
+        elif self.date_from >= self.date_to:
+            raise ValueError("date_from must be before date_to")
+        try:
+            ZoneInfo(self.tz)
+        except Exception:
+            raise ValueError(f"unknown timezone: {self.tz}")
+        return self
+
+
+class ReportJobOut(BaseModel):
+    id: str
+    user_id: int
+    report: str
+    format: str
+    params: dict
+
+    status: ReportJobStatus
+    progress: int
+    error: str | None
+
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -11,10 +13,15 @@ class PowerRow(BaseModel):
     kwh_used: float
 
 
+# nameplate — часы сессий × паспортная мощность ПК, measured — замеры клиентов на ПК
+PowerSource = Literal["nameplate", "measured"]
+
+
 class PowerReportOut(BaseModel):
     date_from: datetime
     date_to: datetime
     price_per_kwh: float
+    source: PowerSource = "nameplate"
     rows: list[PowerRow]
     total_kwh: float
     total_cost: float
@@ -38,6 +45,24 @@ class SalariesReportOut(BaseModel):
 
 
 # ---------- FINANCE ----------
+class RevenueDayRow(BaseModel):
+    day: date
+    income: float
+    payments: int
+
+
+class RevenueMethodRow(BaseModel):
+    method: str
+    income: float
+    payments: int
+
+
+class PaymentStatusRow(BaseModel):
+    status: str
+    amount: float
+    payments: int
+
+
 class FinanceReportOut(BaseModel):
     date_from: datetime
     date_to: datetime
@@ -51,3 +76,39 @@ class FinanceReportOut(BaseModel):
 
     total_expenses: float
     profit: float
+
+    # выручка (только succeeded) по дням и способам оплаты
+    income_by_day: list[RevenueDayRow] = []
+    income_by_method: list[RevenueMethodRow] = []
+    # все платежи периода по статусам (включая pending/failed)
+    payments_by_status: list[PaymentStatusRow] = []
+
+
+# ---------- OCCUPANCY ----------
+class OccupancyCell(BaseModel):
+    zone: str
+    weekday: int            # 0 = понедельник
+    hour: int               # 0..23, в часовом поясе отчёта
+    avg_busy: float         # среднее число занятых ПК
+    occupancy: float        # доля занятых ПК зоны, 0..1
+
+
+class ZonePeakRow(BaseModel):
+    zone: str
+    machines: int
+    max_concurrent: int
+    max_concurrent_at: datetime | None
+
+
+class OccupancyReportOut(BaseModel):
+    date_from: datetime
+    date_to: datetime
+    tz: str
+
+    cells: list[OccupancyCell]
+    zones: list[ZonePeakRow]
+
+    max_concurrent: int
+    max_concurrent_at: datetime | None
+    peak_kw: float
+    peak_kw_at: datetime | None
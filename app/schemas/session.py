@@ -1,12 +1,22 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from app.schemas.machine import Zone
 
 
 class SessionStartIn(BaseModel):
     user_id: int
-    machine_id: int
+    # либо конкретный ПК, либо зона — тогда ПК подбирается автоматически (best-fit)
+    machine_id: int | None = None
+    zone: Zone | None = None
     hours: int = Field(ge=1, le=24)
 
+    @model_validator(mode="after")
+    def validate_target(self):
+        if (self.machine_id is None) == (self.zone is None):
+            raise ValueError("Exactly one of machine_id or zone is required")
+        return self
+
 
 class SessionExtendIn(BaseModel):
     add_hours: int = Field(ge=1, le=24)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class PayRatesOut(BaseModel):
+    pay_per_shift: float
+    tax_rate: float
+
+
+class PayRatesUpdate(BaseModel):
+    pay_per_shift: float | None = Field(default=None, ge=0)
+    tax_rate: float | None = Field(default=None, ge=0, le=1)
@@ -0,0 +1,40 @@
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+from app.schemas.machine import Zone
+
+
+class WaitlistStatus(str, Enum):
+    waiting = "waiting"
+    offered = "offered"
+    accepted = "accepted"
+    expired = "expired"
+    cancelled = "cancelled"
+
+
+class WaitlistJoinIn(BaseModel):
+    user_id: int
+    zone: Zone
+    hours: int = Field(ge=1, le=24)
+    # больше — раньше; задают только admin/operator
+    priority: int = Field(default=0, ge=-10, le=10)
+    note: str | None = Field(default=None, max_length=255)
+
+
+class WaitlistEntryOut(BaseModel):
+    id: int
+    user_id: int
+    zone: Zone
+    hours: int
+    priority: int
+    status: WaitlistStatus
+    machine_id: int | None
+    offer_expires_at: datetime | None
+    created_at: datetime
+    # место в очереди зоны (с 1); у предложений и закрытых записей — None
+    position: int | None = None
+
+    class Config:
+        from_attributes = True
@@ -1,8 +1,15 @@
-import apiClient from './client'
+import apiClient, { API_BASE_URL } from './client'
 import {
   Machine,
+  MachineAvailability,
   MachineCreate,
   MachineStatusPatch,
+  MachineImportIn,
+  MachineImportMode,
+  MachineImportOut,
+  MachineBulkStatusPatch,
+  MachineBulkStatusOut,
+  Zone,
   Booking,
   BookingCreate,
   Session,
@@ -15,9 +22,14 @@ import {
   OnlinePaymentCreateOut,
   FakeOnlinePaymentCreate,
   PowerReportOut,
+  PowerSource,
   SalariesReportOut,
   FinanceReportOut,
   AuditLog,
+  DashboardSummary,
+  DashboardActivity,
+  WaitlistEntry,
+  WaitlistJoin,
   User,
   UserCreate,
   UserProfile,
@@ -68,6 +80,35 @@ export const machineService = {
     )
     return response.data
   },
+  import: async (data: MachineImportIn): Promise<MachineImportOut> => {
+    const response = await apiClient.post<MachineImportOut>('/machines/import', data)
+    return response.data
+  },
+  importCsv: async (
+    csv: string,
+    mode: MachineImportMode = 'all_or_nothing'
+  ): Promise<MachineImportOut> => {
+    const response = await apiClient.post<MachineImportOut>('/machines/import.csv', csv, {
+      params: { mode },
+      headers: { 'Content-Type': 'text/csv' },
+    })
+    return response.data
+  },
+  updateStatusBulk: async (data: MachineBulkStatusPatch): Promise<MachineBulkStatusOut> => {
+    const response = await apiClient.patch<MachineBulkStatusOut>('/machines/status', data)
+    return response.data
+  },
+  availability: async (params: {
+    start_at: string
+    end_at: string
+    zone?: Zone
+    count?: number
+  }): Promise<MachineAvailability> => {
+    const response = await apiClient.get<MachineAvailability>('/machines/availability', {
+      params,
+    })
+    return response.data
+  },
 }
 
 // Bookings
@@ -162,13 +203,15 @@ export const reportService = {
   getPowerReport: async (
     dateFrom: string,
     dateTo: string,
-    pricePerKwh: number = 7.0
+    pricePerKwh: number = 7.0,
+    source: PowerSource = 'nameplate'
   ): Promise<PowerReportOut> => {
     const response = await apiClient.get<PowerReportOut>('/reports/power', {
       params: {
         date_from: dateFrom,
         date_to: dateTo,
         price_per_kwh: pricePerKwh,
+        source,
       },
     })
     return response.data
@@ -176,13 +219,15 @@ export const reportService = {
   exportPowerReport: async (
     dateFrom: string,
     dateTo: string,
-    pricePerKwh: number = 7.0
+    pricePerKwh: number = 7.0,
+    source: PowerSource = 'nameplate'
   ): Promise<Blob> => {
     const response = await apiClient.get('/reports/power.xlsx', {
       params: {
         date_from: dateFrom,
         date_to: dateTo,
         price_per_kwh: pricePerKwh,
+        source,
       },
       responseType: 'blob',
     })
@@ -255,3 +300,48 @@ export const userService = {
   },
 }
 
+// Dashboard
+export const dashboardService = {
+  getSummary: async (): Promise<DashboardSummary> => {
+    const response = await apiClient.get<DashboardSummary>('/dashboard/summary')
+    return response.data
+  },
+  getActivity: async (tz: string): Promise<DashboardActivity> => {
+    const response = await apiClient.get<DashboardActivity>('/dashboard/activity', {
+      params: { tz },
+    })
+    return response.data
+  },
+}
+
+// Waitlist
+export const waitlistService = {
+  list: async (zone?: Zone): Promise<WaitlistEntry[]> => {
+    const response = await apiClient.get<WaitlistEntry[]>('/waitlist', { params: { zone } })
+    return response.data
+  },
+  join: async (data: WaitlistJoin): Promise<WaitlistEntry> => {
+    const response = await apiClient.post<WaitlistEntry>('/waitlist', data)
+    return response.data
+  },
+  accept: async (id: number): Promise<Session> => {
+    const response = await apiClient.post<Session>(`/waitlist/${id}/accept`)
+    return response.data
+  },
+  cancel: async (id: number): Promise<WaitlistEntry> => {
+    const response = await apiClient.post<WaitlistEntry>(`/waitlist/${id}/cancel`)
+    return response.data
+  },
+}
+
+// Push events (SSE): waitlist.offer / waitlist.update
+export const eventsService = {
+  subscribe: (handlers: Record<string, (data: WaitlistEntry) => void>): EventSource => {
+    const token = localStorage.getItem('token') || ''
+    const source = new EventSource(`${API_BASE_URL}/events?token=${encodeURIComponent(token)}`)
+    Object.entries(handlers).forEach(([event, handler]) => {
+      source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)))
+    })
+    return source
+  },
+}
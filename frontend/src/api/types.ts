@@ -15,6 +15,9 @@ export enum MachineStatus {
 export enum BookingStatus {
   active = 'active',
   cancelled = 'cancelled',
+  checked_in = 'checked_in',
+  no_show = 'no_show',
+  expired = 'expired',
 }
 
 export interface Machine {
@@ -23,6 +26,16 @@ export interface Machine {
   zone: Zone
   status: MachineStatus
   watt: number
+  last_seen_at?: string | null
+}
+
+export interface MachineAvailability {
+  zone: Zone | null
+  start_at: string
+  end_at: string
+  requested: number
+  enough: boolean
+  machines: Machine[]
 }
 
 export interface MachineCreate {
@@ -35,6 +48,38 @@ export interface MachineStatusPatch {
   status: MachineStatus
 }
 
+export type MachineImportMode = 'all_or_nothing' | 'best_effort'
+
+export interface MachineImportIn {
+  machines: MachineCreate[]
+  mode?: MachineImportMode
+}
+
+export interface MachineImportConflict {
+  row: number
+  name: string | null
+  reason: 'exists' | 'duplicate' | 'invalid'
+  detail: string | null
+}
+
+export interface MachineImportOut {
+  requested: number
+  created: Machine[]
+  conflicts: MachineImportConflict[]
+}
+
+export interface MachineBulkStatusPatch {
+  status: MachineStatus
+  zone?: Zone
+  ids?: number[]
+}
+
+export interface MachineBulkStatusOut {
+  updated: number
+  machines: Machine[]
+  skipped_ids: number[]
+}
+
 export interface Booking {
   id: number
   user_id: number
@@ -67,7 +112,9 @@ export interface Session {
 
 export interface SessionStartIn {
   user_id: number
-  machine_id: number
+  // либо machine_id, либо zone (автоподбор ПК)
+  machine_id?: number
+  zone?: Zone
   hours: number
 }
 
@@ -167,10 +214,13 @@ export interface PowerRow {
   kwh_used: number
 }
 
+export type PowerSource = 'nameplate' | 'measured'
+
 export interface PowerReportOut {
   date_from: string
   date_to: string
   price_per_kwh: number
+  source: PowerSource
   rows: PowerRow[]
   total_kwh: number
   total_cost: number
@@ -192,6 +242,24 @@ export interface SalariesReportOut {
   total_taxes: number
 }
 
+export interface RevenueDayRow {
+  day: string
+  income: number
+  payments: number
+}
+
+export interface RevenueMethodRow {
+  method: string
+  income: number
+  payments: number
+}
+
+export interface PaymentStatusRow {
+  status: string
+  amount: number
+  payments: number
+}
+
 export interface FinanceReportOut {
   date_from: string
   date_to: string
@@ -202,6 +270,69 @@ export interface FinanceReportOut {
   expense_electricity: number
   total_expenses: number
   profit: number
+  income_by_day: RevenueDayRow[]
+  income_by_method: RevenueMethodRow[]
+  payments_by_status: PaymentStatusRow[]
+}
+
+// Dashboard
+export interface MachineCounts {
+  total: number
+  available: number
+  busy: number
+  offline: number
+}
+
+export interface ZoneMachines extends MachineCounts {
+  zone: string
+}
+
+export interface DashboardSummary {
+  machines: MachineCounts
+  machines_by_zone: ZoneMachines[]
+  active_sessions: number
+  ending_soon: number
+  ending_within_minutes: number
+  revenue_day: string
+  revenue_today: number
+  refreshed_at: string | null
+}
+
+export interface SessionsDay {
+  day: string
+  sessions: number
+}
+
+export interface DashboardActivity {
+  tz: string
+  bookings_today: number
+  upcoming_bookings: Booking[]
+  active_sessions: Session[]
+  sessions_by_day: SessionsDay[]
+}
+
+// Waitlist
+export type WaitlistStatus = 'waiting' | 'offered' | 'accepted' | 'expired' | 'cancelled'
+
+export interface WaitlistJoin {
+  user_id: number
+  zone: Zone
+  hours: number
+  priority?: number
+  note?: string | null
+}
+
+export interface WaitlistEntry {
+  id: number
+  user_id: number
+  zone: Zone
+  hours: number
+  priority: number
+  status: WaitlistStatus
+  machine_id: number | null
+  offer_expires_at: string | null
+  created_at: string
+  position: number | null
 }
 
 // Audit Logs
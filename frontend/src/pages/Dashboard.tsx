@@ -1,80 +1,56 @@
 import { useQuery } from '@tanstack/react-query'
-import { machineService, bookingService, sessionService } from '../api/services'
-import { MachineStatus, BookingStatus } from '../api/types'
+import { dashboardService } from '../api/services'
 import { PRICING } from '../constants'
 import LoadingSkeleton from '../components/LoadingSkeleton'
 import dayjs from 'dayjs'
 import './Dashboard.css'
 
 export default function Dashboard() {
-  const { data: machines = [], isLoading: machinesLoading } = useQuery({
-    queryKey: ['machines'],
-    queryFn: machineService.list,
+  // сводка считается на сервере по счётчикам в памяти — дешёво опрашивать часто
+  const { data: summary, isLoading: summaryLoading } = useQuery({
+    queryKey: ['dashboard-summary'],
+    queryFn: dashboardService.getSummary,
+    refetchInterval: 5000,
   })
 
-  const { data: bookings = [], isLoading: bookingsLoading } = useQuery({
-    queryKey: ['bookings'],
-    queryFn: bookingService.list,
+  // списки — ограниченные выборки на сервере, а не полные /bookings и /sessions
+  const tz = Intl.DateTimeFormat().resolvedOptions().timeZone || 'UTC'
+  const { data: activity, isLoading: activityLoading } = useQuery({
+    queryKey: ['dashboard-activity', tz],
+    queryFn: () => dashboardService.getActivity(tz),
+    refetchInterval: 30000,
   })
 
-  const { data: sessions = [], isLoading: sessionsLoading } = useQuery({
-    queryKey: ['sessions'],
-    queryFn: sessionService.list,
-  })
-
-  const isLoading = machinesLoading || bookingsLoading || sessionsLoading
+  const isLoading = summaryLoading || activityLoading
 
   // Статистика машин
-  const totalMachines = machines.length
-  const availableMachines = machines.filter((m) => m.status === MachineStatus.available).length
-  const busyMachines = machines.filter((m) => m.status === MachineStatus.busy).length
-  const offlineMachines = machines.filter((m) => m.status === MachineStatus.offline).length
+  const totalMachines = summary?.machines.total ?? 0
+  const availableMachines = summary?.machines.available ?? 0
+  const busyMachines = summary?.machines.busy ?? 0
+  const offlineMachines = summary?.machines.offline ?? 0
 
   // Бронирования на сегодня
-  const today = dayjs().startOf('day')
-  const todayBookings = bookings.filter((b) => {
-    const startDate = dayjs(b.start_at).startOf('day')
-    return startDate.isSame(today) && b.status === BookingStatus.active
-  })
+  const todayBookingsCount = activity?.bookings_today ?? 0
 
   // Ориентировочная выручка от бронирований (упрощенный расчет)
-  const estimatedRevenue = todayBookings.length * PRICING.HOUR_RATE
+  const estimatedRevenue = todayBookingsCount * PRICING.HOUR_RATE
 
   // Ближайшие бронирования
-  const upcomingBookings = bookings
-    .filter((b) => {
-      const startDate = dayjs(b.start_at)
-      return startDate.isAfter(dayjs()) && b.status === BookingStatus.active
-    })
-    .sort((a, b) => dayjs(a.start_at).diff(dayjs(b.start_at)))
-    .slice(0, 5)
+  const upcomingBookings = activity?.upcoming_bookings ?? []
 
   // Активные сессии
-  const activeSessions = sessions.filter((s) => !s.ended_at)
+  const activeSessions = activity?.active_sessions ?? []
 
   // Статистика по зонам
-  const machinesByZone = machines.reduce((acc, machine) => {
-    if (!acc[machine.zone]) {
-      acc[machine.zone] = { total: 0, available: 0, busy: 0, offline: 0 }
-    }
-    acc[machine.zone].total++
-    if (machine.status === MachineStatus.available) acc[machine.zone].available++
-    if (machine.status === MachineStatus.busy) acc[machine.zone].busy++
-    if (machine.status === MachineStatus.offline) acc[machine.zone].offline++
-    return acc
-  }, {} as Record<string, { total: number; available: number; busy: number; offline: number }>)
+  const machinesByZone = Object.fromEntries(
+    (summary?.machines_by_zone ?? []).map(({ zone, ...stats }) => [zone, stats])
+  )
 
   // Статистика по времени для сессий (последние 7 дней)
-  const last7Days = Array.from({ length: 7 }, (_, i) => {
-    const date = dayjs().subtract(6 - i, 'days')
-    return {
-      date: date.format('DD.MM'),
-      count: sessions.filter((s) => {
-        const sessionDate = dayjs(s.started_at)
-        return sessionDate.isSame(date, 'day')
-      }).length,
-    }
-  })
+  const last7Days = (activity?.sessions_by_day ?? []).map((d) => ({
+    date: dayjs(d.day).format('DD.MM'),
+    count: d.sessions,
+  }))
 
   return (
     <div className="dashboard-page">
@@ -125,10 +101,27 @@ export default function Dashboard() {
               </div>
             </div>
 
+            <div className="stats-grid">
+              <div className="stat-card">
+                <div className="stat-label">Активных сессий</div>
+                <div className="stat-value">{summary?.active_sessions ?? 0}</div>
+              </div>
+              <div className="stat-card warning">
+                <div className="stat-label">
+                  Заканчиваются в ближайшие {summary?.ending_within_minutes ?? 15} мин
+                </div>
+                <div className="stat-value">{summary?.ending_soon ?? 0}</div>
+              </div>
+              <div className="stat-card success">
+                <div className="stat-label">Выручка сегодня</div>
+                <div className="stat-value">{(summary?.revenue_today ?? 0).toFixed(2)} ₽</div>
+              </div>
+            </div>
+
             <div className="bookings-today">
               <h3 className="bookings-today-title">Брони на сегодня</h3>
               <div className="bookings-today-info">
-                Всего: {todayBookings.length}; ориентировочная выручка:{' '}
+                Всего: {todayBookingsCount}; ориентировочная выручка:{' '}
                 {estimatedRevenue.toFixed(2)} ₽
               </div>
             </div>
@@ -42,6 +42,14 @@ function translateMessage(message: string): string {
     'User already has an active session': 'У пользователя уже есть активная сессия.',
     'Machine already has an active session': 'На этой машине уже есть активная сессия.',
     'Machine is not available': 'Машина сейчас недоступна.',
+    'Machine is booked within the session time': 'На время сессии машина забронирована другим клиентом.',
+    'No free machine in zone': 'В этой зоне нет свободной машины на это время.',
+
+    // waitlist
+    'Waitlist entry not found': 'Запись в очереди не найдена.',
+    'User is already in the waitlist': 'Пользователь уже стоит в очереди.',
+    'Waitlist entry has no active offer': 'Для этой записи нет активного предложения машины.',
+    'Waitlist entry is not active': 'Запись в очереди уже закрыта.',
     'Session already ended': 'Сессия уже завершена.',
     'auto_end_at is not set': 'Ошибка сервера: не задано время авто-завершения.',
   }
@@ -0,0 +1,145 @@
+"""initial schema
+
+Схема в том виде, в котором её создавал Base.metadata.create_all при старте.
+Для уже существующей базы, созданной через create_all:
+    alembic stamp 0001 && alembic upgrade head
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+role = sa.Enum("admin", "operator", "user", name="role")
+machine_zone = sa.Enum("STANDART", "PREMIUM", "VIP", "SUPERVIP", "SOLO", name="machine_zone")
+machine_status = sa.Enum("available", "busy", "offline", name="machine_status")
+booking_status = sa.Enum("active", "cancelled", name="bookingstatus")
+payment_method = sa.Enum("cash", "online", name="paymentmethod")
+payment_status = sa.Enum("created", "pending", "succeeded", "failed", name="paymentstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("role", role, nullable=False),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "machines",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("zone", machine_zone, nullable=False),
+        sa.Column("status", machine_status, nullable=False),
+        sa.Column("watt", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_machines_id", "machines", ["id"])
+    op.create_index("ix_machines_name", "machines", ["name"], unique=True)
+
+    op.create_table(
+        "employees",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("full_name", sa.String(120), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+    )
+
+    op.create_table(
+        "shifts",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id"), nullable=False),
+        sa.Column("shift_date", sa.Date(), nullable=False),
+    )
+    op.create_index("ix_shifts_shift_date", "shifts", ["shift_date"])
+
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("machine_id", sa.Integer(), sa.ForeignKey("machines.id"), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("ended_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("paid_minutes", sa.Integer(), nullable=False),
+        sa.Column("auto_end_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("billed_minutes", sa.Integer(), nullable=True),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False),
+    )
+    op.create_index("ix_sessions_id", "sessions", ["id"])
+    op.create_index("ix_sessions_user_id", "sessions", ["user_id"])
+    op.create_index("ix_sessions_machine_id", "sessions", ["machine_id"])
+
+    op.create_table(
+        "bookings",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("machine_id", sa.Integer(), sa.ForeignKey("machines.id"), nullable=False),
+        sa.Column("start_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("note", sa.String(255), nullable=True),
+        sa.Column("status", booking_status, nullable=False),
+    )
+    op.create_index("ix_bookings_id", "bookings", ["id"])
+    op.create_index("ix_bookings_user_id", "bookings", ["user_id"])
+    op.create_index("ix_bookings_machine_id", "bookings", ["machine_id"])
+
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("sessions.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("method", payment_method, nullable=False),
+        sa.Column("status", payment_status, nullable=False),
+        sa.Column("hours", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("provider_payment_id", sa.String(128), nullable=True),
+        sa.Column("note", sa.String(255), nullable=True),
+    )
+    op.create_index("ix_payments_id", "payments", ["id"])
+    op.create_index("ix_payments_user_id", "payments", ["user_id"])
+    op.create_index("ix_payments_session_id", "payments", ["session_id"])
+    op.create_index("ix_payments_provider_payment_id", "payments", ["provider_payment_id"])
+
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("role", sa.String(30), nullable=False),
+        sa.Column("action", sa.String(60), nullable=False),
+        sa.Column("entity", sa.String(60), nullable=True),
+        sa.Column("entity_id", sa.Integer(), nullable=True),
+        sa.Column("details", sa.Text(), nullable=True),
+        sa.Column("ip_address", sa.String(64), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+    op.create_index("ix_audit_logs_user_id", "audit_logs", ["user_id"])
+    op.create_index("ix_audit_logs_action", "audit_logs", ["action"])
+    op.create_index("ix_audit_logs_entity", "audit_logs", ["entity"])
+    op.create_index("ix_audit_logs_entity_id", "audit_logs", ["entity_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("audit_logs")
+    op.drop_table("payments")
+    op.drop_table("bookings")
+    op.drop_table("sessions")
+    op.drop_table("shifts")
+    op.drop_table("employees")
+    op.drop_table("machines")
+    op.drop_table("users")
+
+    bind = op.get_bind()
+    for enum in (payment_status, payment_method, booking_status, machine_status, machine_zone, role):
+        enum.drop(bind, checkfirst=True)
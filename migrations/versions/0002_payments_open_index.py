@@ -0,0 +1,27 @@
+"""partial index on open payments
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_payments_open",
+        "payments",
+        ["id"],
+        postgresql_where=sa.text("status IN ('created', 'pending')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payments_open", table_name="payments")
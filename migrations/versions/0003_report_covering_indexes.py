@@ -0,0 +1,58 @@
+"""covering indexes for report and balance queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_payments_created_at_covering",
+        "payments",
+        ["created_at"],
+        postgresql_include=["status", "method", "amount"],
+    )
+    op.create_index(
+        "ix_payments_user_status",
+        "payments",
+        ["user_id", "status"],
+        postgresql_include=["amount"],
+    )
+    op.create_index(
+        "ix_sessions_ended_at_covering",
+        "sessions",
+        ["ended_at"],
+        postgresql_include=["started_at", "machine_id"],
+        postgresql_where=sa.text("ended_at IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_sessions_started_at_covering",
+        "sessions",
+        ["started_at"],
+        postgresql_include=["ended_at", "machine_id"],
+        postgresql_where=sa.text("ended_at IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_sessions_user_ended",
+        "sessions",
+        ["user_id"],
+        postgresql_include=["amount"],
+        postgresql_where=sa.text("ended_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_user_ended", table_name="sessions")
+    op.drop_index("ix_sessions_started_at_covering", table_name="sessions")
+    op.drop_index("ix_sessions_ended_at_covering", table_name="sessions")
+    op.drop_index("ix_payments_user_status", table_name="payments")
+    op.drop_index("ix_payments_created_at_covering", table_name="payments")
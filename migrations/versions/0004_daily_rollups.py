@@ -0,0 +1,51 @@
+"""daily usage and revenue rollups
+
+После применения заполнить агрегаты из истории:
+    python -m app.core.rollups backfill
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_machine_usage",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("machine_id", sa.Integer(), sa.ForeignKey("machines.id"), primary_key=True),
+        sa.Column("seconds", sa.Float(), nullable=False),
+        sa.Column("kwh", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "daily_revenue",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column(
+            "method",
+            postgresql.ENUM(name="paymentmethod", create_type=False),
+            primary_key=True,
+        ),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="paymentstatus", create_type=False),
+            primary_key=True,
+        ),
+        sa.Column("amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("payments", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_shifts_date_employee", "shifts", ["shift_date", "employee_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_shifts_date_employee", table_name="shifts")
+    op.drop_table("daily_revenue")
+    op.drop_table("daily_machine_usage")
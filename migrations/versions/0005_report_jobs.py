@@ -0,0 +1,43 @@
+"""report jobs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+report_job_status = sa.Enum("queued", "running", "succeeded", "failed", name="reportjobstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_jobs",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("report", sa.String(32), nullable=False),
+        sa.Column("format", sa.String(8), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=False),
+        sa.Column("status", report_job_status, nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String(500), nullable=True),
+        sa.Column("result_path", sa.String(255), nullable=True),
+        sa.Column("result_filename", sa.String(128), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_report_jobs_user_status", "report_jobs", ["user_id", "status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_report_jobs_user_status", table_name="report_jobs")
+    op.drop_table("report_jobs")
+    report_job_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""app settings with pay rates
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    app_settings = op.create_table(
+        "app_settings",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("value", sa.String(255), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    # значения, которые раньше были зашиты в отчёты
+    now = datetime.now(timezone.utc)
+    op.bulk_insert(app_settings, [
+        {"key": "pay_per_shift", "value": "2500", "updated_at": now},
+        {"key": "tax_rate", "value": "0.13", "updated_at": now},
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table("app_settings")
@@ -0,0 +1,28 @@
+"""partial index on open sessions per machine
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_sessions_open_machine",
+        "sessions",
+        ["machine_id"],
+        postgresql_include=["auto_end_at"],
+        postgresql_where=sa.text("ended_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_open_machine", table_name="sessions")
@@ -0,0 +1,43 @@
+"""booking lifecycle statuses and sweeper indexes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # новые значения не используются в этой же транзакции — ADD VALUE допустим
+    for value in ("checked_in", "no_show", "expired"):
+        op.execute(f"ALTER TYPE bookingstatus ADD VALUE IF NOT EXISTS '{value}'")
+
+    op.create_index(
+        "ix_bookings_active_start",
+        "bookings",
+        ["start_at"],
+        postgresql_where=sa.text("status = 'active'"),
+    )
+    op.create_index(
+        "ix_bookings_active_end",
+        "bookings",
+        ["end_at"],
+        postgresql_where=sa.text("status = 'active'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_active_end", table_name="bookings")
+    op.drop_index("ix_bookings_active_start", table_name="bookings")
+    # значения enum в PostgreSQL не удаляются; завершённые брони считаем отменёнными
+    op.execute(
+        "UPDATE bookings SET status = 'cancelled' "
+        "WHERE status IN ('checked_in', 'no_show', 'expired')"
+    )
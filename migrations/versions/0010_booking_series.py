@@ -0,0 +1,75 @@
+"""booking series for recurring / bulk bookings
+
+Брони одной серии (POST /bookings/bulk) могут занимать несколько ПК
+одновременно на одного пользователя (турнир, групповая бронь), поэтому
+ограничение ex_bookings_user_overlap пересоздаётся с исключением для броней
+из одной серии. Одиночные брони (series_id IS NULL) сравниваются по -id,
+т.е. для них поведение не меняется.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS booking_series_id_seq")
+    op.add_column("bookings", sa.Column("series_id", sa.Integer(), nullable=True))
+    op.create_index(
+        "ix_bookings_series_id",
+        "bookings",
+        ["series_id"],
+        postgresql_where=sa.text("series_id IS NOT NULL"),
+    )
+
+    op.drop_constraint("ex_bookings_user_overlap", "bookings")
+    op.execute(
+        """
+        ALTER TABLE bookings ADD CONSTRAINT ex_bookings_user_overlap
+        EXCLUDE USING gist (
+            user_id WITH =,
+            during WITH &&,
+            (coalesce(series_id, -id)) WITH <>
+        ) WHERE (status = 'active')
+        """
+    )
+
+
+def downgrade() -> None:
+    # пересечения внутри серий старое ограничение не пропустит
+    op.execute(
+        """
+        UPDATE bookings b
+        SET status = 'cancelled'
+        WHERE b.status = 'active'
+          AND b.series_id IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM bookings o
+              WHERE o.status = 'active'
+                AND o.series_id = b.series_id
+                AND o.id < b.id
+                AND o.user_id = b.user_id
+                AND o.during && b.during
+          )
+        """
+    )
+    op.drop_constraint("ex_bookings_user_overlap", "bookings")
+    op.create_exclude_constraint(
+        "ex_bookings_user_overlap",
+        "bookings",
+        ("user_id", "="),
+        ("during", "&&"),
+        using="gist",
+        where="status = 'active'",
+    )
+    op.drop_index("ix_bookings_series_id", table_name="bookings")
+    op.drop_column("bookings", "series_id")
+    op.execute("DROP SEQUENCE IF EXISTS booking_series_id_seq")
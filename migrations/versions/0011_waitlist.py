@@ -0,0 +1,53 @@
+"""waitlist entries
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+waitlist_status = sa.Enum("waiting", "offered", "accepted", "expired", "cancelled", name="waitliststatus")
+# тип уже создан в 0001 для machines.zone
+machine_zone = postgresql.ENUM(
+    "STANDART", "PREMIUM", "VIP", "SUPERVIP", "SOLO", name="machine_zone", create_type=False
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "waitlist_entries",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("zone", machine_zone, nullable=False),
+        sa.Column("hours", sa.Integer(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("note", sa.String(255), nullable=True),
+        sa.Column("status", waitlist_status, nullable=False),
+        sa.Column("machine_id", sa.Integer(), sa.ForeignKey("machines.id"), nullable=True),
+        sa.Column("offered_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("offer_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("sessions.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ux_waitlist_entries_user_open",
+        "waitlist_entries",
+        ["user_id"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('waiting', 'offered')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_waitlist_entries_user_open", table_name="waitlist_entries")
+    op.drop_table("waitlist_entries")
+    waitlist_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,27 @@
+"""machine heartbeat columns
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("machines", sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        "machines",
+        sa.Column("auto_offline", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("machines", "auto_offline")
+    op.drop_column("machines", "last_seen_at")
@@ -0,0 +1,41 @@
+"""measured power samples and per-minute rollup
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "power_samples",
+        sa.Column("machine_id", sa.Integer(), primary_key=True),
+        sa.Column("ts", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("watts", sa.SmallInteger(), nullable=False),
+    )
+    op.create_index("ix_power_samples_ts_brin", "power_samples", ["ts"], postgresql_using="brin")
+
+    op.create_table(
+        "power_minutes",
+        sa.Column("machine_id", sa.Integer(), primary_key=True),
+        sa.Column("minute", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("watts_sum", sa.BigInteger(), nullable=False),
+        sa.Column("watts_max", sa.SmallInteger(), nullable=False),
+    )
+    op.create_index("ix_power_minutes_minute_brin", "power_minutes", ["minute"], postgresql_using="brin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_power_minutes_minute_brin", table_name="power_minutes")
+    op.drop_table("power_minutes")
+    op.drop_index("ix_power_samples_ts_brin", table_name="power_samples")
+    op.drop_table("power_samples")
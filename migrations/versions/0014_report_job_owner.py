@@ -0,0 +1,24 @@
+"""report job owner process and heartbeat
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("report_jobs", sa.Column("worker_id", sa.String(length=64), nullable=True))
+    op.add_column("report_jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("report_jobs", "heartbeat_at")
+    op.drop_column("report_jobs", "worker_id")
@@ -0,0 +1,85 @@
+"""
+Микробенчмарк app.core.power: скалярные overlap_seconds/energy_kwh в цикле
+Python против векторных machine_totals (scripts/power_vector.py) на синтетических сессиях.
+
+Запуск (из корня репозитория, нужен numpy):
+    pip install -r requirements-bench.txt
+    python scripts/bench_power.py --sessions 1000000 --machines 60
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from app.core.power import energy_kwh, overlap_seconds  # noqa: E402
+from power_vector import machine_totals, session_columns  # noqa: E402
+
+
+def make_rows(n: int, machines: int, period_start: datetime, days: int):
+    rnd = random.Random(42)
+    watts = {m: rnd.choice((250, 350, 450, 600)) for m in range(1, machines + 1)}
+    span = days * 86400
+    rows = []
+    for _ in range(n):
+        m = rnd.randint(1, machines)
+        # часть сессий начинается до периода и заканчивается после — проверяем обрезку
+        start = period_start + timedelta(seconds=rnd.uniform(-7200, span))
+        end = start + timedelta(seconds=rnd.uniform(600, 6 * 3600))
+        rows.append((m, start, end, watts[m]))
+    return rows
+
+
+def scalar(rows, period_start, period_end):
+    seconds = defaultdict(float)
+    kwh = defaultdict(float)
+    for m, start, end, watt in rows:
+        sec = overlap_seconds(start, end, period_start, period_end)
+        seconds[m] += sec
+        kwh[m] += energy_kwh(watt, sec)
+    return seconds, kwh
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--machines", type=int, default=60)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    period_start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    period_end = period_start + timedelta(days=args.days)
+    rows = make_rows(args.sessions, args.machines, period_start, args.days)
+
+    t = time.perf_counter()
+    s_seconds, s_kwh = scalar(rows, period_start, period_end)
+    t_scalar = time.perf_counter() - t
+
+    t = time.perf_counter()
+    cols = session_columns(rows)
+    t_columns = time.perf_counter() - t
+
+    t = time.perf_counter()
+    totals = machine_totals(cols, period_start, period_end)
+    t_vector = time.perf_counter() - t
+
+    expected = np.array([s_kwh[m] for m in totals.machine_id])
+    assert np.allclose(totals.kwh, expected), "vectorized kWh differs from scalar"
+    assert np.allclose(totals.seconds, [s_seconds[m] for m in totals.machine_id])
+
+    print(f"sessions: {args.sessions}, machines: {args.machines}")
+    print(f"scalar loop:          {t_scalar:8.3f}s")
+    print(f"tuples -> columns:    {t_columns:8.3f}s")
+    print(f"vectorized totals:    {t_vector:8.3f}s  (x{t_scalar / t_vector:.0f} vs scalar)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Бенчмарк времени старта API: от запуска процесса до первого обслуженного запроса.
+
+Для каждого прогона:
+  import  — время `import app.main` в чистом интерпретаторе
+  ready   — от запуска uvicorn до первого ответа 200 на GET /health
+
+Запуск (из корня репозитория):
+    python scripts/bench_startup.py --runs 10
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_ready(timeout: float) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited before serving a request")
+            try:
+                with urllib.request.urlopen(url, timeout=0.5) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"API did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def _summary(name: str, values: list[float]) -> str:
+    ms = [v * 1000 for v in values]
+    return (
+        f"{name:<7} min={min(ms):8.1f} ms  median={statistics.median(ms):8.1f} ms  "
+        f"max={max(ms):8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    ready = [measure_ready(args.timeout) for _ in range(args.runs)]
+
+    print(f"runs={args.runs}")
+    print(_summary("import", imports))
+    print(_summary("ready", ready))
+
+
+if __name__ == "__main__":
+    main()
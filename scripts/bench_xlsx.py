@@ -0,0 +1,69 @@
+"""
+Бенчмарк выгрузки xlsx: время и пиковая память (tracemalloc) для
+обычной книги openpyxl с автоподбором ширины по ячейкам и для write-only
+экспортёра app.core.excel.
+
+Запуск (из корня репозитория):
+    python scripts/bench_xlsx.py --rows 100000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook  # noqa: E402
+from openpyxl.utils import get_column_letter  # noqa: E402
+
+from app.core.excel import make_workbook  # noqa: E402
+
+HEADERS = ["Machine ID", "Machine Name", "Watt", "Hours Used", "kWh Used"]
+
+
+def legacy_workbook(title: str, headers: list[str], rows) -> bytes:
+    """Прежняя реализация: полная книга в памяти + повторный обход ячеек."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title[:31]
+    ws.append(headers)
+    for r in rows:
+        ws.append(list(r))
+    for col in range(1, ws.max_column + 1):
+        letter = get_column_letter(col)
+        max_len = max((len(str(c.value)) for c in ws[letter] if c.value is not None), default=0)
+        ws.column_dimensions[letter].width = min(max_len + 2, 45)
+    bio = BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
+
+
+def measure(fn: Callable, rows) -> tuple[float, float, int]:
+    tracemalloc.start()
+    t = time.perf_counter()
+    content = fn("Bench", HEADERS, rows)
+    elapsed = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, len(content)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rows = [[i, f"PC-{i:05d}", 350, round(i % 24 * 1.5, 2), round(i * 0.001, 3)] for i in range(args.rows)]
+
+    for name, fn in (("legacy", legacy_workbook), ("write-only", make_workbook)):
+        elapsed, peak_mb, size = measure(fn, rows)
+        print(f"{name:>10}: {elapsed:7.2f}s  peak {peak_mb:8.1f} MiB  file {size / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
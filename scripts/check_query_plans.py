@@ -0,0 +1,158 @@
+"""
+Проверка планов горячих запросов: каждый запрос должен идти по индексу.
+
+Скрипт в одной транзакции наполняет базу синтетическими данными, делает ANALYZE,
+прогоняет EXPLAIN для каждого запроса и проверяет, что в плане есть ожидаемый индекс.
+В конце транзакция откатывается — данные в базе не меняются.
+
+Нужна база с применёнными миграциями (alembic upgrade head):
+    DATABASE_URL=postgresql+psycopg://... python scripts/check_query_plans.py
+Код возврата 1, если хотя бы один запрос не использует индекс.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, text  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.reports import machine_usage_query, revenue_query  # noqa: E402
+from app.models.payment import Payment, PaymentStatus  # noqa: E402
+from app.models.session_model import Session  # noqa: E402
+
+USERS = 2_000
+MACHINES = 150
+SESSIONS = 300_000
+PAYMENTS = 300_000
+DAYS = 730
+
+SEED_SQL = [
+    f"""
+    INSERT INTO users (email, password_hash, role)
+    SELECT 'plancheck' || g || '@example.com', 'x', 'user'
+    FROM generate_series(1, {USERS}) g
+    """,
+    f"""
+    INSERT INTO machines (name, zone, status, watt)
+    SELECT 'PLANCHECK-' || g, 'STANDART', 'available', 450
+    FROM generate_series(1, {MACHINES}) g
+    """,
+    f"""
+    INSERT INTO sessions (user_id, machine_id, started_at, ended_at, paid_minutes,
+                          auto_end_at, billed_minutes, amount)
+    SELECT u.u0 + t.g % {USERS}, m.m0 + t.g % {MACHINES},
+           t.start, t.start + interval '2 hours', 120,
+           t.start + interval '2 hours', 120, 180
+    FROM (
+        SELECT g, now() - random() * {DAYS} * interval '1 day' AS start
+        FROM generate_series(1, {SESSIONS}) g
+    ) t,
+    (SELECT min(id) AS u0 FROM users WHERE email LIKE 'plancheck%') u,
+    (SELECT min(id) AS m0 FROM machines WHERE name LIKE 'PLANCHECK-%') m
+    """,
+    f"""
+    INSERT INTO payments (user_id, session_id, created_at, updated_at, method, status,
+                          hours, amount)
+    SELECT u.u0 + t.g % {USERS}, NULL, t.created_at, t.created_at,
+           (ARRAY['cash', 'online'])[1 + t.g % 2]::paymentmethod,
+           (ARRAY['succeeded', 'succeeded', 'succeeded', 'failed'])[1 + t.g % 4]::paymentstatus,
+           2, 180
+    FROM (
+        SELECT g, now() - random() * {DAYS} * interval '1 day' AS created_at
+        FROM generate_series(1, {PAYMENTS}) g
+    ) t,
+    (SELECT min(id) AS u0 FROM users WHERE email LIKE 'plancheck%') u
+    """,
+    "ANALYZE users",
+    "ANALYZE machines",
+    "ANALYZE sessions",
+    "ANALYZE payments",
+]
+
+
+def hot_queries(user_id: int) -> list[tuple[str, object, str]]:
+    """(название, запрос, индекс, который должен быть в плане) — по форме запросов из роутов."""
+    date_to = datetime.now(timezone.utc)
+    date_from = date_to - timedelta(days=7)
+
+    return [
+        (
+            "finance: revenue by day/method/status",
+            revenue_query(date_from, date_to),
+            "ix_payments_created_at_covering",
+        ),
+        (
+            "power/finance: per-machine usage seconds",
+            machine_usage_query(date_from, date_to),
+            "ix_sessions_ended_at_covering",
+        ),
+        (
+            "/auth/me: succeeded payments of user",
+            select(func.coalesce(func.sum(Payment.amount), 0))
+            .where(Payment.user_id == user_id)
+            .where(Payment.status == PaymentStatus.succeeded),
+            "ix_payments_user_status",
+        ),
+        (
+            "/auth/me: ended sessions of user",
+            select(func.coalesce(func.sum(Session.amount), 0))
+            .where(Session.user_id == user_id)
+            .where(Session.ended_at.isnot(None)),
+            "ix_sessions_user_ended",
+        ),
+    ]
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+async def _explain(conn: AsyncConnection, stmt) -> dict:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    raw = (await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql)).scalar_one()
+    data = raw if isinstance(raw, list) else json.loads(raw)
+    return data[0]["Plan"]
+
+
+async def main() -> int:
+    engine = create_async_engine(settings.database_url)
+    failed = 0
+
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            for sql in SEED_SQL:
+                await conn.execute(text(sql))
+
+            user_id = (
+                await conn.execute(text("SELECT min(id) FROM users WHERE email LIKE 'plancheck%'"))
+            ).scalar_one()
+
+            for name, stmt, expected in hot_queries(user_id):
+                plan = await _explain(conn, stmt)
+                used = _index_names(plan)
+                ok = expected in used
+                failed += not ok
+                print(f"[{'OK' if ok else 'FAIL'}] {name}: expected {expected}, plan uses {sorted(used) or 'no index'}")
+        finally:
+            await trans.rollback()
+
+    await engine.dispose()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,79 @@
+"""
+Векторные версии формул app.core.power над колонками numpy для
+scripts/bench_power.py. В приложение не входят: отчёты считают скалярными
+overlap_seconds/energy_kwh и суточными агрегатами, numpy ставится только
+из requirements-bench.txt.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+
+class SessionColumns(NamedTuple):
+    """Сессии в колоночном виде: время — секунды epoch (float64)."""
+    machine_id: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    watt: np.ndarray
+
+
+class MachineTotals(NamedTuple):
+    machine_id: np.ndarray
+    seconds: np.ndarray
+    kwh: np.ndarray
+
+
+def to_epoch(values: Iterable[datetime]) -> np.ndarray:
+    return np.fromiter((v.timestamp() for v in values), dtype=np.float64)
+
+
+def session_columns(rows: Iterable[tuple[int, datetime, datetime, int]]) -> SessionColumns:
+    """
+    Сырые кортежи (machine_id, started_at, ended_at, watt) из select(...).all()
+    -> колонки numpy. ORM-объекты не нужны.
+    """
+    rows = list(rows)
+    n = len(rows)
+    return SessionColumns(
+        machine_id=np.fromiter((r[0] for r in rows), dtype=np.int64, count=n),
+        start=np.fromiter((r[1].timestamp() for r in rows), dtype=np.float64, count=n),
+        end=np.fromiter((r[2].timestamp() for r in rows), dtype=np.float64, count=n),
+        watt=np.fromiter((r[3] for r in rows), dtype=np.float64, count=n),
+    )
+
+
+def overlap_seconds_array(
+    start: np.ndarray,
+    end: np.ndarray,
+    period_start: float,
+    period_end: float,
+) -> np.ndarray:
+    """overlap_seconds для массива интервалов и одного периода (секунды epoch)."""
+    return np.clip(np.minimum(end, period_end) - np.maximum(start, period_start), 0.0, None)
+
+
+def energy_kwh_array(watt: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+    return (np.asarray(watt, dtype=np.float64) / 1000) * (np.asarray(seconds, dtype=np.float64) / 3600)
+
+
+def machine_totals(
+    cols: SessionColumns,
+    period_start: datetime,
+    period_end: datetime,
+) -> MachineTotals:
+    """
+    Секунды и kWh по каждому ПК за период: обрезка интервалов по границам,
+    затем сумма по machine_id (bincount по индексам np.unique).
+    """
+    seconds = overlap_seconds_array(cols.start, cols.end, period_start.timestamp(), period_end.timestamp())
+    kwh = energy_kwh_array(cols.watt, seconds)
+
+    ids, idx = np.unique(cols.machine_id, return_inverse=True)
+    return MachineTotals(
+        machine_id=ids,
+        seconds=np.bincount(idx, weights=seconds, minlength=len(ids)),
+        kwh=np.bincount(idx, weights=kwh, minlength=len(ids)),
+    )